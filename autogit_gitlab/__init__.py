@@ -0,0 +1,25 @@
+"""
+GitLab API plumbing shared by the runner coordinator and the tools client
+
+One pooled HTTP session (``http_session``), rate limiting, retries and a
+circuit breaker (``rate_limit``), the ETag response cache
+(``response_cache``) and the ``GitLabApiError`` both clients raise
+(``errors``). Both sides read the same ``GITLAB_*`` settings.
+"""
+
+from .errors import GitLabApiError
+from .http_session import create_session
+from .rate_limit import IDEMPOTENT_METHODS, CircuitBreaker, RateLimiter, RetryPolicy, retry_after
+from .response_cache import CachedResponse, ResponseCache
+
+__all__ = [
+    "IDEMPOTENT_METHODS",
+    "CachedResponse",
+    "CircuitBreaker",
+    "GitLabApiError",
+    "RateLimiter",
+    "ResponseCache",
+    "RetryPolicy",
+    "create_session",
+    "retry_after",
+]
@@ -0,0 +1,16 @@
+"""
+GitLab API errors raised by the coordinator's and the tools' clients
+"""
+
+
+class GitLabApiError(Exception):
+    """Raised when a GitLab API request fails or returns an error response."""
+
+    def __init__(self, status_code, message, method=None, endpoint=None, retry_after=None):
+        self.status_code = status_code
+        self.message = message
+        self.method = method
+        self.endpoint = endpoint
+        # Seconds GitLab (or the circuit breaker) asked callers to back off
+        self.retry_after = retry_after
+        super().__init__(f"GitLab API Error ({status_code}): {message} [{method} {endpoint}]")
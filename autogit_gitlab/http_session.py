@@ -0,0 +1,31 @@
+"""
+Shared HTTP transport - pooled keep-alive sessions for threaded GitLab clients
+
+``tools/gitlab_client.py`` sends every call through one ``requests.Session``
+built here, so TCP and TLS connections are reused across calls and across
+the threads sharing the client instead of being set up per request:
+
+    GITLAB_HTTP_POOL_MAXSIZE      Connections kept per host (default: 16)
+    GITLAB_HTTP_POOL_CONNECTIONS  Hosts kept in the pool (default: 4)
+"""
+
+import os
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def create_session(
+    pool_maxsize: Optional[int] = None, pool_connections: Optional[int] = None
+) -> requests.Session:
+    """
+    A session whose connection pool holds ``pool_maxsize`` connections per host
+    """
+    pool_maxsize = pool_maxsize or int(os.getenv("GITLAB_HTTP_POOL_MAXSIZE", "16"))
+    pool_connections = pool_connections or int(os.getenv("GITLAB_HTTP_POOL_CONNECTIONS", "4"))
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,182 @@
+"""
+GitLab rate limiting - paces, retries and cuts off GitLab API calls
+
+``RateLimiter`` spaces requests out to the rate the server allows. It starts
+from ``GITLAB_RATE_LIMIT``, if set, and follows GitLab's ``RateLimit-Limit`` /
+``RateLimit-Remaining`` / ``RateLimit-Reset`` headers. A 429's
+``Retry-After`` pauses every caller at once. When the pause ends, callers
+resume one interval apart rather than all together.
+
+Idempotent calls that fail with a 5xx or a transport error are retried
+with full-jitter exponential backoff. ``CircuitBreaker`` stops calling
+GitLab for a cooldown after consecutive failures, then lets one trial
+call through:
+
+    GITLAB_RATE_LIMIT          Requests per minute until GitLab says otherwise (default: unpaced)
+    GITLAB_MAX_RETRIES         Retries per call (default: 4)
+    GITLAB_BACKOFF_BASE        First backoff, doubled per retry (default: 0.5 s)
+    GITLAB_BACKOFF_MAX         Longest backoff (default: 30 s)
+    GITLAB_CIRCUIT_THRESHOLD   Consecutive failures that open the circuit (default: 5)
+    GITLAB_CIRCUIT_COOLDOWN    Seconds the circuit stays open (default: 30)
+"""
+
+import os
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Mapping, Optional
+
+# Methods safe to send twice; a 429 is retried for any method, as GitLab
+# rejected it before doing anything
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Requests allowed back to back before pacing kicks in
+BURST = 5
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how patiently failed GitLab calls are retried."""
+
+    max_retries: int = 4
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            max_retries=int(os.getenv("GITLAB_MAX_RETRIES", "4")),
+            backoff_base=float(os.getenv("GITLAB_BACKOFF_BASE", "0.5")),
+            backoff_max=float(os.getenv("GITLAB_BACKOFF_MAX", "30")),
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Full jitter: a random delay up to base * 2**attempt, so callers that
+        failed together do not retry together
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+def retry_after(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds to wait from a ``Retry-After`` header (seconds or an HTTP date)
+    """
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(when - (now if now is not None else time.time()), 0.0)
+
+
+class RateLimiter:
+    """
+    Generic cell rate algorithm: each request is given the next free slot,
+    ``interval`` after the previous one, with ``BURST`` slots of slack.
+    """
+
+    def __init__(
+        self,
+        per_minute: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.limit = per_minute or float(os.getenv("GITLAB_RATE_LIMIT", "0"))
+        # Unpaced until a limit is configured or GitLab reports one
+        self.interval = 60.0 / self.limit if self.limit else 0.0
+        # Theoretical arrival time of the next request
+        self._next = 0.0
+
+    def reserve(self) -> float:
+        """
+        Take the next slot; returns how long to wait before sending
+        """
+        now = self.clock()
+        slot = max(self._next, now)
+        self._next = slot + self.interval
+        return max(slot - self.interval * BURST - now, 0.0)
+
+    def pause(self, seconds: float):
+        """
+        Hold every caller back for ``seconds``, then resume at the paced rate
+        """
+        resume = self.clock() + seconds
+        self._next = max(self._next, resume + self.interval * BURST)
+
+    def update(self, headers: Mapping[str, str]):
+        """
+        Follow the server's view of our budget
+        """
+        try:
+            limit = float(headers["RateLimit-Limit"])
+            remaining = float(headers["RateLimit-Remaining"])
+            reset = float(headers["RateLimit-Reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        window = max(reset - self.wall_clock(), 1.0)
+        if remaining <= 0:
+            self.pause(window)
+            return
+        # Spread what is left over the rest of the window
+        self.limit = max(limit, 1.0)
+        self.interval = max(60.0 / self.limit, window / remaining)
+
+
+class CircuitBreaker:
+    """
+    Opens after ``threshold`` consecutive failures; after ``cooldown`` one
+    trial call is let through, which closes it again on success.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[int] = None,
+        cooldown: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold or int(os.getenv("GITLAB_CIRCUIT_THRESHOLD", "5"))
+        self.cooldown = cooldown or float(os.getenv("GITLAB_CIRCUIT_COOLDOWN", "30"))
+        self.clock = clock
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if self.retry_after() == 0 else "open"
+
+    def retry_after(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(self._opened_at + self.cooldown - self.clock(), 0.0)
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if self.retry_after() > 0 or self._trial:
+            return False
+        self._trial = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial or self.failures >= self.threshold:
+            self._opened_at = self.clock()
+        self._trial = False
@@ -0,0 +1,233 @@
+"""
+GitLab response cache - revalidate polled listings instead of re-downloading
+
+GitLab tags GET responses with an ``ETag``. ``ResponseCache`` keeps the
+last body, validators and paging headers per URL in an LRU bounded by entry
+count, total body size and age. The client sends ``If-None-Match`` /
+``If-Modified-Since`` and serves a 304 from the cache, so an unchanged
+project or job listing costs a header round trip instead of the full body.
+With ``GITLAB_CACHE_PATH`` set, entries outlive restarts in a SQLite file.
+The file is read once at startup; changes are batched and written by a
+background thread, so lookups and updates never wait on the disk:
+
+    GITLAB_CACHE_ENTRIES         URLs kept (default: 2048, 0 disables the cache)
+    GITLAB_CACHE_MAX_BYTES       Total cached body size (default: 64 MiB)
+    GITLAB_CACHE_TTL             Seconds an entry is kept without being revalidated (default: 3600)
+    GITLAB_CACHE_PATH            SQLite file backing the cache (default: memory only)
+    GITLAB_CACHE_FLUSH_INTERVAL  Seconds between writes to the file (default: 1)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Response headers replayed with a cached body; paging depends on them
+KEPT_HEADERS = ("content-type", "link", "x-next-page", "x-total", "x-total-pages")
+
+
+@dataclass
+class CachedResponse:
+    """The last 200 served for a URL and the validators to revalidate it."""
+
+    content: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float = 0.0
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for this entry"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    LRU of ``CachedResponse`` by URL, optionally written behind to SQLite.
+
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+        flush_interval: Optional[float] = None,
+    ):
+        self.max_entries = (
+            max_entries
+            if max_entries is not None
+            else int(os.getenv("GITLAB_CACHE_ENTRIES", "2048"))
+        )
+        self.max_bytes = max_bytes or int(os.getenv("GITLAB_CACHE_MAX_BYTES", str(64 << 20)))
+        self.ttl = ttl or float(os.getenv("GITLAB_CACHE_TTL", "3600"))
+        self.flush_interval = flush_interval or float(os.getenv("GITLAB_CACHE_FLUSH_INTERVAL", "1"))
+        self.clock = clock
+        self.size = 0
+        self.hits = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        # Changes not written yet, by URL: the entry to store, or None to delete
+        self._pending: Dict[str, Optional[CachedResponse]] = {}
+        self._wake = threading.Event()
+        self._flushing = threading.Lock()
+        self._closing = False
+        self._writer: Optional[threading.Thread] = None
+
+        path = path or os.getenv("GITLAB_CACHE_PATH")
+        if path and self.enabled:
+            self._open(path)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            if self.clock() - entry.stored_at > self.ttl:
+                self._forget(url)
+                return None
+            self._entries.move_to_end(url)
+            return entry
+
+    def put(
+        self,
+        url: str,
+        content: bytes,
+        headers: Dict[str, str],
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> Optional[CachedResponse]:
+        """
+        Store a 200 that carries a validator; returns the entry, if stored
+        """
+        if not self.enabled or not (etag or last_modified) or len(content) > self.max_bytes:
+            return None
+        kept = {name: value for name, value in headers.items() if name.lower() in KEPT_HEADERS}
+        entry = CachedResponse(content, kept, etag, last_modified, self.clock())
+        with self._lock:
+            self._forget(url)
+            self._remember(url, entry)
+        return entry
+
+    def touch(self, url: str, entry: CachedResponse):
+        """A 304 confirmed the entry; restart its TTL"""
+        with self._lock:
+            self.hits += 1
+            entry.stored_at = self.clock()
+            if self._entries.get(url) is entry:
+                self._write(url, entry)
+
+    def discard(self, url: str):
+        with self._lock:
+            self._forget(url)
+
+    def flush(self):
+        """Write pending changes to the SQLite file now"""
+        if self._db is None:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        stored = [
+            (url, e.content, json.dumps(e.headers), e.etag, e.last_modified, e.stored_at)
+            for url, e in pending.items()
+            if e is not None
+        ]
+        deleted = [(url,) for url, e in pending.items() if e is None]
+        try:
+            with self._flushing, self._db:
+                self._db.executemany("DELETE FROM responses WHERE url = ?", deleted)
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)", stored
+                )
+        except sqlite3.Error as e:
+            # The file only warms the next start; the in-memory cache is intact
+            logger.warning(f"Failed to write the GitLab response cache: {e}")
+
+    def close(self):
+        if self._writer is not None:
+            self._closing = True
+            self._wake.set()
+            self._writer.join()
+            self._writer = None
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+
+    def _open(self, path: str):
+        """Load the unexpired entries from ``path`` and start the writer"""
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # Writes are batched, so a crash costs at most the last batch
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, content BLOB, "
+            "headers TEXT, etag TEXT, last_modified TEXT, stored_at REAL)"
+        )
+        self._db.execute("DELETE FROM responses WHERE stored_at < ?", (self.clock() - self.ttl,))
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT url, content, headers, etag, last_modified, stored_at FROM responses "
+            "ORDER BY stored_at DESC LIMIT ?",
+            (self.max_entries,),
+        ).fetchall()
+        with self._lock:
+            for url, content, headers, etag, last_modified, stored_at in reversed(rows):
+                entry = CachedResponse(content, json.loads(headers), etag, last_modified, stored_at)
+                self._entries[url] = entry
+                self.size += len(content)
+                self._evict()
+        self._writer = threading.Thread(
+            target=self._write_behind, name="gitlab-response-cache", daemon=True
+        )
+        self._writer.start()
+
+    def _write_behind(self):
+        while not self._closing:
+            self._wake.wait(self.flush_interval)
+            self.flush()
+
+    def _write(self, url: str, entry: Optional[CachedResponse]):
+        if self._db is not None:
+            self._pending[url] = entry
+
+    def _forget(self, url: str):
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self.size -= len(entry.content)
+            self._write(url, None)
+
+    def _remember(self, url: str, entry: CachedResponse):
+        self._entries[url] = entry
+        self.size += len(entry.content)
+        self._write(url, entry)
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            self._forget(next(iter(self._entries)))
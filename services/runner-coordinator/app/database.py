@@ -0,0 +1,90 @@
+"""
+Async database engine and session factory for the coordinator
+"""
+
+import logging
+import os
+from typing import AsyncIterator, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from .migrations import apply_migrations
+from .models import Base
+
+logger = logging.getLogger(__name__)
+
+# SQLite pragmas applied to every new connection. WAL lets the API read while
+# a lifecycle loop writes; NORMAL sync is safe under WAL and avoids an fsync
+# per commit; busy_timeout makes concurrent writers wait instead of failing.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": "5000",
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+    "cache_size": "-20000",  # 20 MB page cache
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Map plain SQLAlchemy URLs onto their async drivers, so existing
+    DATABASE_URL settings keep working: aiosqlite for SQLite (the default)
+    and asyncpg for PostgreSQL
+    """
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://") :]
+    if url.startswith("postgresql://") or url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    return url
+
+
+def create_engine_from_url(url: str, **kwargs) -> AsyncEngine:
+    """
+    Create an async engine, applying the SQLite pragmas when relevant
+    """
+    engine = create_async_engine(to_async_url(url), **kwargs)
+
+    if engine.dialect.name == "sqlite":
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+            cursor.close()
+
+    return engine
+
+
+def create_session_factory(engine: AsyncEngine) -> async_sessionmaker:
+    # Objects stay usable after commit so loops can log and return them
+    return async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+
+
+async def init_db(engine: AsyncEngine) -> List[int]:
+    """
+    Create any missing tables, then apply pending schema migrations
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        return await conn.run_sync(apply_migrations)
+
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./runner_coordinator.db")
+engine = create_engine_from_url(DATABASE_URL)
+SessionLocal = create_session_factory(engine)
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """
+    FastAPI dependency - one short-lived session per request
+    """
+    async with SessionLocal() as db:
+        yield db
@@ -0,0 +1,170 @@
+"""
+Docker events subscriber - tracks runner containers without polling each one
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+from .driver import MANAGED_LABEL, RUNNER_NAME_PREFIX, DockerDriver
+from .executors import BoundedExecutor
+
+logger = logging.getLogger(__name__)
+
+# Container actions that change what the coordinator knows about a runner
+RUNNER_EVENT_ACTIONS = (
+    "start",
+    "die",
+    "stop",
+    "oom",
+    "destroy",
+    "health_status: healthy",
+    "health_status: unhealthy",
+)
+
+# Actions after which a runner container can no longer take jobs
+RUNNER_DOWN_ACTIONS = ("die", "stop", "oom", "destroy", "health_status: unhealthy")
+
+# Marker pushed by the reader thread when the events stream ends
+_STREAM_CLOSED = object()
+
+
+@dataclass
+class ContainerEvent:
+    """A lifecycle event for a runner container."""
+
+    container_id: str
+    action: str
+    name: Optional[str] = None
+    exit_code: Optional[int] = None
+
+    @property
+    def is_down(self) -> bool:
+        return self.action in RUNNER_DOWN_ACTIONS
+
+
+class DockerEventMonitor:
+    """
+    Follows the Docker ``/events`` stream for runner containers.
+
+    On every (re)connect the monitor takes one bulk ``containers.list``
+    snapshot so state missed while disconnected is reconciled, then streams
+    events from the moment the snapshot was taken. The blocking stream is read
+    on a worker thread and handed to the event loop through a queue.
+    """
+
+    def __init__(
+        self,
+        driver: DockerDriver,
+        reconnect_delay: float = 5.0,
+        executor: Optional[BoundedExecutor] = None,
+    ):
+        self.driver = driver
+        self.reconnect_delay = reconnect_delay
+        self.executor = executor or BoundedExecutor("docker-events", 1)
+
+    async def run(
+        self,
+        on_snapshot: Callable[[Dict[str, str]], Awaitable[None]],
+        on_event: Callable[[ContainerEvent], Awaitable[None]],
+    ):
+        """
+        Reconcile and stream events forever, reconnecting when the stream drops
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            stream = None
+            try:
+                since = int(time.time())
+                snapshot = await self.executor.run(self.snapshot)
+                await on_snapshot(snapshot)
+
+                stream = await self.executor.run(self._open_stream, since)
+                queue: asyncio.Queue = asyncio.Queue()
+                # The stream reader is long-lived, so it gets its own thread
+                # rather than holding a pool worker
+                threading.Thread(target=self._pump, args=(stream, loop, queue), daemon=True).start()
+                logger.info(f"Subscribed to Docker events ({len(snapshot)} runner containers)")
+
+                while True:
+                    item = await queue.get()
+                    if item is _STREAM_CLOSED:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    await on_event(item)
+
+                logger.warning("Docker events stream closed, reconnecting")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Docker events subscription failed: {e}")
+            finally:
+                if stream is not None:
+                    stream.close()
+
+            await asyncio.sleep(self.reconnect_delay)
+
+    def snapshot(self) -> Dict[str, str]:
+        """
+        Return the status of every runner container, keyed by id
+        """
+        return self.driver.get_runner_statuses()
+
+    def _open_stream(self, since: int):
+        # Docker cannot filter events by name prefix, and unlabelled runners
+        # from older releases must not be missed, so runner containers are
+        # picked out in parse_event
+        return self.driver.client.events(since=since, decode=True, filters={"type": "container"})
+
+    @staticmethod
+    def _pump(stream, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        """
+        Read the blocking events stream on a worker thread
+        """
+
+        def put(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # Event loop already closed during shutdown
+                pass
+
+        try:
+            for raw in stream:
+                event = DockerEventMonitor.parse_event(raw)
+                if event is not None:
+                    put(event)
+        except Exception as e:
+            put(e)
+        finally:
+            put(_STREAM_CLOSED)
+
+    @staticmethod
+    def parse_event(raw: Dict) -> Optional[ContainerEvent]:
+        """
+        Convert a decoded Docker event into a ContainerEvent, or None if it is
+        not relevant to runner state
+        """
+        action = raw.get("Action") or raw.get("status")
+        if raw.get("Type", "container") != "container" or action not in RUNNER_EVENT_ACTIONS:
+            return None
+
+        actor = raw.get("Actor", {})
+        # Event attributes carry the container's name and labels
+        attributes = actor.get("Attributes", {})
+        name = attributes.get("name") or ""
+        if attributes.get(MANAGED_LABEL) != "true" and not name.startswith(RUNNER_NAME_PREFIX):
+            return None
+        exit_code = attributes.get("exitCode")
+        return ContainerEvent(
+            container_id=actor.get("ID") or raw.get("id"),
+            action=action,
+            name=attributes.get("name"),
+            exit_code=int(exit_code) if exit_code is not None else None,
+        )
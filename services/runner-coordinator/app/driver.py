@@ -1,9 +1,20 @@
+import io
 import logging
 import os
-from typing import Any, Dict, Optional
+import re
+import shutil
+import socket
+import tarfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
 
 import docker
 
+from .runner_config import RUNNER_CONFIG_DIR
+from .scheduler import HostCapacity
+
 logger = logging.getLogger(__name__)
 
 # Default network name (can be overridden by env var)
@@ -13,16 +24,172 @@ DEFAULT_NETWORK = os.environ.get("RUNNER_NETWORK", "autogit-network")
 # The coordinator sees DOCKER_HOST, but runners need the actual host socket path
 DOCKER_SOCKET_PATH = os.environ.get("RUNNER_DOCKER_SOCKET", "/var/run/docker.sock")
 
+# Label applied to every container the coordinator creates, used to filter
+# Docker events and listings down to autogit-managed resources
+MANAGED_LABEL = "autogit-managed"
+
+# Ownership labels: the coordinator instance that created a resource and the
+# runner it belongs to. Runner rows are keyed by container id, which does not
+# exist yet when the container is created, so the runner is named by its name.
+INSTANCE_LABEL = "autogit-coordinator"
+RUNNER_LABEL = "autogit-runner"
+
+# Every runner container is named with this prefix. Runners created before the
+# labels above existed carry none of them, so runner tracking matches by name.
+RUNNER_NAME_PREFIX = "autogit-runner-"
+
+# The runner's pool class, so a container that outlived its row can be adopted
+ARCHITECTURE_LABEL = "autogit-architecture"
+GPU_VENDOR_LABEL = "autogit-gpu-vendor"
+TAGS_LABEL = "autogit-tags"
+
+# Resources a container was created with, summed per host for placement
+CPU_LABEL = "autogit-cpu"
+MEMORY_LABEL = "autogit-memory"
+
+# Docker reports the kernel's machine name
+ARCHITECTURES = {"x86_64": "amd64", "amd64": "amd64", "aarch64": "arm64", "arm64": "arm64"}
+
+# Containers in these states hold no CPU or memory
+STOPPED_STATES = ("exited", "dead")
+
+# Stable across restarts when set explicitly (e.g. in compose)
+COORDINATOR_INSTANCE_ID = os.environ.get("COORDINATOR_INSTANCE_ID") or socket.gethostname()
+
+# Resources younger than this are never reaped; their runner row may not be
+# committed yet
+ORPHAN_GRACE_SECONDS = float(os.environ.get("ORPHAN_GRACE_SECONDS", "300"))
+
+# Labels gitlab-runner's docker executor puts on the build containers and
+# volumes it creates for each job
+GITLAB_MANAGED_LABEL = "com.gitlab.gitlab-runner.managed"
+GITLAB_JOB_LABEL = "com.gitlab.gitlab-runner.job.id"
+# build, cache, service, ...; only build containers run the job's script
+GITLAB_TYPE_LABEL = "com.gitlab.gitlab-runner.type"
+
+# Optional directory, visible at the same path to the coordinator and the
+# Docker host, where fast-start runner configs are written and bind-mounted.
+# When unset, config.toml is copied into the created container instead.
+RUNNER_CONFIG_HOST_DIR = os.environ.get("RUNNER_CONFIG_HOST_DIR")
+
+
+def resource_labels(runner_name: str) -> Dict[str, str]:
+    """
+    Labels for a container, network or volume owned by one runner
+    """
+    return {
+        MANAGED_LABEL: "true",
+        INSTANCE_LABEL: COORDINATOR_INSTANCE_ID,
+        RUNNER_LABEL: runner_name,
+    }
+
+
+def _created_at(value: Any) -> Optional[float]:
+    """
+    Epoch seconds from a list entry's creation time (int for containers,
+    RFC 3339 with nanoseconds for networks and volumes)
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value:
+        return None
+    try:
+        value = re.sub(r"\.\d+", "", value).replace("Z", "+00:00")
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+@dataclass
+class ManagedResource:
+    """A container, network or volume carrying the managed label."""
+
+    kind: str
+    id: str
+    name: str
+    labels: Dict[str, str] = field(default_factory=dict)
+    created: Optional[float] = None
+    # Container state (running, exited, ...); None for networks and volumes
+    status: Optional[str] = None
+    # Docker host the resource lives on
+    host: Optional[str] = None
+
+    @property
+    def runner(self) -> Optional[str]:
+        return self.labels.get(RUNNER_LABEL)
+
+    @property
+    def instance(self) -> Optional[str]:
+        return self.labels.get(INSTANCE_LABEL)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "id": self.id,
+            "name": self.name,
+            "host": self.host,
+            "runner": self.runner,
+            "instance": self.instance,
+        }
+
+
+@dataclass
+class UsageSample:
+    """One stats reading of a job's build container."""
+
+    container_id: str
+    job_id: str
+    # Cumulative CPU time in nanoseconds, and when it was read (epoch seconds)
+    cpu_time: int
+    read_at: float
+    # Peak since start where the cgroup reports one (v1), else current usage
+    # without reclaimable page cache
+    memory: int
+    # Docker host the container runs on
+    host: Optional[str] = None
+
+
+@dataclass
+class HostInventory:
+    """A daemon's hardware and what the managed containers on it were given."""
+
+    architecture: str
+    gpu_vendors: Set[str]
+    cpus: int
+    memory: int
+    allocated_cpu: float = 0.0
+    allocated_memory: int = 0
+    runners: int = 0
+    # Managed container id -> name, stopped ones included
+    containers: Dict[str, str] = field(default_factory=dict)
+
 
 class DockerDriver:
     """
     Driver for managing runner containers via the Docker API.
     """
 
-    def __init__(self, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        tls: Optional[docker.tls.TLSConfig] = None,
+        use_ssh_client: bool = False,
+        name: Optional[str] = None,
+    ):
+        """
+        Args:
+            base_url: Daemon URL (unix://, tcp:// or ssh://); DOCKER_HOST when unset.
+            tls: TLS client configuration for tcp:// endpoints.
+            use_ssh_client: Use the ssh binary instead of paramiko for ssh://.
+            name: Host name used in placement, labels and metrics.
+        """
+        # Identifies the daemon for per-host limits and placement
+        self.host = name or base_url or os.environ.get("DOCKER_HOST", "local")
         try:
             if base_url:
-                self.client = docker.DockerClient(base_url=base_url)
+                self.client = docker.DockerClient(
+                    base_url=base_url, tls=tls or False, use_ssh_client=use_ssh_client
+                )
             else:
                 self.client = docker.from_env()
             self.client.ping()
@@ -61,6 +228,47 @@ class DockerDriver:
         """Get the network name to use for runners."""
         return self._detected_network or DEFAULT_NETWORK
 
+    # A single daemon answers the placement half of the DriverPool interface
+    # trivially, so managers can use either
+
+    @property
+    def default_host(self) -> str:
+        return self.host
+
+    @property
+    def endpoints(self) -> List["DockerDriver"]:
+        """Per-daemon drivers, one Docker events stream each."""
+        return [self]
+
+    def place(self, name: str, **requirements) -> str:
+        return self.host
+
+    def release(self, name: str):
+        pass
+
+    def unavailable_hosts(self) -> Set[str]:
+        return set()
+
+    def host_capacities(self) -> List[HostCapacity]:
+        """
+        Free CPU and memory on the daemon, for the job scheduler
+        """
+        inventory = self.inventory()
+        cpu = inventory.cpus * float(os.environ.get("DOCKER_CPU_OVERCOMMIT", "1.0"))
+        # The daemon may emulate other platforms, so architecture is not checked
+        return [
+            HostCapacity(
+                host=self.host,
+                cpu=cpu,
+                memory=inventory.memory,
+                free_cpu=cpu - inventory.allocated_cpu,
+                free_memory=inventory.memory - inventory.allocated_memory,
+            )
+        ]
+
+    def driver_for(self, container_id: str) -> "DockerDriver":
+        return self
+
     def spawn_runner(
         self,
         name: str,
@@ -75,6 +283,47 @@ class DockerDriver:
     ) -> Dict[str, Any]:
         """
         Spawn a new runner container.
+
+        Equivalent to ``create_runner_container`` followed by
+        ``start_runner_container``; the provisioning pipeline calls the two
+        steps separately so they can overlap across runners.
+        """
+        created = self.create_runner_container(
+            name=name,
+            image=image,
+            cpu_limit=cpu_limit,
+            mem_limit=mem_limit,
+            network=network,
+            environment=environment,
+            platform=platform,
+            gpu_vendor=gpu_vendor,
+            userns_mode=userns_mode,
+        )
+        return self.start_runner_container(created["id"], network=created["network"])
+
+    def create_runner_container(
+        self,
+        name: str,
+        image: str = "gitlab/gitlab-runner:latest",
+        cpu_limit: float = 1.0,
+        mem_limit: str = "1g",
+        network: str = None,
+        environment: Optional[Dict[str, str]] = None,
+        platform: Optional[str] = None,
+        gpu_vendor: Optional[str] = None,
+        userns_mode: str = "host",
+        command: Optional[List[str]] = None,
+        runner_config: Optional[str] = None,
+        labels: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create (but do not start) a runner container attached to the runner network.
+
+        Args:
+            command: Optional command overriding the image default.
+            runner_config: Optional pre-rendered config.toml. The container then
+                           starts already registered, with no exec round trips.
+            labels: Extra labels on top of the ownership labels.
         """
         # Use provided network, auto-detected network, or fall back to default
         network = network or self.get_network_name()
@@ -90,34 +339,98 @@ class DockerDriver:
         elif gpu_vendor == "intel":
             devices = ["/dev/dri:/dev/dri"]
 
+        # For rootless Docker, the socket path inside runner needs to match
+        # what gitlab-runner expects (/var/run/docker.sock) but bound from host socket
+        logger.debug(f"Mounting docker socket from {DOCKER_SOCKET_PATH}")
+
+        volumes = {
+            # Mount host's docker socket into runner container
+            # Use configured path (rootless: /run/user/1000/docker.sock)
+            DOCKER_SOCKET_PATH: {"bind": "/var/run/docker.sock", "mode": "rw"}
+        }
+        if runner_config is not None and RUNNER_CONFIG_HOST_DIR:
+            config_dir = self._write_host_runner_config(name, runner_config)
+            volumes[config_dir] = {"bind": RUNNER_CONFIG_DIR, "mode": "rw"}
+
+        create_kwargs = dict(
+            image=image,
+            name=name,
+            command=command,
+            cpu_period=100000,
+            cpu_quota=int(cpu_limit * 100000),
+            mem_limit=mem_limit,
+            network=network,
+            environment=environment or {},
+            platform=platform,
+            device_requests=device_requests,
+            devices=devices,
+            userns_mode=userns_mode,
+            cap_drop=["ALL"],  # Drop all capabilities by default
+            cap_add=["CHOWN", "SETGID", "SETUID"],  # Add only necessary ones
+            security_opt=["no-new-privileges:true"],
+            restart_policy={"Name": "unless-stopped"},
+            labels={
+                **resource_labels(name),
+                CPU_LABEL: str(cpu_limit),
+                MEMORY_LABEL: str(docker.utils.parse_bytes(mem_limit)),
+                **(labels or {}),
+            },
+            volumes=volumes,
+        )
+
         try:
-            # For rootless Docker, the socket path inside runner needs to match
-            # what gitlab-runner expects (/var/run/docker.sock) but bound from host socket
-            logger.debug(f"Mounting docker socket from {DOCKER_SOCKET_PATH}")
-
-            container = self.client.containers.run(
-                image=image,
-                name=name,
-                detach=True,
-                cpu_period=100000,
-                cpu_quota=int(cpu_limit * 100000),
-                mem_limit=mem_limit,
-                network=network,
-                environment=environment or {},
-                platform=platform,
-                device_requests=device_requests,
-                devices=devices,
-                userns_mode=userns_mode,
-                cap_drop=["ALL"],  # Drop all capabilities by default
-                cap_add=["CHOWN", "SETGID", "SETUID"],  # Add only necessary ones
-                security_opt=["no-new-privileges:true"],
-                restart_policy={"Name": "unless-stopped"},
-                volumes={
-                    # Mount host's docker socket into runner container
-                    # Use configured path (rootless: /run/user/1000/docker.sock)
-                    DOCKER_SOCKET_PATH: {"bind": "/var/run/docker.sock", "mode": "rw"}
-                },
-            )
+            try:
+                container = self.client.containers.create(**create_kwargs)
+            except docker.errors.ImageNotFound:
+                # containers.create does not pull like containers.run does
+                self.client.images.pull(image, platform=platform)
+                container = self.client.containers.create(**create_kwargs)
+
+            if runner_config is not None and not RUNNER_CONFIG_HOST_DIR:
+                self._copy_runner_config(container, runner_config)
+
+            return {
+                "id": container.id,
+                "name": container.name,
+                "network": network,
+                "host": self.host,
+            }
+        except Exception as e:
+            logger.error(f"Failed to create runner {name}: {e}")
+            raise
+
+    @staticmethod
+    def _write_host_runner_config(name: str, runner_config: str) -> str:
+        config_dir = os.path.join(RUNNER_CONFIG_HOST_DIR, name)
+        os.makedirs(config_dir, mode=0o700, exist_ok=True)
+        config_path = os.path.join(config_dir, "config.toml")
+        with open(os.open(config_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            f.write(runner_config)
+        return config_dir
+
+    @staticmethod
+    def _copy_runner_config(container, runner_config: str):
+        """
+        Copy config.toml into a created container before it starts
+        """
+        data = runner_config.encode("utf-8")
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w") as tar:
+            info = tarfile.TarInfo(name="config.toml")
+            info.size = len(data)
+            info.mode = 0o600
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(data))
+        container.put_archive(RUNNER_CONFIG_DIR, archive.getvalue())
+
+    def start_runner_container(self, container_id: str, network: str = None) -> Dict[str, Any]:
+        """
+        Start a created runner container and return its networking info.
+        """
+        network = network or self.get_network_name()
+        try:
+            container = self.client.containers.get(container_id)
+            container.start()
 
             # Reload to get networking info
             container.reload()
@@ -130,9 +443,10 @@ class DockerDriver:
                 "ip_address": container.attrs["NetworkSettings"]["Networks"]
                 .get(network, {})
                 .get("IPAddress"),
+                "host": self.host,
             }
         except Exception as e:
-            logger.error(f"Failed to spawn runner {name}: {e}")
+            logger.error(f"Failed to start runner {container_id}: {e}")
             raise
 
     def stop_runner(self, container_id: str, remove: bool = True):
@@ -144,6 +458,10 @@ class DockerDriver:
             container.stop()
             if remove:
                 container.remove()
+                if RUNNER_CONFIG_HOST_DIR:
+                    shutil.rmtree(
+                        os.path.join(RUNNER_CONFIG_HOST_DIR, container.name), ignore_errors=True
+                    )
             return True
         except docker.errors.NotFound:
             logger.warning(f"Container {container_id} not found for stopping")
@@ -165,12 +483,261 @@ class DockerDriver:
             logger.error(f"Failed to get status for {container_id}: {e}")
             return "error"
 
-    def cleanup_orphans(self, label_filter: str = "autogit-runner"):
+    def inventory(self) -> HostInventory:
         """
-        Cleanup orphaned runner containers based on labels.
+        The daemon's hardware, and the resources its running managed containers
+        were created with (from their labels), in one ``info`` and one sparse
+        ``containers.list`` call
         """
-        # TODO: Implement label-based cleanup
-        pass
+        info = self.client.info()
+        containers = self.client.containers.list(
+            all=True, sparse=True, filters={"label": f"{MANAGED_LABEL}=true"}
+        )
+        machine = info.get("Architecture", "")
+        inventory = HostInventory(
+            architecture=ARCHITECTURES.get(machine, machine),
+            gpu_vendors={"nvidia"} if "nvidia" in (info.get("Runtimes") or {}) else set(),
+            cpus=info.get("NCPU", 0),
+            memory=info.get("MemTotal", 0),
+        )
+        for container in containers:
+            attrs = container.attrs
+            names = attrs.get("Names") or ()
+            inventory.containers[container.id] = names[0].lstrip("/") if names else ""
+            if attrs.get("State") in STOPPED_STATES:
+                continue
+            labels = attrs.get("Labels") or {}
+            inventory.allocated_cpu += float(labels.get(CPU_LABEL) or 0)
+            inventory.allocated_memory += int(labels.get(MEMORY_LABEL) or 0)
+            inventory.runners += 1
+        return inventory
+
+    def get_runner_statuses(self) -> Dict[str, str]:
+        """
+        Get the status of every runner container in one daemon call.
+
+        Sparse listing returns the state from the list endpoint itself instead
+        of inspecting each container, so the cost does not grow with the fleet.
+        Runners are listed by name rather than by label so unlabelled runners
+        from older releases are still seen. Containers missing from the result
+        no longer exist. Errors propagate so callers never mistake a failed
+        listing for an empty fleet.
+        """
+        containers = self.client.containers.list(
+            all=True, sparse=True, filters={"name": RUNNER_NAME_PREFIX}
+        )
+        return {container.id: container.status for container in containers}
+
+    def sample_job_usage(self) -> List[UsageSample]:
+        """
+        Read CPU time and memory of every running job build container.
+
+        Build containers are siblings of the runner on the same daemon,
+        labelled by gitlab-runner with their job id. One-shot stats return
+        a single reading without waiting a second for the daemon's second one, so
+        CPU rates are computed by the caller across consecutive readings.
+        """
+        containers = self.client.containers.list(
+            sparse=True,
+            filters={"label": [f"{GITLAB_MANAGED_LABEL}=true", f"{GITLAB_TYPE_LABEL}=build"]},
+        )
+        samples = []
+        for container in containers:
+            job_id = (container.attrs.get("Labels") or {}).get(GITLAB_JOB_LABEL)
+            if not job_id:
+                continue
+            try:
+                stats = self.client.api.stats(container.id, stream=False, one_shot=True)
+            except docker.errors.APIError as e:
+                # Most likely the job finished between the listing and the read
+                logger.debug(f"No stats for build container {container.id}: {e}")
+                continue
+            memory_stats = stats.get("memory_stats") or {}
+            page_cache = (memory_stats.get("stats") or {}).get("inactive_file", 0)
+            samples.append(
+                UsageSample(
+                    container_id=container.id,
+                    job_id=job_id,
+                    cpu_time=(stats.get("cpu_stats") or {})
+                    .get("cpu_usage", {})
+                    .get("total_usage", 0),
+                    read_at=time.time(),
+                    memory=memory_stats.get("max_usage")
+                    or max(memory_stats.get("usage", 0) - page_cache, 0),
+                    host=self.host,
+                )
+            )
+        return samples
+
+    def reset_runner(self, container_id: str, job_ids: Iterable[Any]) -> bool:
+        """
+        Get a runner container ready for its next job.
+
+        Removes the build containers and volumes the given jobs left on the
+        host, restarts the runner container if it stopped and checks that
+        gitlab-runner can still reach GitLab. Returns False when the runner
+        should be retired instead.
+        """
+        job_ids = {str(job_id) for job_id in job_ids}
+        filters = {"label": f"{GITLAB_MANAGED_LABEL}=true"}
+        try:
+            for build in self.client.containers.list(all=True, sparse=True, filters=filters):
+                if (build.attrs.get("Labels") or {}).get(GITLAB_JOB_LABEL) in job_ids:
+                    self.client.api.remove_container(build.id, force=True, v=True)
+            for volume in self.client.volumes.list(filters=filters):
+                if (volume.attrs.get("Labels") or {}).get(GITLAB_JOB_LABEL) in job_ids:
+                    self.client.api.remove_volume(volume.id, force=True)
+
+            container = self.client.containers.get(container_id)
+            if container.status != "running":
+                container.start()
+                container.reload()
+                if container.status != "running":
+                    return False
+            exit_code, output = container.exec_run(cmd=["gitlab-runner", "verify"])
+            if exit_code != 0:
+                logger.warning(f"Runner {container_id} failed verification: {output!r}")
+                return False
+            return True
+        except docker.errors.NotFound:
+            return False
+        except Exception as e:
+            logger.error(f"Failed to reset runner {container_id}: {e}")
+            return False
+
+    def list_managed_resources(
+        self, kinds: Iterable[str] = ("container", "network", "volume")
+    ) -> List[ManagedResource]:
+        """
+        List every autogit-managed resource of the given kinds, one daemon call per kind
+        """
+        filters = {"label": f"{MANAGED_LABEL}=true"}
+        resources = []
+        containers, networks, volumes = [], [], []
+        if "container" in kinds:
+            containers = self.client.containers.list(all=True, sparse=True, filters=filters)
+        if "network" in kinds:
+            networks = self.client.networks.list(filters=filters)
+        if "volume" in kinds:
+            volumes = self.client.volumes.list(filters=filters)
+        for container in containers:
+            # Sparse entries only carry the list endpoint's fields
+            attrs = container.attrs
+            resources.append(
+                ManagedResource(
+                    kind="container",
+                    id=container.id,
+                    name=(attrs.get("Names") or [""])[0].lstrip("/"),
+                    labels=attrs.get("Labels") or {},
+                    created=_created_at(attrs.get("Created")),
+                    status=attrs.get("State"),
+                    host=self.host,
+                )
+            )
+        for network in networks:
+            resources.append(
+                ManagedResource(
+                    kind="network",
+                    id=network.id,
+                    name=network.name,
+                    labels=network.attrs.get("Labels") or {},
+                    created=_created_at(network.attrs.get("Created")),
+                    host=self.host,
+                )
+            )
+        for volume in volumes:
+            resources.append(
+                ManagedResource(
+                    kind="volume",
+                    id=volume.id,
+                    name=volume.name,
+                    labels=volume.attrs.get("Labels") or {},
+                    created=_created_at(volume.attrs.get("CreatedAt")),
+                    host=self.host,
+                )
+            )
+        return resources
+
+    @staticmethod
+    def find_orphans(
+        resources: Iterable[ManagedResource],
+        live_runners: Set[str],
+        live_containers: Set[str],
+        now: Optional[float] = None,
+        grace_seconds: float = ORPHAN_GRACE_SECONDS,
+        instance: Optional[str] = None,
+    ) -> List[ManagedResource]:
+        """
+        Resources whose runner has no live database row.
+
+        Args:
+            live_runners: Names of the runners that are provisioning, idle or busy.
+            live_containers: Their container ids; containers created before
+                             ownership labels existed are matched by id.
+            instance: Only consider resources created by this coordinator
+                      instance (or unlabelled ones).
+        """
+        now = now if now is not None else time.time()
+        orphans = []
+        for resource in resources:
+            if instance is not None and resource.instance not in (None, instance):
+                continue
+            if resource.created is not None and now - resource.created < grace_seconds:
+                continue
+            if resource.runner is None and resource.kind != "container":
+                # Shared networks and volumes belong to no runner
+                continue
+            if resource.runner in live_runners or resource.id in live_containers:
+                continue
+            orphans.append(resource)
+        # Containers first, so their networks and volumes are free to remove
+        return sorted(orphans, key=lambda resource: resource.kind != "container")
+
+    def remove_resource(self, resource: ManagedResource) -> bool:
+        """
+        Force-remove a managed resource; False when it is already gone
+        """
+        try:
+            if resource.kind == "container":
+                self.client.api.remove_container(resource.id, force=True)
+                if RUNNER_CONFIG_HOST_DIR and resource.name:
+                    shutil.rmtree(
+                        os.path.join(RUNNER_CONFIG_HOST_DIR, resource.name), ignore_errors=True
+                    )
+            elif resource.kind == "network":
+                self.client.api.remove_network(resource.id)
+            else:
+                self.client.api.remove_volume(resource.id, force=True)
+            return True
+        except docker.errors.NotFound:
+            return False
+
+    def cleanup_orphans(
+        self,
+        live_runners: Set[str],
+        live_containers: Set[str],
+        dry_run: bool = False,
+        instance: Optional[str] = None,
+    ) -> List[ManagedResource]:
+        """
+        Remove the managed resources no live runner owns, one at a time.
+
+        The lifecycle manager uses ``OrphanReaper`` for concurrent, rate-limited
+        removal; this is the blocking equivalent. Returns the orphans found.
+        """
+        orphans = self.find_orphans(
+            self.list_managed_resources(), live_runners, live_containers, instance=instance
+        )
+        for resource in orphans:
+            if dry_run:
+                logger.info(f"Orphaned {resource.kind} {resource.name or resource.id}")
+                continue
+            try:
+                self.remove_resource(resource)
+                logger.info(f"Removed orphaned {resource.kind} {resource.name or resource.id}")
+            except Exception as e:
+                logger.error(f"Failed to remove {resource.kind} {resource.id}: {e}")
+        return orphans
 
     def register_gitlab_runner(
         self,
@@ -182,6 +749,8 @@ class DockerDriver:
         executor: str = "docker",
         docker_image: str = "python:3.11-slim",
         clone_url: str = None,
+        docker_cpus: Optional[float] = None,
+        docker_memory: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Register a GitLab runner inside an already running container.
@@ -189,6 +758,8 @@ class DockerDriver:
         Args:
             clone_url: Optional URL to use for cloning instead of the GitLab URL.
                        Useful when runners need to use internal network hostnames.
+            docker_cpus: CPU limit of the job build containers.
+            docker_memory: Memory limit of the job build containers, in bytes.
         """
         try:
             container = self.client.containers.get(container_id)
@@ -220,6 +791,10 @@ class DockerDriver:
             # Add clone URL if specified (for internal network access)
             if clone_url:
                 register_cmd.extend(["--clone-url", clone_url])
+            if docker_cpus:
+                register_cmd.extend(["--docker-cpus", f"{docker_cpus:g}"])
+            if docker_memory:
+                register_cmd.extend(["--docker-memory", f"{docker_memory // 1024**2}m"])
 
             # Execute the registration command
             exit_code, output = container.exec_run(cmd=register_cmd, detach=False)
@@ -0,0 +1,512 @@
+"""
+Multi-host Docker driver pool - places runners across several Docker daemons
+
+The pool implements the ``DockerDriver`` interface, so the managers use it
+unchanged. New runners are placed on a host by a pluggable policy; every
+later call for a container is routed to the host it lives on.
+
+    DOCKER_HOSTS                JSON list of endpoints, or a comma-separated list of URLs:
+                                [{"name": "node1", "url": "tcp://node1:2376",
+                                  "tls": {"ca_cert": "/certs/ca.pem",
+                                          "client_cert": "/certs/cert.pem",
+                                          "client_key": "/certs/key.pem"}},
+                                 {"name": "node2", "url": "ssh://ci@node2",
+                                  "gpu_vendors": ["nvidia"], "max_runners": 4}]
+    DOCKER_PLACEMENT_POLICY     bin_pack, spread or least_loaded (default: least_loaded)
+    DOCKER_HOST_CHECK_INTERVAL  Seconds between host health checks (default: 30)
+    DOCKER_CPU_OVERCOMMIT       Runner CPU limits allowed per host core (default: 1.0)
+
+Each health check is one ``info`` and one sparse ``containers.list`` call per
+host. A host that fails it is excluded from placement until it passes again.
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import docker
+
+from .driver import DockerDriver, ManagedResource, UsageSample
+from .scheduler import HostCapacity
+
+logger = logging.getLogger(__name__)
+
+
+class NoHostAvailable(RuntimeError):
+    """No healthy host can fit the runner."""
+
+
+@dataclass
+class HostSpec:
+    """How to reach one Docker daemon."""
+
+    name: str
+    url: str
+    tls: Optional[Dict[str, Any]] = None
+    use_ssh_client: bool = False
+    # None: detect the nvidia runtime from ``docker info``
+    gpu_vendors: Optional[List[str]] = None
+    max_runners: Optional[int] = None
+
+    @classmethod
+    def parse(cls, value: Union[str, Dict[str, Any]]) -> "HostSpec":
+        if isinstance(value, str):
+            return cls(name=value, url=value)
+        return cls(**{"name": value["url"], **value})
+
+    def tls_config(self) -> Optional[docker.tls.TLSConfig]:
+        if not self.tls:
+            return None
+        client_cert = None
+        if self.tls.get("client_cert"):
+            client_cert = (self.tls["client_cert"], self.tls["client_key"])
+        return docker.tls.TLSConfig(
+            client_cert=client_cert,
+            ca_cert=self.tls.get("ca_cert"),
+            verify=self.tls.get("verify", bool(self.tls.get("ca_cert"))),
+        )
+
+    def connect(self) -> DockerDriver:
+        return DockerDriver(
+            base_url=self.url,
+            tls=self.tls_config(),
+            use_ssh_client=self.use_ssh_client,
+            name=self.name,
+        )
+
+
+@dataclass
+class RunnerDemand:
+    """What a runner about to be created needs from its host."""
+
+    name: str
+    architecture: str = "amd64"
+    gpu_vendor: Optional[str] = None
+    cpu: float = 1.0
+    memory: int = 0
+
+
+@dataclass
+class HostState:
+    """
+    One daemon's connection, inventory and allocations.
+
+    Also stands in for a ``DockerDriver`` wherever a single daemon is
+    needed (the events monitor), raising while the host is disconnected.
+    """
+
+    spec: HostSpec
+    driver: Optional[DockerDriver] = None
+    healthy: bool = False
+    last_error: Optional[str] = None
+    architecture: Optional[str] = None
+    gpu_vendors: Set[str] = field(default_factory=set)
+    cpu_capacity: float = 0.0
+    memory_capacity: int = 0
+    allocated_cpu: float = 0.0
+    allocated_memory: int = 0
+    runners: int = 0
+    # Runner name -> (cpu, memory) placed here but not yet seen on the host
+    reservations: Dict[str, Tuple[float, int]] = field(default_factory=dict)
+
+    @property
+    def host(self) -> str:
+        return self.spec.name
+
+    @property
+    def client(self) -> docker.DockerClient:
+        if self.driver is None:
+            raise RuntimeError(f"Docker host {self.host} is not connected")
+        return self.driver.client
+
+    def get_runner_statuses(self) -> Dict[str, str]:
+        if self.driver is None:
+            raise RuntimeError(f"Docker host {self.host} is not connected")
+        return self.driver.get_runner_statuses()
+
+    @property
+    def used_cpu(self) -> float:
+        return self.allocated_cpu + sum(cpu for cpu, _ in self.reservations.values())
+
+    @property
+    def used_memory(self) -> int:
+        return self.allocated_memory + sum(memory for _, memory in self.reservations.values())
+
+    @property
+    def free_cpu(self) -> float:
+        return self.cpu_capacity - self.used_cpu
+
+    @property
+    def free_memory(self) -> int:
+        return self.memory_capacity - self.used_memory
+
+    @property
+    def load(self) -> float:
+        """Fraction of the scarcer of CPU and memory in use."""
+        cpu = self.used_cpu / self.cpu_capacity if self.cpu_capacity else 1.0
+        memory = self.used_memory / self.memory_capacity if self.memory_capacity else 1.0
+        return max(cpu, memory)
+
+    def fits(self, demand: RunnerDemand) -> bool:
+        if not self.healthy or self.architecture != demand.architecture:
+            return False
+        if demand.gpu_vendor and demand.gpu_vendor not in self.gpu_vendors:
+            return False
+        if self.spec.max_runners is not None:
+            if self.runners + len(self.reservations) >= self.spec.max_runners:
+                return False
+        return self.free_cpu >= demand.cpu and self.free_memory >= demand.memory
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "host": self.host,
+            "healthy": self.healthy,
+            "last_error": self.last_error,
+            "architecture": self.architecture,
+            "gpu_vendors": sorted(self.gpu_vendors),
+            "runners": self.runners,
+            "reserved": len(self.reservations),
+            "free_cpu": round(self.free_cpu, 2),
+            "free_memory": self.free_memory,
+        }
+
+
+# A policy picks one host among those that fit
+PlacementPolicy = Callable[[List[HostState], RunnerDemand], HostState]
+
+
+def bin_pack(candidates: List[HostState], demand: RunnerDemand) -> HostState:
+    """Fill the fullest host first, leaving whole hosts free for large runners."""
+    return min(candidates, key=lambda h: (h.free_cpu - demand.cpu, h.free_memory, h.host))
+
+
+def spread(candidates: List[HostState], demand: RunnerDemand) -> HostState:
+    """Put the runner on the host with the fewest runners."""
+    return min(candidates, key=lambda h: (h.runners + len(h.reservations), -h.free_cpu, h.host))
+
+
+def least_loaded(candidates: List[HostState], demand: RunnerDemand) -> HostState:
+    """Put the runner on the host with the most headroom on its scarcer resource."""
+    return min(candidates, key=lambda h: (h.load, h.host))
+
+
+PLACEMENT_POLICIES: Dict[str, PlacementPolicy] = {
+    "bin_pack": bin_pack,
+    "spread": spread,
+    "least_loaded": least_loaded,
+}
+
+
+def load_host_specs(value: Optional[str] = None) -> List[HostSpec]:
+    """
+    Parse ``DOCKER_HOSTS`` (JSON list or comma-separated URLs)
+    """
+    value = (value if value is not None else os.getenv("DOCKER_HOSTS", "")).strip()
+    if not value:
+        return []
+    if value.startswith("["):
+        return [HostSpec.parse(item) for item in json.loads(value)]
+    return [HostSpec.parse(url.strip()) for url in value.split(",") if url.strip()]
+
+
+class DriverPool:
+    """
+    A set of Docker hosts behaving as one driver.
+    """
+
+    def __init__(
+        self,
+        specs: Iterable[HostSpec],
+        policy: Union[str, PlacementPolicy, None] = None,
+        cpu_overcommit: Optional[float] = None,
+        connect: Callable[[HostSpec], DockerDriver] = HostSpec.connect,
+    ):
+        self.hosts: Dict[str, HostState] = {spec.name: HostState(spec) for spec in specs}
+        if not self.hosts:
+            raise ValueError("DriverPool needs at least one Docker host")
+        policy = policy or os.getenv("DOCKER_PLACEMENT_POLICY", "least_loaded")
+        self.policy = PLACEMENT_POLICIES[policy] if isinstance(policy, str) else policy
+        self.cpu_overcommit = cpu_overcommit or float(os.getenv("DOCKER_CPU_OVERCOMMIT", "1.0"))
+        self.check_interval = int(os.getenv("DOCKER_HOST_CHECK_INTERVAL", "30"))
+        self.connect = connect
+        # Container id -> host, learned from creation and health checks
+        self._containers: Dict[str, str] = {}
+        # Runner name -> host chosen by place()
+        self._placements: Dict[str, str] = {}
+        self.refresh()
+
+    @classmethod
+    def from_env(cls) -> "DriverPool":
+        return cls(load_host_specs())
+
+    # Health and inventory
+
+    def refresh(self):
+        """
+        Health-check every host and recount what runs on it
+        """
+        for state in self.hosts.values():
+            self._refresh_host(state)
+
+    def _refresh_host(self, state: HostState):
+        try:
+            if state.driver is None:
+                state.driver = self.connect(state.spec)
+            inventory = state.driver.inventory()
+        except Exception as e:
+            if state.healthy or state.last_error is None:
+                logger.warning(f"Docker host {state.host} excluded from placement: {e}")
+            state.healthy = False
+            state.last_error = str(e)
+            return
+
+        state.architecture = inventory.architecture
+        if state.spec.gpu_vendors is not None:
+            state.gpu_vendors = set(state.spec.gpu_vendors)
+        else:
+            state.gpu_vendors = inventory.gpu_vendors
+        state.cpu_capacity = inventory.cpus * self.cpu_overcommit
+        state.memory_capacity = inventory.memory
+        state.allocated_cpu = inventory.allocated_cpu
+        state.allocated_memory = inventory.allocated_memory
+        state.runners = inventory.runners
+        for container_id in inventory.containers:
+            self._containers[container_id] = state.host
+        # Runners now counted from the host itself
+        for name in set(inventory.containers.values()) & state.reservations.keys():
+            del state.reservations[name]
+
+        if not state.healthy:
+            logger.info(f"Docker host {state.host} healthy ({state.architecture})")
+        state.healthy = True
+        state.last_error = None
+
+    def unavailable_hosts(self) -> Set[str]:
+        return {name for name, state in self.hosts.items() if not state.healthy}
+
+    def host_capacities(self) -> List[HostCapacity]:
+        """
+        Free CPU and memory on the healthy hosts, net of placed runners
+        """
+        return [
+            HostCapacity(
+                host=state.host,
+                cpu=state.cpu_capacity,
+                memory=state.memory_capacity,
+                free_cpu=state.free_cpu,
+                free_memory=state.free_memory,
+                architecture=state.architecture,
+                gpu_vendors=set(state.gpu_vendors),
+            )
+            for state in self.hosts.values()
+            if state.healthy
+        ]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [state.to_dict() for state in self.hosts.values()]
+
+    @property
+    def default_host(self) -> str:
+        """Host that owns runner rows recorded before the pool existed."""
+        return next(iter(self.hosts))
+
+    @property
+    def endpoints(self) -> List[HostState]:
+        return list(self.hosts.values())
+
+    # Placement
+
+    def place(
+        self,
+        name: str,
+        architecture: str = "amd64",
+        gpu_vendor: Optional[str] = None,
+        cpu: float = 1.0,
+        memory: Union[str, int] = 0,
+        host: Optional[str] = None,
+    ) -> str:
+        """
+        Choose a host for runner ``name`` and reserve its resources there.
+        ``host`` pins the runner to a host the scheduler already picked.
+        """
+        if name in self._placements:
+            return self._placements[name]
+        demand = RunnerDemand(
+            name=name,
+            architecture=architecture,
+            gpu_vendor=gpu_vendor,
+            cpu=cpu,
+            memory=docker.utils.parse_bytes(memory) if isinstance(memory, str) else memory,
+        )
+        candidates = [
+            state
+            for state in self.hosts.values()
+            if state.fits(demand) and host in (None, state.host)
+        ]
+        if not candidates:
+            raise NoHostAvailable(
+                f"no healthy {architecture} host{f' {host}' if host else ''} with {cpu} CPUs "
+                f"and {memory} free" + (f" and a {gpu_vendor} GPU" if gpu_vendor else "")
+            )
+        state = self.policy(candidates, demand)
+        state.reservations[name] = (demand.cpu, demand.memory)
+        self._placements[name] = state.host
+        return state.host
+
+    def release(self, name: str):
+        """
+        Drop the reservation of a runner that will not be created
+        """
+        host = self._placements.pop(name, None)
+        if host is not None:
+            self.hosts[host].reservations.pop(name, None)
+
+    # Routing
+
+    def _driver(self, host: str) -> DockerDriver:
+        state = self.hosts[host]
+        if state.driver is None:
+            raise RuntimeError(f"Docker host {host} is not connected")
+        return state.driver
+
+    def driver_for(self, container_id: str) -> DockerDriver:
+        """
+        The driver of the host running ``container_id``
+        """
+        host = self._containers.get(container_id)
+        if host is not None:
+            return self._driver(host)
+        for state in self.hosts.values():
+            if not state.healthy:
+                continue
+            try:
+                state.driver.client.containers.get(container_id)
+            except docker.errors.NotFound:
+                continue
+            self._containers[container_id] = state.host
+            return state.driver
+        raise docker.errors.NotFound(f"Container {container_id} is on no Docker host")
+
+    def get_network_name(self) -> str:
+        return self._driver(self.default_host).get_network_name()
+
+    # DockerDriver interface
+
+    def create_runner_container(self, name: str, **kwargs) -> Dict[str, Any]:
+        host = self.place(
+            name,
+            architecture=(kwargs.get("platform") or "linux/amd64").split("/")[-1],
+            gpu_vendor=kwargs.get("gpu_vendor"),
+            cpu=kwargs.get("cpu_limit", 1.0),
+            memory=kwargs.get("mem_limit", "1g"),
+        )
+        try:
+            created = self._driver(host).create_runner_container(name=name, **kwargs)
+        except Exception:
+            self.release(name)
+            raise
+        self._placements.pop(name, None)
+        self._containers[created["id"]] = host
+        return created
+
+    def spawn_runner(self, name: str, **kwargs) -> Dict[str, Any]:
+        created = self.create_runner_container(name=name, **kwargs)
+        return self.start_runner_container(created["id"], network=created["network"])
+
+    def start_runner_container(self, container_id: str, network: str = None) -> Dict[str, Any]:
+        return self.driver_for(container_id).start_runner_container(container_id, network=network)
+
+    def register_gitlab_runner(self, container_id: str, **kwargs) -> Dict[str, Any]:
+        return self.driver_for(container_id).register_gitlab_runner(container_id, **kwargs)
+
+    def stop_runner(self, container_id: str, remove: bool = True):
+        try:
+            driver = self.driver_for(container_id)
+        except docker.errors.NotFound:
+            logger.warning(f"Container {container_id} not found for stopping")
+            return False
+        result = driver.stop_runner(container_id, remove=remove)
+        if remove:
+            self._containers.pop(container_id, None)
+        return result
+
+    def get_runner_status(self, container_id: str) -> str:
+        try:
+            return self.driver_for(container_id).get_runner_status(container_id)
+        except docker.errors.NotFound:
+            return "not_found"
+
+    def reset_runner(self, container_id: str, job_ids: Iterable[Any]) -> bool:
+        try:
+            return self.driver_for(container_id).reset_runner(container_id, job_ids)
+        except docker.errors.NotFound:
+            return False
+
+    def get_runner_statuses(self) -> Dict[str, str]:
+        """
+        Merged statuses of the healthy hosts. A host whose listing fails is
+        marked unhealthy; callers skip runners on ``unavailable_hosts()``.
+        """
+        statuses: Dict[str, str] = {}
+        for state in self.hosts.values():
+            if not state.healthy:
+                continue
+            try:
+                host_statuses = state.driver.get_runner_statuses()
+            except Exception as e:
+                self._mark_failed(state, e)
+                continue
+            for container_id in host_statuses:
+                self._containers[container_id] = state.host
+            statuses.update(host_statuses)
+        return statuses
+
+    def sample_job_usage(self) -> List[UsageSample]:
+        samples: List[UsageSample] = []
+        for state in self.hosts.values():
+            if not state.healthy:
+                continue
+            try:
+                samples.extend(state.driver.sample_job_usage())
+            except Exception as e:
+                self._mark_failed(state, e)
+        return samples
+
+    def list_managed_resources(
+        self, kinds: Iterable[str] = ("container", "network", "volume")
+    ) -> List[ManagedResource]:
+        resources: List[ManagedResource] = []
+        for state in self.hosts.values():
+            if not state.healthy:
+                continue
+            try:
+                resources.extend(state.driver.list_managed_resources(kinds=kinds))
+            except Exception as e:
+                self._mark_failed(state, e)
+        return resources
+
+    find_orphans = staticmethod(DockerDriver.find_orphans)
+
+    def remove_resource(self, resource: ManagedResource) -> bool:
+        return self._driver(resource.host or self.default_host).remove_resource(resource)
+
+    # Same algorithm over the merged listing
+    cleanup_orphans = DockerDriver.cleanup_orphans
+
+    def _mark_failed(self, state: HostState, error: Exception):
+        logger.warning(f"Docker host {state.host} excluded from placement: {error}")
+        state.healthy = False
+        state.last_error = str(error)
+
+
+def create_driver() -> Union[DockerDriver, DriverPool]:
+    """
+    A DriverPool when DOCKER_HOSTS lists endpoints, else a DockerDriver for DOCKER_HOST
+    """
+    specs = load_host_specs()
+    if specs:
+        logger.info(f"Using {len(specs)} Docker host(s): {', '.join(s.name for s in specs)}")
+        return DriverPool(specs)
+    return DockerDriver()
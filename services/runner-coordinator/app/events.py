@@ -0,0 +1,113 @@
+"""
+In-process job event bus - wakes dispatchers as soon as GitLab reports a job
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# GitLab job statuses that mean the job is waiting for a runner
+PENDING_JOB_STATUSES = ("created", "pending")
+
+# GitLab job statuses after which the runner that ran the job is free again
+FINISHED_JOB_STATUSES = ("success", "failed", "canceled")
+
+# Map GitLab job statuses onto the coordinator's Job.status values
+JOB_STATUS_MAP = {
+    "created": "queued",
+    "pending": "queued",
+    "running": "running",
+    "success": "completed",
+    "failed": "failed",
+    "canceled": "failed",
+    "skipped": "failed",
+}
+
+
+@dataclass
+class JobEvent:
+    """A GitLab job state change received from a webhook."""
+
+    job_id: Any
+    project_id: int
+    project_name: str
+    status: str = "pending"
+    name: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    # Pipeline ref, and whether it is a tag; they set the job's priority class
+    ref: Optional[str] = None
+    tag: bool = False
+    # Serialized trace context of the webhook that reported the job
+    trace_context: Optional[str] = None
+    # GitLab's runner object (id, description) for jobs a runner picked up
+    runner: Optional[Dict[str, Any]] = None
+
+    @property
+    def is_pending(self) -> bool:
+        return self.status in PENDING_JOB_STATUSES
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_JOB_STATUSES
+
+    def as_gitlab_job(self) -> Dict[str, Any]:
+        """
+        Shape the event like a GitLab jobs API item so it can share the
+        polling code path
+        """
+        return {
+            "id": self.job_id,
+            "name": self.name,
+            "status": self.status,
+            "tag_list": self.tags,
+            "ref": self.ref,
+            "tag": self.tag,
+            "project": {"id": self.project_id, "name": self.project_name},
+        }
+
+
+class JobEventBus:
+    """
+    Fans job events out to every subscribed dispatcher.
+
+    Each subscriber owns a bounded queue. Publishing never blocks the webhook
+    handler: when a subscriber falls behind, the event is dropped for that
+    subscriber and picked up by its next reconciliation sweep instead.
+    """
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._subscribers: List[asyncio.Queue] = []
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def publish(self, event: JobEvent):
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning(
+                    f"Job event queue full, dropping event for job {event.job_id} "
+                    f"(reconciliation will pick it up)"
+                )
+
+
+async def next_event(queue: asyncio.Queue, timeout: float) -> Optional[JobEvent]:
+    """
+    Wait up to ``timeout`` seconds for the next event, returning None when the
+    wait times out so callers can run their reconciliation sweep
+    """
+    try:
+        return await asyncio.wait_for(queue.get(), timeout=timeout)
+    except asyncio.TimeoutError:
+        return None
@@ -0,0 +1,137 @@
+"""
+Bounded thread pools for blocking Docker SDK calls
+
+The Docker SDK is synchronous. Calling it directly from ``async def`` code
+blocks the event loop, so every blocking call goes through one of these
+pools instead. GitLab calls are async (see ``gitlab_client``).
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from opentelemetry.trace import SpanKind
+
+from .metrics import DOCKER_API_LATENCY
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedExecutor:
+    """
+    A fixed-size thread pool that tracks its queue depth and saturation.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run ``fn`` on the pool and await its result
+        """
+        with self._lock:
+            self._queued += 1
+
+        # Carry contextvars (the current trace span) over to the pool thread
+        call = functools.partial(contextvars.copy_context().run, self._call, fn, *args, **kwargs)
+        future = self._pool.submit(call)
+        future.add_done_callback(self._dequeue_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _dequeue_cancelled(self, future: Future):
+        # A call cancelled while queued (its caller was cancelled, or the pool
+        # shut down) never reaches _call
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def _call(self, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "active": self._active,
+                "queued": self._queued,
+                "saturation": round(self._active / self.max_workers, 3),
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class Executors:
+    """
+    The coordinator's blocking-call pools, one per backend.
+    """
+
+    def __init__(self, docker_workers: int = None):
+        self.docker = BoundedExecutor(
+            "docker", docker_workers or int(os.getenv("DOCKER_EXECUTOR_WORKERS", "8"))
+        )
+        logger.info(f"Executors initialized: docker={self.docker.max_workers} workers")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {"docker": self.docker.stats()}
+
+    def shutdown(self):
+        self.docker.shutdown()
+
+
+class AsyncDriver:
+    """
+    Awaitable facade over a synchronous driver.
+
+    Every method call is dispatched to the given pool, so
+    ``await async_driver.spawn_runner(...)`` never blocks the event loop.
+    """
+
+    def __init__(self, driver, executor: BoundedExecutor):
+        self.driver = driver
+        self.executor = executor
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.driver, name)
+        if not callable(attr):
+            return attr
+
+        def timed(*args, **kwargs):
+            # Time the call itself, not the wait for a pool thread
+            with tracer.start_as_current_span(f"docker.{name}", kind=SpanKind.CLIENT):
+                with DOCKER_API_LATENCY.labels(name).time():
+                    return attr(*args, **kwargs)
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self.executor.run(timed, *args, **kwargs)
+
+        return call
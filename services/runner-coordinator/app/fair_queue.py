@@ -0,0 +1,290 @@
+"""
+Fair-share job queue - decides which queued jobs are dispatched first
+
+Queued jobs are kept in memory, in one heap per project and priority class,
+and each dispatch pass takes them in this order:
+
+1. Priority class, highest first. A job moves up one class for every
+   ``JOB_AGING_SECONDS`` its project has gone without a dispatch while the
+   job waited, so low-priority work is never starved - but a project that
+   is being served, like one working through a large matrix, does not age.
+2. Weighted fair share between projects (start-time fair queuing): every
+   dispatched job advances its project's virtual clock by 1 / weight, and
+   the project furthest behind goes next.
+3. Oldest first within a project and class.
+
+A project already running ``max_running`` jobs gets none until one finishes.
+
+    JOB_PRIORITY_REFS    Refs whose jobs are "protected" class (default: main,master)
+    JOB_AGING_SECONDS    Wait that promotes a job one class (default: 300, 0 = never)
+    PROJECT_MAX_RUNNING  Running jobs allowed per project (default: 0, no cap)
+    FAIR_SHARE_PROJECTS  JSON per-project overrides, e.g.
+                         {"42": {"weight": 2, "max_running": 10}}
+
+Jobs of tag pipelines are "release" class, jobs on a protected ref are
+"protected", and a ``priority:<class>`` job tag overrides both.
+"""
+
+import heapq
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_CLASSES = {"low": 0, "normal": 1, "protected": 2, "release": 3}
+DEFAULT_PRIORITY = PRIORITY_CLASSES["normal"]
+HIGHEST_PRIORITY = max(PRIORITY_CLASSES.values())
+PRIORITY_TAG_PREFIX = "priority:"
+
+
+def job_priority(
+    ref: Optional[str], tag: bool, tags: Iterable[str], protected_refs: Iterable[str]
+) -> int:
+    """
+    Priority class of a job from its pipeline ref and its tags
+    """
+    for job_tag in tags:
+        job_tag = job_tag.strip().lower()
+        if job_tag.startswith(PRIORITY_TAG_PREFIX):
+            name = job_tag[len(PRIORITY_TAG_PREFIX) :]
+            if name in PRIORITY_CLASSES:
+                return PRIORITY_CLASSES[name]
+    if tag:
+        return PRIORITY_CLASSES["release"]
+    if ref in protected_refs:
+        return PRIORITY_CLASSES["protected"]
+    return DEFAULT_PRIORITY
+
+
+@dataclass
+class ProjectShare:
+    """One project's share of the runners."""
+
+    weight: float = 1.0
+    # 0 = no cap
+    max_running: int = 0
+
+
+@dataclass
+class FairSharePolicy:
+    """How queued jobs of different projects and priorities are ordered."""
+
+    aging_seconds: float = 300.0
+    max_running: int = 0
+    projects: Dict[int, ProjectShare] = field(default_factory=dict)
+    protected_refs: FrozenSet[str] = frozenset({"main", "master"})
+
+    @classmethod
+    def from_env(cls) -> "FairSharePolicy":
+        max_running = int(os.getenv("PROJECT_MAX_RUNNING", "0"))
+        projects = {}
+        try:
+            overrides = json.loads(os.getenv("FAIR_SHARE_PROJECTS") or "{}")
+            for project_id, share in overrides.items():
+                weight = float(share.get("weight", 1.0))
+                if weight <= 0:
+                    raise ValueError(f"weight of project {project_id} must be positive")
+                projects[int(project_id)] = ProjectShare(
+                    weight=weight, max_running=int(share.get("max_running", max_running))
+                )
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.error(f"Ignoring invalid FAIR_SHARE_PROJECTS: {e}")
+            projects = {}
+        refs = os.getenv("JOB_PRIORITY_REFS", "main,master")
+        return cls(
+            aging_seconds=float(os.getenv("JOB_AGING_SECONDS", "300")),
+            max_running=max_running,
+            projects=projects,
+            protected_refs=frozenset(ref.strip() for ref in refs.split(",") if ref.strip()),
+        )
+
+    def share(self, project_id: int) -> ProjectShare:
+        """
+        ``project_id``'s configured share, else the default one. Defaults are
+        not stored, so the policy does not grow with every project it sees.
+        """
+        share = self.projects.get(project_id)
+        if share is None:
+            return ProjectShare(max_running=self.max_running)
+        return share
+
+    def effective_priority(self, job: "QueuedJob", now: float, served_at: float = 0.0) -> int:
+        """
+        ``job``'s class after aging; ``served_at`` is its project's last dispatch
+        """
+        if not self.aging_seconds or job.priority >= HIGHEST_PRIORITY:
+            return job.priority
+        waited = now - max(job.enqueued_at, served_at)
+        aged = int(max(waited, 0.0) // self.aging_seconds)
+        return min(job.priority + aged, HIGHEST_PRIORITY)
+
+
+@dataclass
+class QueuedJob:
+    """A queued job, as the fair-share queue sees it."""
+
+    key: Hashable
+    project_id: int
+    priority: int = DEFAULT_PRIORITY
+    # Epoch seconds the job was queued at; drives aging and FIFO order
+    enqueued_at: float = 0.0
+
+
+class FairShareQueue:
+    """
+    Queued jobs in fair-share order, updated one job at a time.
+
+    Each project keeps one heap per priority class, ordered oldest first.
+    Removal is lazy: a heap item whose job was discarded or re-added is
+    skipped when it reaches the top.
+    """
+
+    def __init__(self, policy: Optional[FairSharePolicy] = None):
+        self.policy = policy or FairSharePolicy.from_env()
+        self._jobs: Dict[Hashable, Tuple[QueuedJob, int]] = {}
+        self._heaps: Dict[int, Dict[int, List[Tuple[float, int, Hashable]]]] = {}
+        self._seq = 0
+        # Virtual time: the start tag of the last dispatched job, and each
+        # project's finish tag
+        self._virtual_time = 0.0
+        self._finish: Dict[int, float] = {}
+        # Project -> when it last had a job dispatched, for aging
+        self._served_at: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._jobs
+
+    def add(self, job: QueuedJob):
+        current = self._jobs.get(job.key)
+        if current is not None and current[0] == job:
+            return
+        self._seq += 1
+        self._jobs[job.key] = (job, self._seq)
+        heaps = self._heaps.setdefault(job.project_id, {})
+        heapq.heappush(heaps.setdefault(job.priority, []), (job.enqueued_at, self._seq, job.key))
+
+    def discard(self, key: Hashable):
+        self._jobs.pop(key, None)
+
+    def sync(self, jobs: Iterable[QueuedJob]):
+        """
+        Make the queue hold exactly ``jobs``, keeping the place of those it had
+        """
+        jobs = {job.key: job for job in jobs}
+        for key in self._jobs.keys() - jobs.keys():
+            self.discard(key)
+        for job in jobs.values():
+            self.add(job)
+        self._compact()
+
+    def take(
+        self, now: float, running: Dict[int, int], limit: Optional[int] = None
+    ) -> List[QueuedJob]:
+        """
+        Remove and return up to ``limit`` jobs in dispatch order, skipping
+        projects at their cap given ``running`` jobs per project.
+
+        The jobs that end up dispatched are passed to ``charge``; the rest go
+        back with ``requeue``.
+        """
+        virtual_time = self._virtual_time
+        finish: Dict[int, float] = {}
+        served_at = dict(self._served_at)
+        taken_per_project: Dict[int, int] = {}
+
+        def next_turn(project_id: int) -> Optional[Tuple]:
+            share = self.policy.share(project_id)
+            used = running.get(project_id, 0) + taken_per_project.get(project_id, 0)
+            if share.max_running and used >= share.max_running:
+                return None
+            head = self._head(project_id, now, served_at.get(project_id, 0.0))
+            if head is None:
+                return None
+            priority, job = head
+            start = max(virtual_time, finish.get(project_id, self._finish.get(project_id, 0.0)))
+            return (-priority, start, job.enqueued_at, self._jobs[job.key][1], project_id)
+
+        turns = [turn for turn in map(next_turn, list(self._heaps)) if turn is not None]
+        heapq.heapify(turns)
+
+        taken: List[QueuedJob] = []
+        while turns and (limit is None or len(taken) < limit):
+            _, start, _, _, project_id = heapq.heappop(turns)
+            _, job = self._head(project_id, now, served_at.get(project_id, 0.0))
+            heapq.heappop(self._heaps[project_id][job.priority])
+            del self._jobs[job.key]
+            taken.append(job)
+
+            virtual_time = max(virtual_time, start)
+            finish[project_id] = start + 1.0 / self.policy.share(project_id).weight
+            served_at[project_id] = now
+            taken_per_project[project_id] = taken_per_project.get(project_id, 0) + 1
+            turn = next_turn(project_id)
+            if turn is not None:
+                heapq.heappush(turns, turn)
+        return taken
+
+    def charge(self, jobs: Iterable[QueuedJob], now: float):
+        """
+        Advance the virtual clocks of the projects whose ``jobs`` were dispatched
+        """
+        for job in jobs:
+            self._served_at[job.project_id] = now
+            start = max(self._virtual_time, self._finish.get(job.project_id, 0.0))
+            self._virtual_time = start
+            self._finish[job.project_id] = start + 1.0 / self.policy.share(job.project_id).weight
+
+    def requeue(self, jobs: Iterable[QueuedJob]):
+        for job in jobs:
+            self.add(job)
+
+    def _head(
+        self, project_id: int, now: float, served_at: float
+    ) -> Optional[Tuple[int, QueuedJob]]:
+        """
+        The job a project would dispatch next, with its aged priority
+        """
+        best = None
+        for heap in self._heaps.get(project_id, {}).values():
+            # Drop items of discarded or re-added jobs
+            while heap:
+                _, seq, key = heap[0]
+                current = self._jobs.get(key)
+                if current is not None and current[1] == seq:
+                    break
+                heapq.heappop(heap)
+            if not heap:
+                continue
+            job = self._jobs[heap[0][2]][0]
+            candidate = (self.policy.effective_priority(job, now, served_at), -job.enqueued_at)
+            if best is None or candidate > best[0]:
+                best = (candidate, job)
+        return (best[0][0], best[1]) if best else None
+
+    def _compact(self):
+        """
+        Forget empty projects, and finish tags that can no longer matter
+        """
+        for project_id in list(self._heaps):
+            heaps = self._heaps[project_id]
+            for priority in list(heaps):
+                heaps[priority] = [
+                    item
+                    for item in heaps[priority]
+                    if self._jobs.get(item[2], (None, None))[1] == item[1]
+                ]
+                heapq.heapify(heaps[priority])
+                if not heaps[priority]:
+                    del heaps[priority]
+            if not heaps:
+                del self._heaps[project_id]
+        for project_id, finish in list(self._finish.items()):
+            if project_id not in self._heaps and finish <= self._virtual_time:
+                del self._finish[project_id]
+                self._served_at.pop(project_id, None)
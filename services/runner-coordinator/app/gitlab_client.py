@@ -0,0 +1,407 @@
+"""
+Async GitLab API client - GitLab calls that never leave the event loop
+
+``AsyncGitLabClient`` mirrors ``tools/gitlab_client.GitLabClient`` on httpx,
+plus the runner and job calls the coordinator needs. All calls share one
+pooled keep-alive transport, negotiate HTTP/2 when the ``h2`` package is
+installed, and hold at most a fixed number of requests in flight per host,
+so hundreds of calls can be awaited at once without worker threads:
+
+    GITLAB_MAX_CONCURRENCY  Requests in flight per GitLab host (default: 32)
+
+Calls are paced, retried and cut off as described in ``rate_limit``. GET
+responses are revalidated through ``response_cache`` rather than re-downloaded.
+"""
+
+import asyncio
+import logging
+import os
+import urllib.parse
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from autogit_gitlab.errors import GitLabApiError
+from autogit_gitlab.rate_limit import (
+    IDEMPOTENT_METHODS,
+    CircuitBreaker,
+    RateLimiter,
+    RetryPolicy,
+    retry_after,
+)
+from autogit_gitlab.response_cache import CachedResponse, ResponseCache
+
+from .metrics import (
+    GITLAB_CACHE,
+    GITLAB_CACHE_BYTES_SAVED,
+    GITLAB_CIRCUIT_OPEN,
+    GITLAB_RETRIES,
+    GITLAB_THROTTLED,
+    observe_gitlab_request,
+)
+from .tracing import gitlab_span
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Largest page GitLab serves
+MAX_PER_PAGE = 100
+
+# Cursor pagination for listings that support it, ordered by id
+KEYSET_PARAMS = {"pagination": "keyset", "order_by": "id", "sort": "asc"}
+
+
+class AsyncGitLabClient:
+    """
+    Asyncio client for the GitLab REST API v4.
+
+    Listings come as async iterators that fetch one page at a time
+    (``iter_*``); the ``get_*`` listing methods collect every page.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        token: Optional[str] = None,
+        timeout: float = 10,
+        max_per_host: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        limiter: Optional[RateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        self.base_url = base_url or os.getenv("GITLAB_URL", "http://localhost:3000")
+        self.api_url = f"{self.base_url.rstrip('/')}/api/v4"
+        self.token = token or os.getenv("GITLAB_TOKEN")
+        if not self.token:
+            raise ValueError(
+                "GitLab API token is required. Set GITLAB_TOKEN env var "
+                "or pass it to the constructor."
+            )
+        self.max_per_host = max_per_host or int(os.getenv("GITLAB_MAX_CONCURRENCY", "32"))
+        self.client = httpx.AsyncClient(
+            headers={"PRIVATE-TOKEN": self.token},
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=self.max_per_host),
+            http2=HTTP2_AVAILABLE and transport is None,
+            transport=transport,
+        )
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.limiter = limiter or RateLimiter()
+        self.retry = retry or RetryPolicy.from_env()
+        self.breaker = breaker or CircuitBreaker()
+        self.cache = cache if cache is not None else ResponseCache()
+
+    async def aclose(self):
+        await self.client.aclose()
+        self.cache.close()
+
+    async def __aenter__(self) -> "AsyncGitLabClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        form: Optional[Dict] = None,
+        params: Optional[Dict] = None,
+        url: Optional[str] = None,
+    ) -> httpx.Response:
+        """
+        Send one request, waiting for a free slot on its host and for the
+        rate limiter. Throttled calls, and idempotent calls that hit a 5xx
+        or a transport error, are retried with backoff.
+        """
+        url = url or f"{self.api_url}/{endpoint.lstrip('/')}"
+        # Built once and re-sent on retry
+        request = self.client.build_request(method, url, json=data, data=form, params=params)
+        slots = self._host_slots.setdefault(request.url.host, asyncio.Semaphore(self.max_per_host))
+        retryable = method.upper() in IDEMPOTENT_METHODS
+        key = cached = None
+        if method.upper() == "GET" and self.cache.enabled:
+            key = str(request.url)
+            cached = self.cache.get(key)
+            if cached is not None:
+                request.headers.update(cached.validators())
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise GitLabApiError(
+                    0,
+                    "GitLab circuit open after repeated failures",
+                    method,
+                    endpoint,
+                    retry_after=self.breaker.retry_after(),
+                )
+            wait = self.limiter.reserve()
+            if wait > 0:
+                GITLAB_THROTTLED.labels("client").inc()
+                await asyncio.sleep(wait)
+
+            try:
+                async with slots:
+                    with gitlab_span(method, endpoint), observe_gitlab_request(method, endpoint):
+                        response = await self.client.send(request)
+            except httpx.HTTPError as e:
+                self._record_failure()
+                if retryable and attempt < self.retry.max_retries:
+                    GITLAB_RETRIES.labels("0").inc()
+                    await asyncio.sleep(self.retry.backoff(attempt))
+                    attempt += 1
+                    continue
+                # Wrap transport-level errors in GitLabApiError for uniformity
+                raise GitLabApiError(0, f"Request to GitLab failed: {e}", method, endpoint) from e
+
+            self.limiter.update(response.headers)
+            status = response.status_code
+            delay = None
+            if status == 429:
+                # Not a failure of GitLab: every caller waits out the pause
+                GITLAB_THROTTLED.labels("server").inc()
+                delay = retry_after(response.headers) or self.retry.backoff(attempt)
+                self.limiter.pause(delay)
+                # GitLab answered, so a half-open trial has done its job
+                self.breaker.record_success()
+                GITLAB_CIRCUIT_OPEN.set(0)
+                retryable_now = True
+            elif status >= 500:
+                self._record_failure()
+                retryable_now = retryable
+            else:
+                self.breaker.record_success()
+                GITLAB_CIRCUIT_OPEN.set(0)
+                retryable_now = False
+
+            if retryable_now and attempt < self.retry.max_retries:
+                GITLAB_RETRIES.labels(str(status)).inc()
+                if status != 429:
+                    await asyncio.sleep(self.retry.backoff(attempt))
+                attempt += 1
+                continue
+            break
+
+        if key is not None:
+            response = self._through_cache(key, response, cached)
+        if status >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except (ValueError, AttributeError):
+                message = response.text
+            raise GitLabApiError(status, message, method, endpoint, retry_after=delay)
+        return response
+
+    def _through_cache(
+        self, key: str, response: httpx.Response, cached: Optional[CachedResponse]
+    ) -> httpx.Response:
+        """
+        Answer a 304 from the cache; remember a 200 that carries a validator
+        """
+        if response.status_code == 304 and cached is not None:
+            GITLAB_CACHE.labels("hit").inc()
+            GITLAB_CACHE_BYTES_SAVED.inc(len(cached.content))
+            self.cache.touch(key, cached)
+            return httpx.Response(
+                200, headers=cached.headers, content=cached.content, request=response.request
+            )
+        if response.status_code == 200:
+            GITLAB_CACHE.labels("changed" if cached else "miss").inc()
+            self.cache.put(
+                key,
+                response.content,
+                dict(response.headers),
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+        return response
+
+    def _record_failure(self):
+        self.breaker.record_failure()
+        GITLAB_CIRCUIT_OPEN.set(1 if self.breaker.state != "closed" else 0)
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        form: Optional[Dict] = None,
+        params: Optional[Dict] = None,
+    ) -> Any:
+        response = await self._send(method, endpoint, data=data, form=form, params=params)
+        return response.json() if response.content else None
+
+    async def paginate(
+        self, endpoint: str, params: Optional[Dict] = None, keyset: bool = False
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield every item of a listing, fetching a page only when the last one
+        is used up. Follows the ``Link`` header, falling back to X-Next-Page;
+        ``keyset`` pages by id cursor where the endpoint supports it.
+        """
+        params = {**(params or {}), "per_page": MAX_PER_PAGE}
+        if keyset:
+            params.update(KEYSET_PARAMS)
+        response = await self._send("GET", endpoint, params=params)
+        while True:
+            for item in response.json() or []:
+                yield item
+            next_link = response.links.get("next", {}).get("url")
+            next_page = response.headers.get("X-Next-Page")
+            if next_link:
+                response = await self._send("GET", endpoint, url=next_link)
+            elif next_page:
+                response = await self._send("GET", endpoint, params={**params, "page": next_page})
+            else:
+                return
+
+    async def _collect(self, items: AsyncIterator[Dict]) -> List[Dict]:
+        return [item async for item in items]
+
+    # User Operations
+    def iter_users(self) -> AsyncIterator[Dict]:
+        return self.paginate("users", keyset=True)
+
+    async def get_users(self) -> List[Dict]:
+        return await self._collect(self.iter_users())
+
+    async def get_current_user(self) -> Dict:
+        return await self._request("GET", "user")
+
+    # Project Operations
+    def iter_projects(self, owned: bool = True, **filters) -> AsyncIterator[Dict]:
+        params = {"owned": "true"} if owned else {}
+        return self.paginate("projects", params={**params, **filters}, keyset=True)
+
+    async def get_projects(self, owned: bool = True) -> List[Dict]:
+        return await self._collect(self.iter_projects(owned=owned))
+
+    async def create_project(self, name, path=None, namespace_id=None, visibility="private"):
+        data = {
+            "name": name,
+            "path": path or name.lower().replace(" ", "-"),
+            "visibility": visibility,
+        }
+        if namespace_id:
+            data["namespace_id"] = namespace_id
+        return await self._request("POST", "projects", data=data)
+
+    async def delete_project(self, project_id):
+        return await self._request("DELETE", f"projects/{project_id}")
+
+    # SSH Key Operations
+    def iter_ssh_keys(self) -> AsyncIterator[Dict]:
+        return self.paginate("user/keys")
+
+    async def get_ssh_keys(self) -> List[Dict]:
+        return await self._collect(self.iter_ssh_keys())
+
+    async def add_ssh_key(self, title, key):
+        return await self._request("POST", "user/keys", data={"title": title, "key": key})
+
+    # Group Operations
+    def iter_groups(self) -> AsyncIterator[Dict]:
+        # Groups only support keyset pagination ordered by name
+        return self.paginate("groups")
+
+    async def get_groups(self) -> List[Dict]:
+        return await self._collect(self.iter_groups())
+
+    async def create_group(self, name, path, visibility="private"):
+        data = {"name": name, "path": path, "visibility": visibility}
+        return await self._request("POST", "groups", data=data)
+
+    # Branch Protection Operations
+    async def protect_branch(
+        self, project_id, branch_name, push_access_level=40, merge_access_level=40
+    ):
+        data = {
+            "name": branch_name,
+            "push_access_level": push_access_level,
+            "merge_access_level": merge_access_level,
+        }
+        return await self._request("POST", f"projects/{project_id}/protected_branches", data=data)
+
+    async def unprotect_branch(self, project_id, branch_name):
+        encoded_branch = urllib.parse.quote(branch_name, safe="")
+        return await self._request(
+            "DELETE", f"projects/{project_id}/protected_branches/{encoded_branch}"
+        )
+
+    # Webhook Operations
+    async def add_project_webhook(
+        self, project_id, url, push_events=True, merge_requests_events=True
+    ):
+        data = {
+            "url": url,
+            "push_events": push_events,
+            "merge_requests_events": merge_requests_events,
+        }
+        return await self._request("POST", f"projects/{project_id}/hooks", data=data)
+
+    # Repository File Operations
+    async def create_file(self, project_id, file_path, branch, content, commit_message):
+        data = {"branch": branch, "content": content, "commit_message": commit_message}
+        encoded_path = urllib.parse.quote(file_path, safe="")
+        return await self._request(
+            "POST", f"projects/{project_id}/repository/files/{encoded_path}", data=data
+        )
+
+    # Job Operations
+    def iter_pending_jobs(self) -> AsyncIterator[Dict]:
+        """
+        Every pending job on the instance (admin ``GET /jobs``)
+        """
+        return self.paginate("jobs", params={"scope[]": "pending"})
+
+    def iter_project_pending_jobs(self, project_id) -> AsyncIterator[Dict]:
+        return self.paginate(f"projects/{project_id}/jobs", params={"scope[]": "pending"})
+
+    # Runner Operations
+    async def create_runner(
+        self, description: str, tags: List[str], run_untagged: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Create an instance runner and return its id and authentication token
+        """
+        form = {
+            "runner_type": "instance_type",
+            "description": description,
+            "tag_list": ",".join(tags),
+            "run_untagged": str(run_untagged).lower(),
+        }
+        return await self._request("POST", "user/runners", form=form)
+
+    async def delete_runner(self, runner_id) -> bool:
+        """
+        Delete a runner by id, returning False if it no longer exists
+        """
+        try:
+            await self._request("DELETE", f"runners/{runner_id}")
+        except GitLabApiError as e:
+            if e.status_code == 404:
+                return False
+            raise
+        return True
+
+    def iter_runners(self) -> AsyncIterator[Dict]:
+        """
+        Every runner GitLab knows about (admin ``GET /runners/all``)
+        """
+        return self.paginate("runners/all")
+
+    async def get_runners(self) -> List[Dict]:
+        return await self._collect(self.iter_runners())
+
+    def iter_runner_jobs(self, runner_id, status: Optional[str] = None) -> AsyncIterator[Dict]:
+        params = {"status": status} if status else {}
+        return self.paginate(f"runners/{runner_id}/jobs", params=params)
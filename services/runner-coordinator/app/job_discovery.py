@@ -0,0 +1,125 @@
+"""
+Pending job discovery - finds GitLab jobs waiting for a runner
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from .gitlab_client import AsyncGitLabClient, GitLabApiError
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes that mean the instance-level jobs API cannot be used
+# with the configured token (not an admin, or an older GitLab release)
+UNAVAILABLE_STATUS_CODES = (401, 403, 404)
+
+
+class PendingJobDiscovery:
+    """
+    Discovers pending GitLab jobs across the whole instance.
+
+    The primary source is the admin ``GET /jobs?scope[]=pending`` endpoint,
+    which returns every pending job in a single paginated listing. When that
+    endpoint is unavailable (non-admin token or older GitLab), discovery falls
+    back to listing projects and querying each project's pending jobs with a
+    bounded number of concurrent requests, all awaited on the event loop.
+    """
+
+    def __init__(
+        self,
+        gitlab_url: str,
+        gitlab_token: str,
+        fanout_concurrency: Optional[int] = None,
+        probe_interval_seconds: Optional[int] = None,
+        client: Optional[AsyncGitLabClient] = None,
+    ):
+        self.fanout_concurrency = fanout_concurrency or int(
+            os.getenv("JOB_DISCOVERY_CONCURRENCY", "16")
+        )
+        # How long to wait before retrying the instance-level source after it
+        # reported itself unavailable
+        self.probe_interval_seconds = probe_interval_seconds or int(
+            os.getenv("JOB_DISCOVERY_PROBE_INTERVAL", "300")
+        )
+        self._instance_source_unavailable_until = 0.0
+        self.client = client or AsyncGitLabClient(gitlab_url, gitlab_token)
+
+    @property
+    def instance_source_available(self) -> bool:
+        return time.monotonic() >= self._instance_source_unavailable_until
+
+    async def fetch_pending_jobs(self) -> List[Dict]:
+        """
+        Return all pending jobs, de-duplicated by job id
+        """
+        if self.instance_source_available:
+            try:
+                return await self._fetch_instance_pending_jobs()
+            except GitLabApiError as e:
+                if e.status_code not in UNAVAILABLE_STATUS_CODES:
+                    raise
+                logger.warning(
+                    f"Instance-level jobs API unavailable ({e.status_code}), "
+                    f"falling back to per-project discovery for "
+                    f"{self.probe_interval_seconds}s"
+                )
+                self._instance_source_unavailable_until = (
+                    time.monotonic() + self.probe_interval_seconds
+                )
+
+        return await self._fetch_per_project_pending_jobs()
+
+    async def _fetch_instance_pending_jobs(self) -> List[Dict]:
+        """
+        Fetch pending jobs from the admin instance-wide jobs endpoint
+        """
+        jobs = [job async for job in self.client.iter_pending_jobs()]
+        return self._deduplicate(jobs)
+
+    async def _fetch_per_project_pending_jobs(self) -> List[Dict]:
+        """
+        Fetch pending jobs project by project with bounded concurrency
+        """
+        projects = await self._get_projects()
+        semaphore = asyncio.Semaphore(self.fanout_concurrency)
+
+        async def fetch(project_id: int) -> List[Dict]:
+            async with semaphore:
+                return await self._get_project_pending_jobs(project_id)
+
+        results = await asyncio.gather(*(fetch(project["id"]) for project in projects))
+
+        jobs = [job for project_jobs in results for job in project_jobs]
+        return self._deduplicate(jobs)
+
+    async def _get_projects(self) -> List[Dict]:
+        """
+        Get all projects from GitLab
+        """
+        try:
+            # Keyset pagination stays fast however many projects there are
+            projects = self.client.iter_projects(owned=False, simple="true", archived="false")
+            return [project async for project in projects]
+        except GitLabApiError as e:
+            logger.error(f"Failed to get projects: {e}")
+            return []
+
+    async def _get_project_pending_jobs(self, project_id: int) -> List[Dict]:
+        """
+        Get pending jobs for a project
+        """
+        try:
+            return [job async for job in self.client.iter_project_pending_jobs(project_id)]
+        except GitLabApiError as e:
+            logger.debug(f"Failed to get pending jobs for project {project_id}: {e}")
+            return []
+
+    @staticmethod
+    def _deduplicate(jobs: List[Dict]) -> List[Dict]:
+        unique = {}
+        for job in jobs:
+            unique.setdefault(job["id"], job)
+        return list(unique.values())
@@ -3,16 +3,26 @@ import datetime
 import logging
 import os
 from contextlib import asynccontextmanager
-from typing import List
+from typing import Any, Dict, List, Optional
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from opentelemetry.trace import SpanKind
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
-
-from .driver import DockerDriver
-from .models import Base, Job, Runner
-from .runner_manager import RunnerManager
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import SessionLocal, engine, get_db, init_db
+from .driver_pool import DriverPool, create_driver
+from .events import JOB_STATUS_MAP, JobEvent, JobEventBus
+from .executors import AsyncDriver, Executors
+from .fair_queue import FairSharePolicy, job_priority
+from .metrics import JOB_QUEUE_WAIT, update_executor_gauges
+from .models import Job, Runner
+from .reaper import OrphanReaper
+from .runner_manager import RunnerManager, find_gitlab_runner
+from .status import StatusCache
+from .tracing import configure_tracing, inject_context, instrument_engine, traced
 
 # Configure logging
 logging.basicConfig(
@@ -20,15 +30,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Configuration from environment
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./runner_coordinator.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Tracing exports only when an exporter is configured (see tracing.py)
+configure_tracing()
+instrument_engine(engine)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# One Docker daemon, or a pool of them when DOCKER_HOSTS is set
+driver = create_driver()
 
-driver = DockerDriver()
+# Bounded pools for blocking Docker and GitLab calls
+executors = Executors()
+async_driver = AsyncDriver(driver, executors.docker)
 
 # Configuration from environment
 GITLAB_URL = os.getenv("GITLAB_URL", "http://autogit-git-server:3000")
@@ -37,6 +48,18 @@ GITLAB_RUNNER_REGISTRATION_TOKEN = os.getenv("GITLAB_RUNNER_REGISTRATION_TOKEN",
 COOLDOWN_MINUTES = int(os.getenv("RUNNER_COOLDOWN_MINUTES", "5"))
 MAX_IDLE_RUNNERS = int(os.getenv("MAX_IDLE_RUNNERS", "0"))
 
+# Priority classes and per-project shares of queued jobs
+fair_share = FairSharePolicy.from_env()
+
+# Job events published by the webhooks, consumed by the dispatchers
+event_bus = JobEventBus()
+
+# Aggregated counts behind /status, kept current by the lifecycle loops
+status_cache = StatusCache()
+
+# Removes Docker resources whose runner is gone; /orphans reports dry runs
+orphan_reaper = OrphanReaper(async_driver)
+
 # Global runner manager instance
 runner_manager_instance = None
 
@@ -68,18 +91,28 @@ async def lifespan(app: FastAPI):
             f"({GITLAB_RUNNER_REGISTRATION_TOKEN[:20]}...)"
         )
 
+    # Create tables
+    await init_db(engine)
+
     # Start the lifecycle manager in the background
-    db = SessionLocal()
     runner_manager_instance = RunnerManager(
-        db=db,
+        session_factory=SessionLocal,
         driver=driver,
         gitlab_url=GITLAB_URL,
         gitlab_token=GITLAB_TOKEN,
         cooldown_minutes=COOLDOWN_MINUTES,
         max_idle_runners=MAX_IDLE_RUNNERS,
         runner_registration_token=GITLAB_RUNNER_REGISTRATION_TOKEN,
+        event_bus=event_bus,
+        executors=executors,
+        status_cache=status_cache,
+        orphan_reaper=orphan_reaper,
+        fair_share=fair_share,
     )
 
+    # Repair state left by the previous run before any loop acts on it
+    await runner_manager_instance.recover()
+
     # Start the lifecycle manager task
     manager_task = asyncio.create_task(runner_manager_instance.start_lifecycle_manager())
     logger.info("✓ Runner lifecycle manager started")
@@ -96,35 +129,42 @@ async def lifespan(app: FastAPI):
         # Expected exception when cancelling the lifecycle manager task
         # The task is cleanly cancelled and resources are cleaned up
         logger.info("Runner lifecycle manager stopped gracefully")
-    db.close()
+    await runner_manager_instance.gitlab_client.aclose()
+    executors.shutdown()
+    await engine.dispose()
 
 
 app = FastAPI(title="AutoGit Runner Coordinator", version="0.2.0", lifespan=lifespan)
 
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # Models
 class JobWebhook(BaseModel):
     object_kind: str
     project_id: int
     ref: str
-    checkout_sha: str
-    user_name: str
+    # True when the job belongs to a tag pipeline
+    tag: bool = False
     project_name: str
+    checkout_sha: Optional[str] = None
+    user_name: Optional[str] = None
+    build_id: Optional[int] = None
+    build_name: Optional[str] = None
+    build_status: Optional[str] = None
+    tag_list: List[str] = []
+    runner: Optional[Dict[str, Any]] = None
+
+
+class PipelineWebhook(BaseModel):
+    object_kind: str
+    object_attributes: Dict[str, Any]
+    project: Dict[str, Any]
+    builds: List[Dict[str, Any]] = []
 
 
 class RunnerStatus(BaseModel):
     id: str
     name: str
-    status: str  # idle, busy, provisioning, offline
+    status: str  # idle, busy, resetting, provisioning, offline
     architecture: str
     gpu_enabled: bool
     last_seen: datetime.datetime
@@ -146,20 +186,26 @@ async def health_check():
 
 
 @app.get("/status")
-async def get_system_status(db: Session = Depends(get_db)):
+async def get_system_status(
+    request: Request, response: Response, db: AsyncSession = Depends(get_db)
+):
     """
-    Get system status including runner and job counts
+    Get system status including runner and job counts.
+
+    Served from the in-memory snapshot; send the last ETag in If-None-Match
+    to get a bodyless 304 while nothing has changed.
     """
-    total_runners = db.query(Runner).count()
-    active_runners = db.query(Runner).filter(Runner.status.in_(["idle", "busy"])).count()
-    idle_runners = db.query(Runner).filter(Runner.status == "idle").count()
-    provisioning_runners = db.query(Runner).filter(Runner.status == "provisioning").count()
+    snapshot = await status_cache.get(db)
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": f"max-age={int(status_cache.ttl_seconds)}",
+    }
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
 
     return {
-        "total_runners": total_runners,
-        "active_runners": active_runners,
-        "idle_runners": idle_runners,
-        "provisioning_runners": provisioning_runners,
+        **snapshot.data,
         "cooldown_minutes": COOLDOWN_MINUTES,
         "max_idle_runners": MAX_IDLE_RUNNERS,
         "gitlab_url": GITLAB_URL,
@@ -167,12 +213,50 @@ async def get_system_status(db: Session = Depends(get_db)):
     }
 
 
+@app.get("/executors")
+async def get_executor_stats():
+    """
+    Queue depth and saturation of the Docker and GitLab thread pools
+    """
+    return executors.stats()
+
+
+@app.get("/hosts")
+async def get_docker_hosts():
+    """
+    Health, inventory and free capacity of each Docker host
+    """
+    if isinstance(driver, DriverPool):
+        return driver.stats()
+    return [{"host": driver.host, "healthy": True}]
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus scrape endpoint
+    """
+    update_executor_gauges(executors.stats())
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/orphans")
+async def get_orphans(db: AsyncSession = Depends(get_db)):
+    """
+    Dry-run report of the Docker resources the orphan reaper would remove
+    """
+    report = await orphan_reaper.reap(db, dry_run=True)
+    return report.to_dict()
+
+
 @app.get("/runners", response_model=List[RunnerStatus])
-async def list_runners(db: Session = Depends(get_db)):
+async def list_runners(db: AsyncSession = Depends(get_db)):
     """
     List all active runners
     """
-    runners = db.query(Runner).filter(Runner.status.in_(["idle", "busy", "provisioning"])).all()
+    runners = await db.scalars(
+        select(Runner).where(Runner.status.in_(["idle", "busy", "resetting", "provisioning"]))
+    )
 
     return [
         RunnerStatus(
@@ -188,7 +272,7 @@ async def list_runners(db: Session = Depends(get_db)):
 
 
 @app.post("/runners/register")
-async def register_runner(request: RunnerRegistrationRequest):
+async def register_runner(request: RunnerRegistrationRequest, db: AsyncSession = Depends(get_db)):
     """
     Register a new GitLab runner and spawn it as a container.
     """
@@ -207,7 +291,7 @@ async def register_runner(request: RunnerRegistrationRequest):
 
     try:
         # Spawn the runner container
-        result = driver.spawn_runner(
+        result = await async_driver.spawn_runner(
             name=runner_name,
             image=runner_image,
             cpu_limit=runner_cpu_limit,
@@ -217,7 +301,7 @@ async def register_runner(request: RunnerRegistrationRequest):
         )
 
         # Register the runner with GitLab
-        registration = driver.register_gitlab_runner(
+        registration = await async_driver.register_gitlab_runner(
             container_id=result["id"],
             gitlab_url=request.gitlab_url,
             registration_token=request.registration_token,
@@ -227,6 +311,23 @@ async def register_runner(request: RunnerRegistrationRequest):
             docker_image=request.docker_image,
         )
 
+        # Record the runner so the orphan reaper knows the container is owned
+        db.add(
+            Runner(
+                id=result["id"],
+                name=runner_name,
+                status="idle",
+                architecture="amd64",
+                tags=",".join(request.tags),
+                container_id=result["id"],
+                ip_address=result.get("ip_address"),
+                host=result.get("host"),
+                last_seen=datetime.datetime.utcnow(),
+            )
+        )
+        await db.commit()
+        status_cache.invalidate()
+
         return {
             "status": "registered",
             "runner_id": result["id"],
@@ -238,27 +339,126 @@ async def register_runner(request: RunnerRegistrationRequest):
         raise HTTPException(status_code=500, detail=f"Failed to register runner: {str(e)}")
 
 
+async def count_runner_job(db: AsyncSession, gitlab_runner: Dict[str, Any]):
+    """
+    Count a finished job against the runner GitLab ran it on, for the recycle policy
+    """
+    runner = await find_gitlab_runner(db, gitlab_runner)
+    if runner is not None:
+        runner.jobs_completed = (runner.jobs_completed or 0) + 1
+
+
 @app.post("/webhook/job")
-async def handle_job_webhook(payload: JobWebhook, db: Session = Depends(get_db)):
+async def handle_job_webhook(payload: JobWebhook, db: AsyncSession = Depends(get_db)):
     """
     Handle incoming job webhooks from GitLab.
     """
     if payload.object_kind != "build":
         raise HTTPException(status_code=400, detail="Only build events are supported")
+    if payload.build_id is None:
+        # Job rows are keyed by GitLab's integer job id
+        raise HTTPException(status_code=400, detail="Build events must carry a build_id")
+
+    job_id = payload.build_id
+    with traced(
+        "webhook.job",
+        kind=SpanKind.SERVER,
+        **{"job.id": str(job_id), "project.id": payload.project_id},
+    ):
+        gitlab_status = payload.build_status or "pending"
+        status = JOB_STATUS_MAP.get(gitlab_status, "queued")
+        finished_on = None
+
+        # GitLab sends one event per state change, so update the existing row
+        job = await db.scalar(select(Job).where(Job.gitlab_job_id == job_id).limit(1))
+        previous_status = job.status if job is not None else None
+        if job is None:
+            job = Job(
+                gitlab_job_id=job_id,
+                project_id=payload.project_id,
+                project_name=payload.project_name,
+                name=payload.build_name,
+                architecture_req="amd64",  # Default
+                gpu_req=False,  # Default
+                tags=",".join(sorted(payload.tag_list)) or None,
+                priority=job_priority(
+                    payload.ref, payload.tag, payload.tag_list, fair_share.protected_refs
+                ),
+                # The job's trace starts here; dispatch and provisioning join it
+                trace_context=inject_context(),
+            )
+            db.add(job)
+        elif job.status == "queued" and status == "running" and job.created_at:
+            # A runner picked the job up
+            job.started_at = datetime.datetime.utcnow()
+            JOB_QUEUE_WAIT.observe((job.started_at - job.created_at).total_seconds())
+        job.status = status
+        if status in ("completed", "failed"):
+            job.finished_at = datetime.datetime.utcnow()
+            # Runners dispatched by the job manager are counted when it recycles them
+            if payload.runner and job.runner_id is None and previous_status != status:
+                await count_runner_job(db, payload.runner)
+                # The runner manager resets the runner once the count is committed
+                finished_on = payload.runner
+        await db.commit()
+        status_cache.invalidate()
+
+        # Wake the dispatchers right away instead of waiting for the next poll
+        event_bus.publish(
+            JobEvent(
+                job_id=job_id,
+                project_id=payload.project_id,
+                project_name=payload.project_name,
+                status=gitlab_status,
+                name=payload.build_name,
+                tags=payload.tag_list,
+                ref=payload.ref,
+                tag=payload.tag,
+                trace_context=job.trace_context,
+                runner=finished_on,
+            )
+        )
+
+    return {"message": "Job received and queued", "job_id": job_id}
 
-    # Create job in database
-    new_job = Job(
-        gitlab_job_id=payload.checkout_sha,  # Using SHA as placeholder for job ID
-        project_id=payload.project_id,
-        project_name=payload.project_name,
-        status="queued",
-        architecture_req="amd64",  # Default
-        gpu_req=False,  # Default
-    )
-    db.add(new_job)
-    db.commit()
 
-    return {"message": "Job received and queued", "job_id": payload.checkout_sha}
+@app.post("/webhook/pipeline")
+async def handle_pipeline_webhook(payload: PipelineWebhook):
+    """
+    Handle incoming pipeline webhooks from GitLab.
+
+    Pipeline events list every job in the pipeline, so one event can wake the
+    dispatchers for a whole batch of pending jobs.
+    """
+    if payload.object_kind != "pipeline":
+        raise HTTPException(status_code=400, detail="Only pipeline events are supported")
+
+    project_id = payload.project.get("id")
+    project_name = payload.project.get("name", "")
+    # Every job in the pipeline shares its ref, which sets the priority class
+    ref = payload.object_attributes.get("ref")
+    tag = bool(payload.object_attributes.get("tag", False))
+    published = 0
+
+    with traced("webhook.pipeline", kind=SpanKind.SERVER, **{"project.id": project_id or 0}):
+        trace_context = inject_context()
+        for build in payload.builds:
+            event = JobEvent(
+                job_id=build.get("id"),
+                project_id=project_id,
+                project_name=project_name,
+                status=build.get("status", "pending"),
+                name=build.get("name"),
+                tags=build.get("tag_list") or [],
+                ref=ref,
+                tag=tag,
+                trace_context=trace_context,
+            )
+            if event.is_pending:
+                event_bus.publish(event)
+                published += 1
+
+    return {"message": "Pipeline received", "pending_jobs": published}
 
 
 if __name__ == "__main__":
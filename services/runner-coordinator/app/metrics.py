@@ -0,0 +1,127 @@
+"""
+Prometheus metrics for the runner coordinator hot paths
+
+Every label has a small, fixed set of values (stage names, driver methods,
+loop names, GitLab endpoint templates, runner statuses and architectures) so
+the series count stays bounded no matter how many jobs or runners pass through.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Seconds; API calls are sub-second, provisioning stages take tens of seconds
+API_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+STAGE_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+QUEUE_WAIT_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1800)
+
+JOB_QUEUE_WAIT = Histogram(
+    "coordinator_job_queue_wait_seconds",
+    "Time from a job being queued to a runner picking it up",
+    buckets=QUEUE_WAIT_BUCKETS,
+)
+PROVISIONING_STAGE_DURATION = Histogram(
+    "coordinator_provisioning_stage_seconds",
+    "Duration of each runner provisioning stage (create, register, start)",
+    ["stage", "outcome"],
+    buckets=STAGE_BUCKETS,
+)
+DOCKER_API_LATENCY = Histogram(
+    "coordinator_docker_api_seconds",
+    "Latency of Docker driver calls, by driver method",
+    ["operation"],
+    buckets=API_BUCKETS,
+)
+GITLAB_API_LATENCY = Histogram(
+    "coordinator_gitlab_api_seconds",
+    "Latency of GitLab API requests, by method and endpoint template",
+    ["method", "endpoint"],
+    buckets=API_BUCKETS,
+)
+LOOP_ITERATION_DURATION = Histogram(
+    "coordinator_loop_iteration_seconds",
+    "Duration of one iteration of each lifecycle loop",
+    ["loop"],
+    buckets=API_BUCKETS,
+)
+RUNNERS = Gauge(
+    "coordinator_runners",
+    "Runners by status and architecture",
+    ["status", "architecture"],
+)
+QUEUED_JOBS = Gauge("coordinator_queued_jobs", "Jobs waiting for a runner")
+OLDEST_QUEUED_JOB_AGE = Gauge(
+    "coordinator_oldest_queued_job_age_seconds", "Age of the oldest queued job"
+)
+EXECUTOR_QUEUED = Gauge(
+    "coordinator_executor_queued_tasks", "Calls waiting for a pool thread", ["pool"]
+)
+EXECUTOR_SATURATION = Gauge(
+    "coordinator_executor_saturation", "Busy threads over pool size", ["pool"]
+)
+GITLAB_THROTTLED = Counter(
+    "coordinator_gitlab_throttled_total",
+    "GitLab calls held back, by who asked: client pacing or a server 429",
+    ["source"],
+)
+GITLAB_RETRIES = Counter(
+    "coordinator_gitlab_retries_total",
+    "GitLab calls retried, by status code (0 for transport errors)",
+    ["status"],
+)
+GITLAB_CIRCUIT_OPEN = Gauge(
+    "coordinator_gitlab_circuit_open", "1 while GitLab calls are cut off by the circuit breaker"
+)
+GITLAB_CACHE = Counter(
+    "coordinator_gitlab_cache_total",
+    "GitLab reads through the response cache, by result: hit (304), changed, miss",
+    ["result"],
+)
+GITLAB_CACHE_BYTES_SAVED = Counter(
+    "coordinator_gitlab_cache_bytes_saved_total", "Response bytes served from the cache on a 304"
+)
+ORPHANS_REMOVED = Counter(
+    "coordinator_orphans_removed_total", "Orphaned Docker resources removed, by kind", ["kind"]
+)
+
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_template(path: str) -> str:
+    """
+    Collapse ids out of an API path: ``projects/42/jobs`` -> ``projects/:id/jobs``
+    """
+    path = path.split("?", 1)[0]
+    return _NUMERIC_SEGMENT.sub("/:id", "/" + path.lstrip("/"))
+
+
+@contextmanager
+def observe_gitlab_request(method: str, path: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        GITLAB_API_LATENCY.labels(method, endpoint_template(path)).observe(
+            time.perf_counter() - started
+        )
+
+
+def update_status_gauges(status: Dict[str, Any]):
+    """
+    Mirror a status snapshot into the runner and queue gauges
+    """
+    RUNNERS.clear()
+    for architecture, statuses in status["runners_by_architecture"].items():
+        for runner_status, count in statuses.items():
+            RUNNERS.labels(runner_status, architecture or "unknown").set(count)
+    QUEUED_JOBS.set(status["queued_jobs"])
+    OLDEST_QUEUED_JOB_AGE.set(status["oldest_queued_job_age_seconds"] or 0)
+
+
+def update_executor_gauges(stats: Dict[str, Dict[str, Any]]):
+    for pool, pool_stats in stats.items():
+        EXECUTOR_QUEUED.labels(pool).set(pool_stats["queued"])
+        EXECUTOR_SATURATION.labels(pool).set(pool_stats["saturation"])
@@ -0,0 +1,173 @@
+"""
+Schema migrations - bring existing SQLite/PostgreSQL databases up to the models
+
+Migrations are applied in order and recorded in ``schema_migrations``. Each
+step checks the live schema before changing it, so running them against a
+database that ``create_all`` just built is a no-op apart from the bookkeeping.
+The coordinator applies them on startup through ``init_db``; the CLI is for
+upgrading a database ahead of a deploy.
+
+Usage:
+    python -m app.migrations [--database-url URL] [--status]
+"""
+
+import argparse
+import asyncio
+import datetime
+import logging
+import os
+from typing import Callable, List, Set, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .models import Job, Runner
+
+logger = logging.getLogger(__name__)
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, default=datetime.datetime.utcnow),
+)
+
+
+def add_column_if_missing(conn: Connection, table: str, column: Column):
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column.name in existing:
+        return
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column.name} {column_type}")
+    logger.info(f"Added column {table}.{column.name}")
+
+
+def create_index_if_missing(conn: Connection, table: str, name: str, *columns: str):
+    existing = {index["name"] for index in inspect(conn).get_indexes(table)}
+    if name in existing:
+        return
+    conn.exec_driver_sql(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+    logger.info(f"Created index {name}")
+
+
+def _add_runner_and_job_tags(conn: Connection):
+    add_column_if_missing(conn, "runners", Runner.__table__.c.tags)
+    add_column_if_missing(conn, "runners", Runner.__table__.c.gitlab_runner_id)
+    add_column_if_missing(conn, "jobs", Job.__table__.c.tags)
+
+
+def _add_hot_path_indexes(conn: Connection):
+    # Spelled out rather than read from the models, so later index changes
+    # get migrations of their own
+    create_index_if_missing(conn, "runners", "ix_runners_status_last_seen", "status", "last_seen")
+    create_index_if_missing(
+        conn,
+        "runners",
+        "ix_runners_status_architecture_gpu",
+        "status",
+        "architecture",
+        "gpu_enabled",
+    )
+    create_index_if_missing(conn, "runners", "ix_runners_container_id", "container_id")
+    create_index_if_missing(conn, "jobs", "ix_jobs_status_created_at", "status", "created_at")
+    create_index_if_missing(conn, "jobs", "ix_jobs_runner_id_status", "runner_id", "status")
+    create_index_if_missing(conn, "jobs", "ix_jobs_created_at", "created_at")
+
+
+def _add_job_trace_context(conn: Connection):
+    add_column_if_missing(conn, "jobs", Job.__table__.c.trace_context)
+
+
+def _add_runner_jobs_completed(conn: Connection):
+    add_column_if_missing(conn, "runners", Runner.__table__.c.jobs_completed)
+
+
+def _add_runner_host(conn: Connection):
+    add_column_if_missing(conn, "runners", Runner.__table__.c.host)
+
+
+def _add_runner_resources(conn: Connection):
+    add_column_if_missing(conn, "runners", Runner.__table__.c.cpu_limit)
+    add_column_if_missing(conn, "runners", Runner.__table__.c.memory_limit)
+
+
+def _add_job_name(conn: Connection):
+    # The job_resource_profiles table itself is created by create_all
+    add_column_if_missing(conn, "jobs", Job.__table__.c.name)
+
+
+def _add_job_priority(conn: Connection):
+    add_column_if_missing(conn, "jobs", Job.__table__.c.priority)
+
+
+# (version, description, upgrade) - append only, never renumber
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "runner tags and GitLab runner id, job tags", _add_runner_and_job_tags),
+    (2, "composite indexes on runner and job hot columns", _add_hot_path_indexes),
+    (3, "job trace context", _add_job_trace_context),
+    (4, "runner job count for recycling", _add_runner_jobs_completed),
+    (5, "runner Docker host", _add_runner_host),
+    (6, "runner CPU and memory limits", _add_runner_resources),
+    (7, "job name for resource usage profiles", _add_job_name),
+    (8, "job priority class", _add_job_priority),
+]
+
+
+def applied_versions(conn: Connection) -> Set[int]:
+    schema_migrations.create(conn, checkfirst=True)
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def apply_migrations(conn: Connection) -> List[int]:
+    """
+    Apply every pending migration on a sync connection; returns the versions applied
+    """
+    done = applied_versions(conn)
+    applied = []
+    for version, description, upgrade in MIGRATIONS:
+        if version in done:
+            continue
+        logger.info(f"Applying migration {version}: {description}")
+        upgrade(conn)
+        conn.execute(schema_migrations.insert().values(version=version, description=description))
+        applied.append(version)
+    return applied
+
+
+async def pending_migrations(engine: AsyncEngine) -> List[Tuple[int, str]]:
+    async with engine.begin() as conn:
+        done = await conn.run_sync(applied_versions)
+    return [(version, description) for version, description, _ in MIGRATIONS if version not in done]
+
+
+async def _main(database_url: str, status_only: bool):
+    from .database import create_engine_from_url, init_db
+
+    engine = create_engine_from_url(database_url)
+    try:
+        if status_only:
+            pending = await pending_migrations(engine)
+            for version, description in pending:
+                print(f"pending  {version:>4}  {description}")
+            if not pending:
+                print("Database is up to date")
+            return
+
+        applied = await init_db(engine)
+        print(f"Applied {len(applied)} migration(s): {applied}" if applied else "Nothing to do")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Apply runner coordinator schema migrations")
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./runner_coordinator.db"),
+    )
+    parser.add_argument("--status", action="store_true", help="List pending migrations only")
+    args = parser.parse_args()
+    asyncio.run(_main(args.database_url, args.status))
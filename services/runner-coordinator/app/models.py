@@ -1,6 +1,6 @@
 import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Float, Index, Integer, String
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -8,30 +8,68 @@ Base = declarative_base()
 
 class Runner(Base):
     __tablename__ = "runners"
+    # Composite indexes match the lifecycle loops' filters; add new ones
+    # through a migration in migrations.py as well
+    __table_args__ = (
+        Index("ix_runners_status_last_seen", "status", "last_seen"),
+        Index("ix_runners_status_architecture_gpu", "status", "architecture", "gpu_enabled"),
+        Index("ix_runners_container_id", "container_id"),
+    )
 
     id = Column(String, primary_key=True)
     name = Column(String, nullable=False)
-    status = Column(String, default="offline")  # idle, busy, provisioning, offline
+    status = Column(String, default="offline")  # idle, busy, resetting, provisioning, offline
     architecture = Column(String, nullable=False)  # amd64, arm64, riscv
     gpu_enabled = Column(Boolean, default=False)
     gpu_vendor = Column(String, nullable=True)  # nvidia, amd, intel
+    tags = Column(String, nullable=True)  # comma-separated GitLab runner tags
     container_id = Column(String, nullable=True)
     ip_address = Column(String, nullable=True)
+    host = Column(String, nullable=True)  # Docker host the container runs on
+    cpu_limit = Column(Float, nullable=True)  # CPU cores the container was given
+    memory_limit = Column(BigInteger, nullable=True)  # bytes; both None: default runner size
+    gitlab_runner_id = Column(Integer, nullable=True)  # set when created via the runners API
+    jobs_completed = Column(Integer, default=0)  # jobs served, for recycle retirement
     last_seen = Column(DateTime, default=datetime.datetime.utcnow)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+        Index("ix_jobs_runner_id_status", "runner_id", "status"),
+        Index("ix_jobs_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     gitlab_job_id = Column(Integer, unique=True, nullable=False)
     project_id = Column(Integer, nullable=False)
     project_name = Column(String, nullable=False)
+    name = Column(String, nullable=True)  # job name from .gitlab-ci.yml, keys usage profiles
     status = Column(String, default="queued")  # queued, running, completed, failed
     runner_id = Column(String, nullable=True)
     architecture_req = Column(String, default="amd64")
     gpu_req = Column(Boolean, default=False)
+    tags = Column(String, nullable=True)  # comma-separated GitLab job tags
+    priority = Column(Integer, default=1)  # fair_queue.PRIORITY_CLASSES, normal = 1
+    trace_context = Column(String, nullable=True)  # serialized W3C trace context
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     started_at = Column(DateTime, nullable=True)
     finished_at = Column(DateTime, nullable=True)
+
+
+class JobResourceProfile(Base):
+    """
+    Peak CPU and memory of past runs of one job, as decayed log-scale
+    histograms (see usage.py)
+    """
+
+    __tablename__ = "job_resource_profiles"
+
+    project_id = Column(Integer, primary_key=True)
+    job_name = Column(String, primary_key=True)
+    samples = Column(Integer, default=0)  # finished runs folded in
+    cpu_histogram = Column(String, nullable=True)  # JSON {bucket: weight}
+    memory_histogram = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,169 @@
+"""
+Runner provisioning pipeline - brings up many runners concurrently
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from opentelemetry.trace import Status, StatusCode
+
+from .metrics import PROVISIONING_STAGE_DURATION
+from .tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# A stage receives the request it is working on and mutates it in place
+Stage = Callable[["ProvisioningRequest"], Awaitable[None]]
+
+
+@dataclass
+class ProvisioningRequest:
+    """One runner moving through the provisioning pipeline."""
+
+    name: str
+    tags: List[str]
+    architecture: str = "amd64"
+    gpu_enabled: bool = False
+    gpu_vendor: Optional[str] = None
+    host: str = "local"
+    # Container limits; None: the manager's default runner size
+    cpu_limit: Optional[float] = None
+    memory_limit: Optional[int] = None
+    container_id: Optional[str] = None
+    gitlab_runner_id: Optional[int] = None
+    auth_token: Optional[str] = None
+    runner: Any = None
+    stage: Optional[str] = None
+    stage_durations: Dict[str, float] = field(default_factory=dict)
+
+
+class ProvisioningPipeline:
+    """
+    Runs provisioning requests through an ordered list of stages.
+
+    Each Docker host admits at most ``max_concurrent_per_host`` runners at a
+    time, and the runners it admits move through the stages independently,
+    so one runner can be registering while the next is being created and a
+    third is starting. A burst of N runners therefore takes roughly one
+    provisioning cycle per ``max_concurrent_per_host`` runners instead of N
+    sequential cycles. Stages named in ``stage_concurrency`` are further
+    limited to that many runners at a time on each host, so adding hosts
+    adds provisioning throughput.
+    """
+
+    def __init__(
+        self,
+        stages: List[Tuple[str, Stage]],
+        on_failure: Optional[
+            Callable[[ProvisioningRequest, BaseException], Awaitable[None]]
+        ] = None,
+        max_concurrent_per_host: Optional[int] = None,
+        stage_concurrency: Optional[Dict[str, int]] = None,
+    ):
+        self.stages = stages
+        self.on_failure = on_failure
+        self.max_concurrent_per_host = max_concurrent_per_host or int(
+            os.getenv("MAX_CONCURRENT_SPAWNS_PER_HOST", "4")
+        )
+        # Stages without a limit of their own are bounded by the host slots only
+        self.stage_concurrency = stage_concurrency or {}
+        self._stage_slots: Dict[Tuple[str, str], asyncio.Semaphore] = {}
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[asyncio.Task, ProvisioningRequest] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of submitted requests that have not finished yet"""
+        return len(self._in_flight)
+
+    def in_flight_for(self, predicate: Callable[[ProvisioningRequest], bool]) -> int:
+        return sum(1 for request in self._in_flight.values() if predicate(request))
+
+    @property
+    def requests(self) -> List[ProvisioningRequest]:
+        """Submitted requests that have not finished yet"""
+        return list(self._in_flight.values())
+
+    def submit(self, request: ProvisioningRequest) -> asyncio.Task:
+        """
+        Start provisioning in the background and return the task
+        """
+        task = asyncio.create_task(self.run(request))
+        self._in_flight[task] = request
+        task.add_done_callback(lambda done: self._in_flight.pop(done, None))
+        return task
+
+    async def run(self, request: ProvisioningRequest) -> bool:
+        """
+        Provision one runner, returning True when every stage succeeded.
+
+        A cancelled request also goes through ``on_failure`` before the
+        cancellation propagates, so its placement and runner row are cleaned up.
+        """
+        started = time.monotonic()
+        attributes = {"runner.name": request.name, "runner.host": request.host}
+        with traced("provision_runner", **attributes) as span:
+            try:
+                async with self._host_slot(request.host):
+                    for name, stage in self.stages:
+                        request.stage = name
+                        stage_started = time.monotonic()
+                        outcome = "error"
+                        try:
+                            # Stage failures are recorded on the stage span
+                            with traced(f"provision.{name}"):
+                                async with self._stage_slot(request.host, name):
+                                    await stage(request)
+                            outcome = "ok"
+                        except Exception as e:
+                            logger.error(
+                                f"Provisioning {request.name} failed in stage '{name}': {e}"
+                            )
+                            span.set_status(Status(StatusCode.ERROR, f"{name}: {e}"))
+                            if self.on_failure:
+                                await self.on_failure(request, e)
+                            return False
+                        finally:
+                            request.stage_durations[name] = time.monotonic() - stage_started
+                            PROVISIONING_STAGE_DURATION.labels(name, outcome).observe(
+                                request.stage_durations[name]
+                            )
+            except asyncio.CancelledError as e:
+                logger.warning(f"Provisioning {request.name} cancelled in stage '{request.stage}'")
+                span.set_status(Status(StatusCode.ERROR, f"{request.stage}: cancelled"))
+                if self.on_failure:
+                    # Shielded so a second cancellation cannot cut the cleanup short
+                    await asyncio.shield(self.on_failure(request, e))
+                raise
+
+        request.stage = None
+        logger.info(
+            f"Provisioned {request.name} in {time.monotonic() - started:.1f}s "
+            f"({', '.join(f'{k}={v:.1f}s' for k, v in request.stage_durations.items())})"
+        )
+        return True
+
+    async def drain(self):
+        """
+        Wait for every in-flight request to finish
+        """
+        if self._in_flight:
+            await asyncio.gather(*list(self._in_flight), return_exceptions=True)
+
+    def _stage_slot(self, host: str, name: str):
+        limit = self.stage_concurrency.get(name)
+        if not limit:
+            return contextlib.nullcontext()
+        if (host, name) not in self._stage_slots:
+            self._stage_slots[host, name] = asyncio.Semaphore(limit)
+        return self._stage_slots[host, name]
+
+    def _host_slot(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.max_concurrent_per_host)
+        return self._host_slots[host]
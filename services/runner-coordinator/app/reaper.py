@@ -0,0 +1,165 @@
+"""
+Orphan reaper - removes Docker resources left behind by runners that are gone
+
+Every container, network and volume the coordinator creates is labelled with
+the coordinator instance and the runner that owns it. After a crash, a failed
+provisioning or a teardown that did not finish, those resources outlive their
+runner row. The reaper diffs the labelled resources against the live runners
+and removes the rest, a few at a time and at a bounded rate so a large backlog
+does not flood the Docker daemon.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .driver import COORDINATOR_INSTANCE_ID, ORPHAN_GRACE_SECONDS, DockerDriver, ManagedResource
+from .executors import AsyncDriver
+from .metrics import ORPHANS_REMOVED
+from .models import Runner
+
+logger = logging.getLogger(__name__)
+
+LIVE_RUNNER_STATUSES = ("provisioning", "idle", "busy", "resetting")
+
+
+class RateLimiter:
+    """
+    Spaces calls at least ``1 / rate`` seconds apart
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class OrphanReport:
+    """Outcome of one reaper pass."""
+
+    dry_run: bool
+    orphans: List[ManagedResource] = field(default_factory=list)
+    removed: List[ManagedResource] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "dry_run": self.dry_run,
+            "orphans": [resource.to_dict() for resource in self.orphans],
+            "removed": len(self.removed),
+            "failed": self.failed,
+        }
+
+
+class OrphanReaper:
+    """
+    Finds and removes managed Docker resources with no live runner.
+
+    In dry-run mode (``ORPHAN_REAPER_DRY_RUN=true``) passes only report what
+    they would remove.
+    """
+
+    def __init__(
+        self,
+        async_driver: AsyncDriver,
+        concurrency: Optional[int] = None,
+        rate: Optional[float] = None,
+        grace_seconds: Optional[float] = None,
+        dry_run: Optional[bool] = None,
+        instance_only: Optional[bool] = None,
+    ):
+        self.async_driver = async_driver
+        self.concurrency = concurrency or int(os.getenv("ORPHAN_REAPER_CONCURRENCY", "4"))
+        self.rate = rate if rate is not None else float(os.getenv("ORPHAN_REAPER_RATE", "2"))
+        self.grace_seconds = grace_seconds if grace_seconds is not None else ORPHAN_GRACE_SECONDS
+        self.dry_run = (
+            dry_run
+            if dry_run is not None
+            else os.getenv("ORPHAN_REAPER_DRY_RUN", "false").lower() == "true"
+        )
+        # Several coordinators with separate databases may share a daemon
+        if instance_only is None:
+            instance_only = os.getenv("ORPHAN_REAPER_INSTANCE_ONLY", "false").lower() == "true"
+        self.instance = COORDINATOR_INSTANCE_ID if instance_only else None
+        self.interval = int(os.getenv("ORPHAN_REAPER_INTERVAL_SECONDS", "300"))
+
+    @staticmethod
+    async def live_owners(db: AsyncSession) -> Tuple[Set[str], Set[str]]:
+        """
+        Names and container ids of the runners that are still in service
+        """
+        rows = await db.execute(
+            select(Runner.name, Runner.container_id).where(Runner.status.in_(LIVE_RUNNER_STATUSES))
+        )
+        names, containers = set(), set()
+        for name, container_id in rows:
+            names.add(name)
+            if container_id:
+                containers.add(container_id)
+        return names, containers
+
+    async def find(self, db: AsyncSession) -> List[ManagedResource]:
+        # List resources before reading the runners, so a runner saved in
+        # between counts as live rather than orphaned
+        resources = await self.async_driver.list_managed_resources()
+        live_runners, live_containers = await self.live_owners(db)
+        return DockerDriver.find_orphans(
+            resources,
+            live_runners,
+            live_containers,
+            grace_seconds=self.grace_seconds,
+            instance=self.instance,
+        )
+
+    async def reap(self, db: AsyncSession, dry_run: Optional[bool] = None) -> OrphanReport:
+        """
+        Run one pass; ``dry_run`` overrides the configured mode
+        """
+        report = OrphanReport(dry_run=self.dry_run if dry_run is None else dry_run)
+        report.orphans = await self.find(db)
+        if report.dry_run or not report.orphans:
+            for resource in report.orphans:
+                logger.info(f"[dry run] Orphaned {resource.kind} {resource.name or resource.id}")
+            return report
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = RateLimiter(self.rate)
+
+        async def remove(resource: ManagedResource):
+            async with semaphore:
+                await limiter.wait()
+                try:
+                    if not await self.async_driver.remove_resource(resource):
+                        return  # Already gone
+                    ORPHANS_REMOVED.labels(resource.kind).inc()
+                    report.removed.append(resource)
+                    logger.info(f"Removed orphaned {resource.kind} {resource.name or resource.id}")
+                except Exception as e:
+                    report.failed[resource.id] = str(e)
+                    logger.error(f"Failed to remove orphaned {resource.kind} {resource.id}: {e}")
+
+        # Networks and volumes are only free once their containers are gone
+        containers = [resource for resource in report.orphans if resource.kind == "container"]
+        others = [resource for resource in report.orphans if resource.kind != "container"]
+        for batch in (containers, others):
+            await asyncio.gather(*(remove(resource) for resource in batch))
+
+        logger.info(
+            f"Orphan reaper removed {len(report.removed)} of {len(report.orphans)} resource(s)"
+        )
+        return report
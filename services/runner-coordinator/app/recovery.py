@@ -0,0 +1,234 @@
+"""
+Startup reconciliation - repairs runner and job rows after a coordinator restart
+
+A crash leaves rows in ``provisioning``/``idle``/``busy`` and jobs ``running``
+whatever happened to their containers meanwhile. Before the lifecycle loops
+start, one bulk Docker listing and one GitLab runners listing are compared
+against the database and every repair is committed in a single transaction:
+
+- rows whose container is gone or stopped go offline, and their running jobs fail
+- rows whose GitLab runner was deleted go offline
+- interrupted provisionings are adopted when GitLab has the runner, otherwise
+  marked ``error`` (the orphan reaper then removes the container)
+- running labelled containers with no row but a GitLab runner are adopted idle
+
+Healthy runners come back into the pool, so the warm pools see them and a
+restart does not trigger a wave of new provisioning.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .driver import (
+    ARCHITECTURE_LABEL,
+    CPU_LABEL,
+    GPU_VENDOR_LABEL,
+    MEMORY_LABEL,
+    TAGS_LABEL,
+    ManagedResource,
+)
+from .executors import AsyncDriver
+from .gitlab_client import AsyncGitLabClient
+from .models import Job, Runner
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("provisioning", "idle", "busy", "resetting")
+RUNNING_CONTAINER_STATUSES = ("running", "restarting")
+
+
+@dataclass
+class RecoveryReport:
+    """Runner names and job ids touched by a startup reconciliation."""
+
+    kept: List[str] = field(default_factory=list)
+    adopted: List[str] = field(default_factory=list)
+    offline: List[str] = field(default_factory=list)
+    abandoned: List[str] = field(default_factory=list)
+    # On a Docker host that could not be listed; left as they were
+    unreachable: List[str] = field(default_factory=list)
+    failed_jobs: List[int] = field(default_factory=list)
+    # False when GitLab could not be listed and only Docker state was used
+    gitlab_checked: bool = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kept": self.kept,
+            "adopted": self.adopted,
+            "offline": self.offline,
+            "abandoned": self.abandoned,
+            "unreachable": self.unreachable,
+            "failed_jobs": self.failed_jobs,
+            "gitlab_checked": self.gitlab_checked,
+        }
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.kept)} kept, {len(self.adopted)} adopted, {len(self.offline)} offline, "
+            f"{len(self.abandoned)} abandoned, {len(self.unreachable)} unreachable, "
+            f"{len(self.failed_jobs)} job(s) failed"
+        )
+
+
+class GitLabRunners:
+    """
+    Lookup over a ``GET /runners/all`` listing; every answer is None when the
+    listing is unavailable
+    """
+
+    def __init__(self, runners: Optional[List[Dict[str, Any]]]):
+        self.available = runners is not None
+        self.ids = {runner["id"] for runner in runners or ()}
+        self.by_description = {runner.get("description"): runner["id"] for runner in runners or ()}
+
+    def registered(self, name: str, gitlab_runner_id: Optional[int]) -> Optional[bool]:
+        if not self.available:
+            return None
+        return gitlab_runner_id in self.ids or name in self.by_description
+
+
+class StartupReconciler:
+    """
+    Brings the database back in line with Docker and GitLab after a restart.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        async_driver: AsyncDriver,
+        gitlab_client: AsyncGitLabClient,
+    ):
+        self.session_factory = session_factory
+        self.async_driver = async_driver
+        self.gitlab_client = gitlab_client
+
+    async def run(self) -> RecoveryReport:
+        containers = await self.async_driver.list_managed_resources(kinds=("container",))
+        unavailable = self.async_driver.driver.unavailable_hosts()
+        try:
+            gitlab_runners = await self.gitlab_client.get_runners()
+        except Exception as e:
+            logger.warning(f"Could not list GitLab runners, reconciling from Docker only: {e}")
+            gitlab_runners = None
+
+        async with self.session_factory() as db:
+            report = await self.repair(
+                db, containers, GitLabRunners(gitlab_runners), unavailable_hosts=unavailable
+            )
+            # Every repair lands in one transaction
+            await db.commit()
+
+        logger.info(f"Startup reconciliation: {report.summary()}")
+        return report
+
+    async def repair(
+        self,
+        db: AsyncSession,
+        containers: List[ManagedResource],
+        gitlab: GitLabRunners,
+        now: Optional[datetime] = None,
+        unavailable_hosts: Set[str] = frozenset(),
+    ) -> RecoveryReport:
+        """
+        Apply the repairs to ``db`` without committing
+        """
+        now = now or datetime.utcnow()
+        report = RecoveryReport(gitlab_checked=gitlab.available)
+        by_id = {container.id: container for container in containers}
+
+        runners = (await db.scalars(select(Runner))).all()
+        known_containers = {runner.container_id for runner in runners}
+
+        for runner in runners:
+            if runner.status not in ACTIVE_STATUSES:
+                continue
+            if runner.host in unavailable_hosts:
+                report.unreachable.append(runner.name)
+                continue
+            container = by_id.get(runner.container_id)
+            registered = gitlab.registered(runner.name, runner.gitlab_runner_id)
+
+            if container is None or container.status not in RUNNING_CONTAINER_STATUSES:
+                runner.status = "offline"
+                report.offline.append(runner.name)
+            elif runner.status == "provisioning":
+                if registered:
+                    runner.status = "idle"
+                    runner.last_seen = now
+                    report.adopted.append(runner.name)
+                else:
+                    # The pipeline died mid-way; let the reaper clear it
+                    runner.status = "error"
+                    report.abandoned.append(runner.name)
+            elif registered is False:
+                runner.status = "offline"
+                report.offline.append(runner.name)
+            else:
+                if runner.status == "resetting":
+                    # The reset was cut short; the next finished job resets it again
+                    runner.status = "idle"
+                runner.last_seen = now
+                report.kept.append(runner.name)
+
+        for container in containers:
+            if container.id in known_containers:
+                continue
+            runner = self._adopt(container, gitlab, now)
+            if runner is not None:
+                db.add(runner)
+                report.adopted.append(runner.name)
+
+        # Jobs left running on a runner that did not survive
+        live = {
+            runner.id
+            for runner in runners
+            if runner.status in ("idle", "busy") or runner.name in report.unreachable
+        }
+        running_jobs = await db.scalars(select(Job).where(Job.status == "running"))
+        for job in running_jobs:
+            if job.runner_id not in live:
+                job.status = "failed"
+                job.finished_at = now
+                report.failed_jobs.append(job.gitlab_job_id)
+
+        return report
+
+    @staticmethod
+    def _adopt(
+        container: ManagedResource, gitlab: GitLabRunners, now: datetime
+    ) -> Optional[Runner]:
+        """
+        A fresh idle row for a running container that GitLab still has, when
+        its labels describe the runner fully
+        """
+        labels = container.labels
+        architecture = labels.get(ARCHITECTURE_LABEL)
+        if (
+            container.status != "running"
+            or not container.runner
+            or not architecture
+            or not gitlab.registered(container.runner, None)
+        ):
+            return None
+        gpu_vendor = labels.get(GPU_VENDOR_LABEL) or None
+        return Runner(
+            id=container.id,
+            name=container.runner,
+            status="idle",
+            architecture=architecture,
+            gpu_enabled=gpu_vendor is not None,
+            gpu_vendor=gpu_vendor,
+            tags=labels.get(TAGS_LABEL) or None,
+            container_id=container.id,
+            host=container.host,
+            cpu_limit=float(labels[CPU_LABEL]) if labels.get(CPU_LABEL) else None,
+            memory_limit=int(labels[MEMORY_LABEL]) if labels.get(MEMORY_LABEL) else None,
+            gitlab_runner_id=gitlab.by_description.get(container.runner),
+            created_at=datetime.utcfromtimestamp(container.created) if container.created else now,
+            last_seen=now,
+        )
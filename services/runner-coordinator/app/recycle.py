@@ -0,0 +1,45 @@
+"""
+Runner recycling - reuse runner containers across jobs until they are due for retirement
+
+With ``RUNNER_RECYCLE=true`` a runner whose job finished is reset (build
+containers and volumes pruned, health-checked) and returned to the idle pool
+instead of being torn down. It is retired once it has served
+``RUNNER_MAX_JOBS`` jobs or is older than ``RUNNER_MAX_AGE_MINUTES``; either
+limit is disabled with 0.
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from .models import Runner
+
+
+@dataclass
+class RecyclePolicy:
+    """When finished runners are reused, and when they are retired."""
+
+    enabled: bool = False
+    max_jobs: int = 50
+    max_age: timedelta = timedelta(hours=4)
+
+    @classmethod
+    def from_env(cls) -> "RecyclePolicy":
+        return cls(
+            enabled=os.getenv("RUNNER_RECYCLE", "false").lower() == "true",
+            max_jobs=int(os.getenv("RUNNER_MAX_JOBS", "50")),
+            max_age=timedelta(minutes=float(os.getenv("RUNNER_MAX_AGE_MINUTES", "240"))),
+        )
+
+    def retire_reason(self, runner: Runner, now: Optional[datetime] = None) -> Optional[str]:
+        """
+        Why ``runner`` must not take another job, or None when it may
+        """
+        now = now or datetime.utcnow()
+        jobs = runner.jobs_completed or 0
+        if self.max_jobs and jobs >= self.max_jobs:
+            return f"served {jobs} jobs"
+        if self.max_age and runner.created_at and now - runner.created_at >= self.max_age:
+            return f"older than {self.max_age}"
+        return None
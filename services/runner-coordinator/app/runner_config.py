@@ -0,0 +1,67 @@
+"""
+Renders gitlab-runner config.toml for pre-registered runners
+"""
+
+import json
+from typing import List, Optional
+
+# Where gitlab-runner looks for its configuration inside the container
+RUNNER_CONFIG_DIR = "/etc/gitlab-runner"
+
+# gitlab-runner arguments used as the container command in fast-start mode
+RUNNER_RUN_COMMAND = ["run", "--working-directory=/home/gitlab-runner"]
+
+
+def _toml_string(value: str) -> str:
+    # JSON string escaping is a valid TOML basic string
+    return json.dumps(value)
+
+
+def _toml_array(values: List[str]) -> str:
+    return "[" + ", ".join(_toml_string(v) for v in values) + "]"
+
+
+def render_runner_config(
+    name: str,
+    gitlab_url: str,
+    token: str,
+    network_mode: str,
+    docker_image: str = "python:3.11-slim",
+    clone_url: Optional[str] = None,
+    executor: str = "docker",
+    volumes: Optional[List[str]] = None,
+    cpus: Optional[float] = None,
+    memory: Optional[int] = None,
+) -> str:
+    """
+    Render a single-runner config.toml, matching the options
+    ``DockerDriver.register_gitlab_runner`` passes to ``gitlab-runner register``
+    """
+    volumes = volumes or ["/var/run/docker.sock:/var/run/docker.sock", "/cache"]
+
+    lines = [
+        "concurrent = 1",
+        "check_interval = 0",
+        "",
+        "[[runners]]",
+        f"  name = {_toml_string(name)}",
+        f"  url = {_toml_string(gitlab_url)}",
+        f"  token = {_toml_string(token)}",
+        f"  executor = {_toml_string(executor)}",
+    ]
+    if clone_url:
+        lines.append(f"  clone_url = {_toml_string(clone_url)}")
+    lines += [
+        "  [runners.docker]",
+        f"    image = {_toml_string(docker_image)}",
+        "    privileged = false",
+        f"    volumes = {_toml_array(volumes)}",
+        f"    network_mode = {_toml_string(network_mode)}",
+    ]
+    # Build containers are siblings of the runner, so they get its size explicitly
+    if cpus:
+        lines.append(f"    cpus = {_toml_string(f'{cpus:g}')}")
+    if memory:
+        lines.append(f"    memory = {_toml_string(f'{memory // 1024**2}m')}")
+    lines.append("")
+    return "\n".join(lines)
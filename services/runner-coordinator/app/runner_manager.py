@@ -3,18 +3,72 @@ GitLab Runner Manager - Autonomous lifecycle management for GitLab runners
 """
 
 import asyncio
+import functools
 import logging
 import os
+import time
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .docker_events import ContainerEvent, DockerEventMonitor
+from .driver import (
+    ARCHITECTURE_LABEL,
+    GPU_VENDOR_LABEL,
+    RUNNER_NAME_PREFIX,
+    TAGS_LABEL,
+    DockerDriver,
+)
+from .driver_pool import DriverPool, NoHostAvailable
+from .events import JobEventBus
+from .executors import AsyncDriver, Executors
+from .fair_queue import FairSharePolicy, FairShareQueue, QueuedJob, job_priority
+from .gitlab_client import AsyncGitLabClient
+from .job_discovery import PendingJobDiscovery
+from .metrics import LOOP_ITERATION_DURATION
+from .models import Job, Runner
+from .provisioning import ProvisioningPipeline, ProvisioningRequest
+from .reaper import OrphanReaper
+from .recovery import RecoveryReport, StartupReconciler
+from .recycle import RecyclePolicy
+from .runner_config import RUNNER_RUN_COMMAND, render_runner_config
+from .scheduler import JobDemand, ResourceRequest, RunnerSlot, schedule
+from .status import StatusCache
+from .tracing import traced
+from .usage import UsageTracker, profile_key
+from .warm_pool import (
+    DEFAULT_RUNNER_TAGS,
+    ArrivalForecaster,
+    PoolClass,
+    WarmPoolManager,
+    join_tags,
+    load_pool_specs,
+)
 
-import requests
-from sqlalchemy.orm import Session
+logger = logging.getLogger(__name__)
 
-from .driver import DockerDriver
-from .models import Runner
+# Runner rows whose container is expected to be up; runners being reset are
+# left to the reset
+ACTIVE_RUNNER_STATUSES = ("idle", "busy", "provisioning")
 
-logger = logging.getLogger(__name__)
+
+async def find_gitlab_runner(db: AsyncSession, gitlab_runner: Dict[str, Any]) -> Optional[Runner]:
+    """
+    The runner row for the runner object of a GitLab job webhook
+    """
+    return await db.scalar(
+        select(Runner)
+        .where(
+            or_(
+                Runner.gitlab_runner_id == gitlab_runner.get("id"),
+                Runner.name == gitlab_runner.get("description"),
+            )
+        )
+        .limit(1)
+    )
 
 
 class RunnerManager:
@@ -28,21 +82,94 @@ class RunnerManager:
 
     def __init__(
         self,
-        db: Session,
-        driver: DockerDriver,
+        session_factory: async_sessionmaker,
+        driver: Union[DockerDriver, DriverPool],
         gitlab_url: str,
         gitlab_token: str,
         cooldown_minutes: int = 5,
         max_idle_runners: int = 0,
         runner_registration_token: str = None,
+        event_bus: Optional[JobEventBus] = None,
+        executors: Optional[Executors] = None,
+        status_cache: Optional[StatusCache] = None,
+        orphan_reaper: Optional[OrphanReaper] = None,
+        recycle: Optional[RecyclePolicy] = None,
+        fair_share: Optional[FairSharePolicy] = None,
     ):
-        self.db = db
+        # Every loop iteration and pipeline stage opens its own short-lived
+        # session, so the concurrent loops never share a unit of work
+        self.session_factory = session_factory
         self.driver = driver
+        # Blocking Docker SDK and GitLab calls run on bounded thread pools
+        self.executors = executors or Executors()
+        self.async_driver = AsyncDriver(driver, self.executors.docker)
         self.gitlab_url = gitlab_url
         self.gitlab_token = gitlab_token
         self.cooldown_minutes = cooldown_minutes
         self.max_idle_runners = max_idle_runners
+        # Runners serve jobs until they reach RUNNER_MAX_JOBS or RUNNER_MAX_AGE_MINUTES
+        self.recycle = recycle or RecyclePolicy.from_env()
+        # Resets run beside the dispatcher so a slow reset never delays a spawn
+        self._resets: Set[asyncio.Task] = set()
         self.runner_image = os.getenv("RUNNER_IMAGE", "gitlab/gitlab-runner:alpine")
+        # Every GitLab call goes through one client, so pending job listings
+        # and runner creates/deletes share its rate limit, retries and breaker
+        self.gitlab_client = AsyncGitLabClient(gitlab_url, gitlab_token)
+        self.job_discovery = PendingJobDiscovery(
+            gitlab_url, gitlab_token, client=self.gitlab_client
+        )
+        self.event_bus = event_bus or JobEventBus()
+        # One events stream per Docker host
+        self.event_monitors = [
+            DockerEventMonitor(endpoint, executor=self.executors.docker)
+            for endpoint in driver.endpoints
+        ]
+        # Snapshot behind /status; marked stale whenever a loop changes runner rows
+        self.status_cache = status_cache or StatusCache()
+        # Removes containers, networks and volumes whose runner is gone
+        self.orphan_reaper = orphan_reaper or OrphanReaper(self.async_driver)
+        # Peak usage of past runs, for sizing runners per job
+        self.usage = UsageTracker(session_factory, self.async_driver)
+
+        # Pending GitLab jobs by id, fed by webhooks and the reconciliation sweep
+        self.pending_jobs: Dict[Any, Dict] = {}
+        # Order in which pending jobs get runners: priority class, then fair
+        # share between projects, then age (see fair_queue)
+        self.queue = FairShareQueue(fair_share or FairSharePolicy.from_env())
+        # Pending job -> when it was first seen, and the jobs already charged
+        # to their project's share
+        self._enqueued_at: Dict[Any, float] = {}
+        self._charged: Set[Any] = set()
+        self.max_runners = int(os.getenv("MAX_RUNNERS", "20"))
+        self.reconciler = StartupReconciler(session_factory, self.async_driver, self.gitlab_client)
+
+        # Warm pools per (architecture, GPU vendor, tags) class; MAX_IDLE_RUNNERS
+        # is the floor of the default pool
+        self.warm_pools = WarmPoolManager(
+            load_pool_specs(default_min=max_idle_runners), ArrivalForecaster()
+        )
+
+        # Fast start: create the runner through the GitLab API up front and
+        # boot the container with a rendered config.toml, skipping the
+        # register and run execs entirely
+        self.fast_start = os.getenv("RUNNER_FAST_START", "false").lower() == "true"
+        if self.fast_start:
+            stages = [
+                ("register", self._stage_create_gitlab_runner),
+                ("create", self._stage_create),
+                ("attach", self._stage_attach),
+            ]
+        else:
+            stages = [
+                ("create", self._stage_create),
+                ("attach", self._stage_attach),
+                ("register", self._stage_register),
+                ("start_service", self._stage_start_service),
+            ]
+        self.pipeline = ProvisioningPipeline(stages, on_failure=self._on_provisioning_failure)
+
+        # Webhook events drive dispatch; polling GitLab is only a safety net
+        self.reconcile_interval = int(os.getenv("JOB_RECONCILE_INTERVAL_SECONDS", "60"))
 
         # Get runner registration token from env or parameter
         self.runner_registration_token = runner_registration_token or os.getenv(
@@ -52,6 +179,8 @@ class RunnerManager:
         # Enhanced resource limits - quad core, 4-6GB RAM for faster boot
         self.default_cpu_limit = float(os.getenv("RUNNER_CPU_LIMIT", "4.0"))
         self.default_mem_limit = os.getenv("RUNNER_MEMORY_LIMIT", "6g")
+        # The same size in scheduler units, for jobs with no usage history
+        self.default_request = ResourceRequest.default()
 
         logger.info(
             f"RunnerManager initialized: {self.default_cpu_limit} CPUs, "
@@ -63,6 +192,21 @@ class RunnerManager:
         else:
             logger.warning("⚠ No runner registration token - cannot register runners!")
 
+    async def recover(self) -> Optional[RecoveryReport]:
+        """
+        Reconcile runner and job rows with Docker and GitLab after a restart.
+
+        Call before ``start_lifecycle_manager`` so the loops start from the
+        repaired state.
+        """
+        try:
+            report = await self.reconciler.run()
+        except Exception as e:
+            logger.error(f"Startup reconciliation failed: {e}", exc_info=True)
+            return None
+        self.status_cache.invalidate()
+        return report
+
     async def start_lifecycle_manager(self):
         """
         Start the background lifecycle management tasks
@@ -71,185 +215,541 @@ class RunnerManager:
 
         # Run tasks in parallel
         await asyncio.gather(
+            self.dispatch_job_events(),
             self.monitor_gitlab_jobs(),
+            self.maintain_warm_pools(),
             self.cleanup_idle_runners(),
             self.health_check_runners(),
+            self.reap_orphans(),
+            self.usage.run(),
+            self.monitor_docker_hosts(),
             return_exceptions=True,
         )
 
+    async def dispatch_job_events(self):
+        """
+        Spawn runners as soon as webhook job events arrive
+        """
+        logger.info("Starting job event dispatcher...")
+        queue = self.event_bus.subscribe()
+
+        try:
+            while True:
+                event = await queue.get()
+                if not event.is_pending:
+                    self.pending_jobs.pop(event.job_id, None)
+                    if event.is_finished and event.runner and self.recycle.enabled:
+                        reset = asyncio.create_task(self.recycle_runner(event.runner, event.job_id))
+                        self._resets.add(reset)
+                        reset.add_done_callback(self._resets.discard)
+                    continue
+
+                # Continue the webhook's trace; runners submitted here join it
+                with (
+                    LOOP_ITERATION_DURATION.labels("dispatch_job_events").time(),
+                    traced(
+                        "dispatch_job_event",
+                        parent=event.trace_context,
+                        **{"job.id": str(event.job_id)},
+                    ),
+                ):
+                    self.pending_jobs[event.job_id] = event.as_gitlab_job()
+                    try:
+                        await self.scale_to_demand()
+                    except Exception as e:
+                        logger.error(f"Failed to dispatch job {event.job_id}: {e}", exc_info=True)
+        finally:
+            self.event_bus.unsubscribe(queue)
+
     async def monitor_gitlab_jobs(self):
         """
-        Monitor GitLab for pending jobs and spawn runners as needed
+        Reconcile against GitLab's pending jobs in case a webhook was missed
         """
-        logger.info("Starting GitLab job monitor...")
+        logger.info(f"Starting GitLab job reconciliation (every {self.reconcile_interval}s)...")
 
         while True:
             try:
-                # Get all projects
-                projects = self._get_gitlab_projects()
-
-                for project in projects:
-                    project_id = project["id"]
-
-                    # Check for pending jobs
-                    pending_jobs = self._get_pending_jobs(project_id)
+                # Each sweep is the root of its own trace
+                with (
+                    LOOP_ITERATION_DURATION.labels("monitor_gitlab_jobs").time(),
+                    traced("reconcile_pending_jobs") as span,
+                ):
+                    pending_jobs = await self.job_discovery.fetch_pending_jobs()
+                    span.set_attribute("jobs.pending", len(pending_jobs))
 
                     if pending_jobs:
-                        logger.info(
-                            f"Found {len(pending_jobs)} pending job(s) for project {project_id}"
-                        )
+                        logger.info(f"Found {len(pending_jobs)} pending job(s)")
 
-                        for job in pending_jobs:
-                            await self.ensure_runner_for_job(job)
+                    # GitLab's view replaces whatever the webhooks accumulated
+                    self.pending_jobs = {job["id"]: job for job in pending_jobs}
+                    await self.scale_to_demand()
 
-                await asyncio.sleep(10)  # Check every 10 seconds
+                await asyncio.sleep(self.reconcile_interval)
 
             except Exception as e:
                 logger.error(f"Error in job monitor: {e}", exc_info=True)
-                await asyncio.sleep(30)
+                # Back off for as long as GitLab (or the circuit breaker) asked
+                await asyncio.sleep(getattr(e, "retry_after", None) or 30)
 
     async def ensure_runner_for_job(self, job: Dict):
         """
         Ensure a runner exists for the given job
         """
-        job_id = job["id"]
-        job_tags = job.get("tag_list", [])
-
-        logger.info(f"Ensuring runner for job {job_id} with tags: {job_tags}")
-
-        # Check if we have an idle runner that matches
-        idle_runner = self.db.query(Runner).filter(Runner.status == "idle").first()
+        logger.info(f"Ensuring runner for job {job['id']} with tags: {job.get('tag_list', [])}")
+        self.pending_jobs[job["id"]] = job
+        await self.scale_to_demand()
 
-        if idle_runner:
-            logger.info(f"Found idle runner: {idle_runner.name}")
+    async def scale_to_demand(self):
+        """
+        Launch runners for the pending job queue in one scheduling pass.
+
+        Jobs are taken in fair-share order, leaving out projects at their
+        running-job cap. Idle runners, and runners still being provisioned,
+        are matched to the jobs they can serve first. The scheduler bin-packs the remaining jobs
+        onto the Docker hosts and each gets a runner on the host it was packed
+        onto, submitted to the provisioning pipeline at once and capped
+        overall by MAX_RUNNERS. Jobs no host has room for wait for the next
+        pass.
+        """
+        if not self.pending_jobs:
             return
 
-        # Check if a runner is already being provisioned
-        provisioning = self.db.query(Runner).filter(Runner.status == "provisioning").count()
-
-        if provisioning > 0:
-            logger.info("Runner already being provisioned")
+        now = time.time()
+        ordered = await self._fair_share_order(now)
+        jobs = [self.pending_jobs[queued.key] for queued in ordered]
+        if not jobs:
             return
-
-        # Spawn new runner
-        await self.spawn_runner(tags=job_tags or ["docker", "autogit"])
-
-    async def spawn_runner(
-        self, tags: List[str] = None, architecture: str = "amd64", gpu_enabled: bool = False
-    ) -> Optional[Runner]:
+        job_classes = [PoolClass.from_gitlab_job(job) for job in jobs]
+        idle_runners, headroom = await self._idle_runners_and_headroom()
+        sizes = await self._class_sizes(jobs)
+        hosts = await self.async_driver.host_capacities()
+
+        demands = [
+            JobDemand(
+                key=index,
+                request=sizes[job_class],
+                architecture=job_class.architecture,
+                gpu_vendor=job_class.gpu_vendor,
+                tags=job_class.tags,
+            )
+            for index, job_class in enumerate(job_classes)
+        ]
+        # A runner still being provisioned picks up a job as soon as it is up
+        slots = [self._runner_slot(runner) for runner in idle_runners] + [
+            self._request_slot(request) for request in self.pipeline.requests
+        ]
+        plan = schedule(demands, slots, hosts)
+        if plan.spawns:
+            logger.info(
+                f"{len(jobs)} pending job(s): {len(plan.assignments)} covered by idle or "
+                f"provisioning runners, spawning {len(plan.spawns)}, "
+                f"{len(plan.waiting)} waiting for host room"
+            )
+        for index, reason in plan.rejected.items():
+            logger.error(f"Job {jobs[index]['id']} cannot be scheduled: {reason}")
+
+        # Queue order decides who gets the headroom
+        served = set(plan.assignments)
+        spawns = sorted(plan.spawns)
+        for position, index in enumerate(spawns):
+            if headroom <= 0:
+                logger.info(f"MAX_RUNNERS reached, {len(spawns) - position} job(s) keep waiting")
+                break
+            # Spawn into the warm pool that serves this class, if any, so the
+            # runner stays useful for the pool after this job
+            job_class = job_classes[index]
+            spec = self.warm_pools.pool_for(job_class)
+            runner_class = spec.pool_class if spec else job_class
+            if self._submit(runner_class, sizes[job_class], host=plan.spawns[index]):
+                headroom -= 1
+                served.add(index)
+
+        # A job is charged to its project once, the first pass it gets a runner
+        charged = [
+            ordered[index] for index in sorted(served) if ordered[index].key not in self._charged
+        ]
+        self.queue.charge(charged, now)
+        self._charged.update(queued.key for queued in charged)
+
+    async def _fair_share_order(self, now: float) -> List[QueuedJob]:
         """
-        Spawn a new GitLab runner and register it
+        The pending jobs in fair-share order, without those of projects
+        already running their cap. The jobs stay queued: GitLab, not the
+        coordinator, hands them to runners.
         """
-        import random
-        import string
+        for key in self._enqueued_at.keys() - self.pending_jobs.keys():
+            del self._enqueued_at[key]
+        self._charged.intersection_update(self.pending_jobs)
+        self.queue.sync(self._queued(job, now) for job in self.pending_jobs.values())
+
+        async with self.session_factory() as db:
+            running = dict(
+                (
+                    await db.execute(
+                        select(Job.project_id, func.count(Job.id))
+                        .where(Job.status == "running")
+                        .group_by(Job.project_id)
+                    )
+                ).all()
+            )
+        ordered = self.queue.take(now, running)
+        self.queue.requeue(ordered)
+        return ordered
+
+    def _queued(self, job: Dict, now: float) -> QueuedJob:
+        project = job.get("project") or {}
+        pipeline = job.get("pipeline") or {}
+        return QueuedJob(
+            key=job["id"],
+            project_id=project.get("id") or pipeline.get("project_id") or 0,
+            priority=job_priority(
+                job.get("ref"),
+                bool(job.get("tag")),
+                job.get("tag_list") or (),
+                self.queue.policy.protected_refs,
+            ),
+            enqueued_at=self._enqueued_at.setdefault(job["id"], now),
+        )
 
-        runner_id = "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
-        runner_name = f"autogit-runner-{runner_id}"
+    def _runner_slot(self, runner: Runner) -> RunnerSlot:
+        # Runners from before sizes were recorded have the default size
+        return RunnerSlot(
+            key=runner.id,
+            cpu=runner.cpu_limit if runner.cpu_limit is not None else self.default_request.cpu,
+            memory=(
+                runner.memory_limit
+                if runner.memory_limit is not None
+                else self.default_request.memory
+            ),
+            architecture=runner.architecture,
+            gpu_enabled=bool(runner.gpu_enabled),
+            tags=PoolClass.from_runner(runner).tags,
+        )
 
-        logger.info(f"Spawning runner: {runner_name}")
+    def _request_slot(self, request: ProvisioningRequest) -> RunnerSlot:
+        return RunnerSlot(
+            key=request.name,
+            cpu=request.cpu_limit or self.default_request.cpu,
+            memory=request.memory_limit or self.default_request.memory,
+            architecture=request.architecture,
+            gpu_enabled=request.gpu_enabled,
+            tags=frozenset(request.tags),
+        )
 
-        try:
-            # Create runner container with enhanced resources
-            container_info = self.driver.spawn_runner(
-                name=runner_name,
-                image=self.runner_image,
-                cpu_limit=self.default_cpu_limit,
-                mem_limit=self.default_mem_limit,
-                network="autogit-network",
-                platform=f"linux/{architecture}",
-                gpu_vendor="nvidia" if gpu_enabled else None,
+    async def _class_sizes(self, jobs: Iterable[Dict]) -> Dict[PoolClass, ResourceRequest]:
+        """
+        Runner size per job class. A runner picks up whichever job of its
+        class comes next, so it is sized for the largest of them: from
+        resource tags, else past runs, else the default size.
+        """
+        jobs = list(jobs)
+        async with self.session_factory() as db:
+            history = await self.usage.recommend(db, {profile_key(job) for job in jobs})
+        sizes: Dict[PoolClass, ResourceRequest] = {}
+        for job in jobs:
+            size = ResourceRequest.from_tags(
+                job.get("tag_list") or (),
+                history.get(profile_key(job), self.default_request),
             )
+            job_class = PoolClass.from_gitlab_job(job)
+            largest = sizes.get(job_class)
+            if largest is not None:
+                size = ResourceRequest(max(largest.cpu, size.cpu), max(largest.memory, size.memory))
+            sizes[job_class] = size
+        return sizes
+
+    async def maintain_warm_pools(self):
+        """
+        Keep each warm pool at its forecast target ahead of demand
+        """
+        logger.info(f"Starting warm pool manager ({len(self.warm_pools.specs)} pool(s))...")
+        interval = self.warm_pools.forecaster.bucket_seconds
 
-            # Create database entry
-            runner = Runner(
-                id=container_info["id"],
-                name=runner_name,
-                status="provisioning",
-                architecture=architecture,
-                gpu_enabled=gpu_enabled,
-                container_id=container_info["id"],
-                ip_address=container_info.get("ip_address"),
-                created_at=datetime.utcnow(),
-            )
+        while True:
+            try:
+                with LOOP_ITERATION_DURATION.labels("maintain_warm_pools").time():
+                    async with self.session_factory() as db:
+                        await self.warm_pools.forecaster.observe(db)
+                        await self.status_cache.refresh(db)
+                    targets = self.warm_pools.targets()
+
+                    idle_classes, headroom = await self._idle_classes_and_headroom()
+
+                    for pool_class, target in targets.items():
+                        idle = idle_classes.count(pool_class)
+                        provisioning = self.pipeline.in_flight_for(
+                            lambda request: self._request_class(request) == pool_class
+                        )
+                        deficit = min(target - idle - provisioning, headroom)
+                        if deficit <= 0:
+                            continue
+                        headroom -= deficit
 
-            self.db.add(runner)
-            self.db.commit()
+                        logger.info(
+                            f"Warm pool {pool_class.key}: target {target}, {idle} idle, "
+                            f"{provisioning} provisioning - pre-spawning {deficit}"
+                        )
+                        for _ in range(deficit):
+                            if not self._submit(pool_class):
+                                break
 
-            logger.info(f"Runner container created: {runner_name}")
+            except Exception as e:
+                logger.error(f"Error in warm pool manager: {e}", exc_info=True)
 
-            # Register with GitLab
-            await self.register_runner_with_gitlab(runner, tags or ["docker", "autogit"])
+            await asyncio.sleep(interval)
 
-            return runner
+    async def _idle_classes_and_headroom(self) -> Tuple[List[PoolClass], int]:
+        """
+        Classes of the idle runners, and how many more runners MAX_RUNNERS allows
+        """
+        idle_runners, headroom = await self._idle_runners_and_headroom()
+        return [PoolClass.from_runner(runner) for runner in idle_runners], headroom
 
-        except Exception as e:
-            logger.error(f"Failed to spawn runner: {e}", exc_info=True)
-            return None
+    async def _idle_runners_and_headroom(self) -> Tuple[List[Runner], int]:
+        """
+        The idle runners, and how many more runners MAX_RUNNERS allows
+        """
+        async with self.session_factory() as db:
+            idle_runners = (await db.scalars(select(Runner).where(Runner.status == "idle"))).all()
+            # Runners already in service plus those still being provisioned
+            active = await db.scalar(
+                select(func.count(Runner.id)).where(
+                    Runner.status.in_(["idle", "busy", "resetting"])
+                )
+            )
+        headroom = self.max_runners - active - self.pipeline.in_flight
+        return list(idle_runners), headroom
 
-    async def register_runner_with_gitlab(self, runner: Runner, tags: List[str]):
+    async def spawn_runner(
+        self, tags: List[str] = None, architecture: str = "amd64", gpu_enabled: bool = False
+    ) -> Optional[Runner]:
         """
-        Register a runner with GitLab using the instance-wide registration token
+        Spawn a new GitLab runner, register it and wait until it is idle
+        """
+        pool_class = PoolClass(
+            architecture=architecture,
+            gpu_vendor="nvidia" if gpu_enabled else None,
+            tags=frozenset(tags or DEFAULT_RUNNER_TAGS),
+        )
+        request = self._new_provisioning_request(pool_class)
+        if await self.pipeline.run(request):
+            return request.runner
+        return None
+
+    def _submit(
+        self,
+        pool_class: PoolClass,
+        size: Optional[ResourceRequest] = None,
+        host: Optional[str] = None,
+    ) -> bool:
+        """
+        Submit one runner of ``pool_class``, on ``host`` when given; False when
+        no Docker host can fit it
         """
         try:
-            # Get registration token from GitLab
-            # For admin API, we need the instance runners registration token
-            # This is typically found in Admin Area > CI/CD > Runners
+            request = self._new_provisioning_request(pool_class, size, host)
+        except NoHostAvailable as e:
+            logger.warning(f"Cannot place a {pool_class.key} runner: {e}")
+            return False
+        self.pipeline.submit(request)
+        return True
+
+    def _new_provisioning_request(
+        self,
+        pool_class: PoolClass,
+        size: Optional[ResourceRequest] = None,
+        host: Optional[str] = None,
+    ) -> ProvisioningRequest:
+        import random
+        import string
 
-            # For now, we'll use the API to get or create a runner token
-            # In production, this should use the new runner authentication token workflow
+        size = size or self.default_request
+        runner_id = "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
+        name = f"{RUNNER_NAME_PREFIX}{runner_id}"
+        return ProvisioningRequest(
+            name=name,
+            tags=sorted(pool_class.tags or DEFAULT_RUNNER_TAGS),
+            architecture=pool_class.architecture,
+            gpu_enabled=pool_class.gpu_vendor is not None,
+            gpu_vendor=pool_class.gpu_vendor,
+            # Reserves the runner's CPU and memory on the chosen host
+            host=self.driver.place(
+                name,
+                architecture=pool_class.architecture,
+                gpu_vendor=pool_class.gpu_vendor,
+                cpu=size.cpu,
+                memory=size.memory,
+                host=host,
+            ),
+            cpu_limit=size.cpu,
+            memory_limit=size.memory,
+        )
 
-            logger.info(f"Registering runner {runner.name} with GitLab")
+    @staticmethod
+    def _request_class(request: ProvisioningRequest) -> PoolClass:
+        return PoolClass(request.architecture, request.gpu_vendor, frozenset(request.tags))
 
-            # Use the legacy registration token method
-            # The registration token should be set as an environment variable
-            registration_token = os.getenv("GITLAB_RUNNER_REGISTRATION_TOKEN")
+    async def _stage_create(self, request: ProvisioningRequest):
+        """
+        Create the runner container and its database entry
+        """
+        logger.info(f"Spawning runner: {request.name}")
+        cpu_limit = request.cpu_limit or self.default_request.cpu
+        memory_limit = request.memory_limit or self.default_request.memory
+
+        fast_start_options = {}
+        if request.auth_token:
+            fast_start_options = {
+                "command": RUNNER_RUN_COMMAND,
+                "runner_config": render_runner_config(
+                    name=request.name,
+                    gitlab_url=self.gitlab_url,
+                    token=request.auth_token,
+                    network_mode=self.driver.get_network_name(),
+                    clone_url=self.gitlab_url,
+                    cpus=cpu_limit,
+                    memory=memory_limit,
+                ),
+            }
+
+        # Create runner container with enhanced resources
+        container_info = await self.async_driver.create_runner_container(
+            name=request.name,
+            image=self.runner_image,
+            cpu_limit=cpu_limit,
+            mem_limit=memory_limit,
+            network="autogit-network",
+            platform=f"linux/{request.architecture}",
+            gpu_vendor=request.gpu_vendor,
+            labels={
+                ARCHITECTURE_LABEL: request.architecture,
+                GPU_VENDOR_LABEL: request.gpu_vendor or "",
+                TAGS_LABEL: join_tags(request.tags),
+            },
+            **fast_start_options,
+        )
+        request.container_id = container_info["id"]
+
+        runner = Runner(
+            id=container_info["id"],
+            name=request.name,
+            status="provisioning",
+            architecture=request.architecture,
+            gpu_enabled=request.gpu_enabled,
+            gpu_vendor=request.gpu_vendor,
+            tags=join_tags(request.tags),
+            container_id=container_info["id"],
+            host=container_info.get("host", request.host),
+            cpu_limit=cpu_limit,
+            memory_limit=memory_limit,
+            gitlab_runner_id=request.gitlab_runner_id,
+            created_at=datetime.utcnow(),
+        )
+        await self._save_runner(runner)
+        request.runner = runner
 
-            if not registration_token:
-                # Try to get it from GitLab admin API
-                registration_token = self._get_registration_token()
+        logger.info(f"Runner container created: {request.name}")
 
-            if not registration_token:
-                logger.error("No registration token available")
-                runner.status = "error"
-                self.db.commit()
-                return
+    async def _stage_attach(self, request: ProvisioningRequest):
+        """
+        Start the container so it joins the runner network
+        """
+        container_info = await self.async_driver.start_runner_container(
+            request.container_id, network="autogit-network"
+        )
+        request.runner.ip_address = container_info.get("ip_address")
 
-            # Use internal network URL for cloning (runners connect via Docker network)
-            # This resolves the "localhost" issue where GitLab reports localhost URLs
-            clone_url = self.gitlab_url  # Already uses internal hostname (autogit-git-server)
-
-            # Execute registration command in container
-            self.driver.register_gitlab_runner(
-                container_id=runner.container_id,
-                gitlab_url=self.gitlab_url,
-                registration_token=registration_token,
-                description=runner.name,
-                tags=",".join(tags),
-                executor="docker",
-                docker_image="python:3.11-slim",
-                clone_url=clone_url,
-            )
+        if request.auth_token:
+            # Pre-registered runners are serving as soon as the container starts
+            request.runner.status = "idle"
+            request.runner.last_seen = datetime.utcnow()
+            logger.info(f"Runner {request.name} started pre-registered")
+        await self._save_runner(request.runner)
 
-            # Start the runner
-            self._start_runner_service(runner.container_id)
+    async def _stage_create_gitlab_runner(self, request: ProvisioningRequest):
+        """
+        Create the runner in GitLab and obtain its authentication token
+        """
+        created = await self.gitlab_client.create_runner(
+            description=request.name, tags=request.tags
+        )
+        request.gitlab_runner_id = created["id"]
+        request.auth_token = created["token"]
 
-            runner.status = "idle"
-            runner.last_seen = datetime.utcnow()
-            self.db.commit()
+    async def _stage_register(self, request: ProvisioningRequest):
+        """
+        Register the runner with GitLab using the instance-wide registration token
+        """
+        logger.info(f"Registering runner {request.name} with GitLab")
+
+        # Use the legacy registration token method
+        # The registration token should be set as an environment variable
+        registration_token = os.getenv("GITLAB_RUNNER_REGISTRATION_TOKEN")
+
+        if not registration_token:
+            # Try to get it from GitLab admin API
+            registration_token = self._get_registration_token()
+
+        if not registration_token:
+            raise RuntimeError("No registration token available")
+
+        # Use internal network URL for cloning (runners connect via Docker network)
+        # This resolves the "localhost" issue where GitLab reports localhost URLs
+        clone_url = self.gitlab_url  # Already uses internal hostname (autogit-git-server)
+
+        # Execute registration command in container
+        await self.async_driver.register_gitlab_runner(
+            container_id=request.container_id,
+            gitlab_url=self.gitlab_url,
+            registration_token=registration_token,
+            description=request.name,
+            tags=",".join(request.tags),
+            executor="docker",
+            docker_image="python:3.11-slim",
+            clone_url=clone_url,
+            docker_cpus=request.cpu_limit or self.default_request.cpu,
+            docker_memory=request.memory_limit or self.default_request.memory,
+        )
 
-            logger.info(f"Runner {runner.name} registered and started successfully")
+    async def _stage_start_service(self, request: ProvisioningRequest):
+        """
+        Start gitlab-runner and hand the runner to the idle pool
+        """
+        await self.executors.docker.run(self._start_runner_service, request.container_id)
 
-        except Exception as e:
-            logger.error(f"Failed to register runner {runner.name}: {e}", exc_info=True)
-            runner.status = "error"
-            self.db.commit()
+        request.runner.status = "idle"
+        request.runner.last_seen = datetime.utcnow()
+        await self._save_runner(request.runner)
+
+        logger.info(f"Runner {request.name} registered and started successfully")
+
+    async def _save_runner(self, runner: Runner):
+        """
+        Persist a runner row from a pipeline stage in a session of its own
+        """
+        async with self.session_factory() as db:
+            db.add(runner)
+            await db.commit()
+        self.status_cache.invalidate()
+
+    async def _on_provisioning_failure(self, request: ProvisioningRequest, error: BaseException):
+        self.driver.release(request.name)
+        if request.runner is not None:
+            request.runner.status = "error"
+            await self._save_runner(request.runner)
+        elif request.gitlab_runner_id is not None:
+            # The container never came up, so don't leave the GitLab runner behind
+            try:
+                await self.gitlab_client.delete_runner(request.gitlab_runner_id)
+            except Exception as e:
+                logger.error(f"Failed to delete GitLab runner {request.gitlab_runner_id}: {e}")
 
     def _start_runner_service(self, container_id: str):
         """
         Start the GitLab runner service inside the container
         """
         try:
-            container = self.driver.client.containers.get(container_id)
+            container = self.driver.driver_for(container_id).client.containers.get(container_id)
 
             # Start gitlab-runner in the background
             container.exec_run(cmd=["gitlab-runner", "run"], detach=True)
@@ -268,118 +768,261 @@ class RunnerManager:
 
         while True:
             try:
-                # Calculate cooldown threshold
-                cooldown_threshold = datetime.utcnow() - timedelta(minutes=self.cooldown_minutes)
-
-                # Find idle runners past cooldown
-                idle_runners = (
-                    self.db.query(Runner)
-                    .filter(Runner.status == "idle", Runner.last_seen < cooldown_threshold)
-                    .all()
+                with LOOP_ITERATION_DURATION.labels("cleanup_idle_runners").time():
+                    async with self.session_factory() as db:
+                        await self._cleanup_idle_runners_once(db)
+
+                await asyncio.sleep(60)  # Check every minute
+
+            except Exception as e:
+                logger.error(f"Error in cleanup task: {e}", exc_info=True)
+                await asyncio.sleep(60)
+
+    async def reap_orphans(self):
+        """
+        Periodically remove Docker resources left behind by runners that are gone
+        """
+        interval = self.orphan_reaper.interval
+        logger.info(f"Starting orphan reaper (every {interval}s)...")
+
+        while True:
+            try:
+                with LOOP_ITERATION_DURATION.labels("reap_orphans").time():
+                    async with self.session_factory() as db:
+                        await self.orphan_reaper.reap(db)
+            except Exception as e:
+                logger.error(f"Error in orphan reaper: {e}", exc_info=True)
+
+            await asyncio.sleep(interval)
+
+    async def _cleanup_idle_runners_once(self, db: AsyncSession):
+        """
+        Remove the idle runners past cooldown that no warm pool needs, and
+        those the recycle policy retires.
+
+        The fleet is first diffed against one bulk container listing, so
+        runners whose container died since the last pass are marked offline
+        instead of being retired.
+        """
+        # Calculate cooldown threshold
+        cooldown_threshold = datetime.utcnow() - timedelta(minutes=self.cooldown_minutes)
+
+        active_runners = (
+            await db.scalars(select(Runner).where(Runner.status.in_(ACTIVE_RUNNER_STATUSES)))
+        ).all()
+        if not active_runners:
+            return
+
+        # One bulk listing instead of a status read per runner; runners whose
+        # container is gone are marked offline rather than torn down
+        statuses = await self.async_driver.get_runner_statuses()
+        if self._mark_stopped_runners_offline(active_runners, statuses):
+            await db.commit()
+            self.status_cache.invalidate()
+
+        idle_runners = [runner for runner in active_runners if runner.status == "idle"]
+        targets = self.warm_pools.targets()
+        idle_by_class = Counter(PoolClass.from_runner(runner) for runner in idle_runners)
+
+        # Recycled runners past their job count or age go regardless of the
+        # warm pools, which then replace them
+        retiring = {}
+        if self.recycle.enabled:
+            for runner in idle_runners:
+                reason = self.recycle.retire_reason(runner)
+                if reason:
+                    retiring[runner.id] = reason
+
+        # Idle runners past cooldown
+        for runner in [
+            r
+            for r in idle_runners
+            if r.id in retiring or (r.last_seen and r.last_seen < cooldown_threshold)
+        ]:
+            pool_class = PoolClass.from_runner(runner)
+            current_idle = idle_by_class[pool_class]
+
+            if runner.id in retiring:
+                logger.info(f"Retiring idle runner {runner.name}: {retiring[runner.id]}")
+            elif current_idle <= targets.get(pool_class, 0):
+                # Keep each warm pool at its target size
+                logger.info(f"Keeping {current_idle} idle {pool_class.key} runner(s) as warm pool")
+                continue
+            else:
+                logger.info(
+                    f"Cleaning up idle runner: {runner.name} (idle since {runner.last_seen})"
                 )
 
-                for runner in idle_runners:
-                    # Keep minimum number of idle runners if configured
-                    current_idle = self.db.query(Runner).filter(Runner.status == "idle").count()
+            if await self._retire_runner(db, runner):
+                idle_by_class[pool_class] -= 1
 
-                    if current_idle <= self.max_idle_runners:
-                        logger.info(f"Keeping {current_idle} idle runner(s) as warm pool")
-                        break
+    async def _retire_runner(self, db: AsyncSession, runner: Runner) -> bool:
+        """
+        Unregister a runner, remove its container and delete its row
+        """
+        try:
+            # Unregister from GitLab first
+            await self._unregister_runner_from_gitlab(runner)
 
-                    logger.info(
-                        f"Cleaning up idle runner: {runner.name} (idle since {runner.last_seen})"
-                    )
+            # Stop and remove container
+            await self.async_driver.stop_runner(runner.container_id, remove=True)
 
-                    try:
-                        # Unregister from GitLab first
-                        self._unregister_runner_from_gitlab(runner)
+            # Remove from database
+            await db.delete(runner)
+            await db.commit()
+            self.status_cache.invalidate()
 
-                        # Stop and remove container
-                        self.driver.stop_runner(runner.container_id, remove=True)
+            logger.info(f"Runner {runner.name} cleaned up successfully")
+            return True
 
-                        # Remove from database
-                        self.db.delete(runner)
-                        self.db.commit()
+        except Exception as e:
+            logger.error(f"Failed to cleanup runner {runner.name}: {e}")
+            return False
 
-                        logger.info(f"Runner {runner.name} cleaned up successfully")
+    async def recycle_runner(self, gitlab_runner: Dict[str, Any], job_id: Any):
+        """
+        Reset a runner whose job finished and return it to the idle pool.
 
-                    except Exception as e:
-                        logger.error(f"Failed to cleanup runner {runner.name}: {e}")
+        The runner is marked ``resetting`` while the job's build containers and
+        volumes are pruned and gitlab-runner is verified, so it is neither
+        retired nor taken offline by a stop event meanwhile. Runners the
+        recycle policy retires, or that fail the reset, are torn down.
+        """
+        async with self.session_factory() as db:
+            runner = await find_gitlab_runner(db, gitlab_runner)
+            if runner is None or runner.status not in ("idle", "busy"):
+                return
 
-                await asyncio.sleep(60)  # Check every minute
+            reason = self.recycle.retire_reason(runner)
+            if reason:
+                logger.info(f"Retiring runner {runner.name}: {reason}")
+                await self._retire_runner(db, runner)
+                return
 
-            except Exception as e:
-                logger.error(f"Error in cleanup task: {e}", exc_info=True)
-                await asyncio.sleep(60)
+            runner.status = "resetting"
+            await db.commit()
+            self.status_cache.invalidate()
+
+            reset = await self.async_driver.reset_runner(runner.container_id, [job_id])
+
+            await db.refresh(runner)
+            if runner.status != "resetting":
+                # The container was destroyed during the reset
+                return
+            if not reset:
+                logger.warning(f"Runner {runner.name} failed its reset, retiring it")
+                await self._retire_runner(db, runner)
+                return
+
+            runner.status = "idle"
+            runner.last_seen = datetime.utcnow()
+            await db.commit()
+            self.status_cache.invalidate()
+            logger.info(f"Runner {runner.name} recycled after {runner.jobs_completed} job(s)")
 
     async def health_check_runners(self):
         """
-        Monitor runner health and update status
+        Monitor runner health from the Docker events stream and update status
         """
-        logger.info("Starting runner health check task...")
+        logger.info("Starting runner health monitor (Docker events)...")
+        await asyncio.gather(
+            *(
+                monitor.run(
+                    functools.partial(self._reconcile_container_snapshot, host=monitor.driver.host),
+                    self._handle_container_event,
+                )
+                for monitor in self.event_monitors
+            )
+        )
+
+    async def monitor_docker_hosts(self):
+        """
+        Health-check the Docker hosts of a driver pool and recount their capacity
+        """
+        if not isinstance(self.driver, DriverPool):
+            return
+        logger.info(f"Starting Docker host monitor ({len(self.driver.hosts)} host(s))...")
 
         while True:
             try:
-                active_runners = (
-                    self.db.query(Runner)
-                    .filter(Runner.status.in_(["idle", "busy", "provisioning"]))
-                    .all()
-                )
-
-                for runner in active_runners:
-                    try:
-                        # Check container status
-                        container_status = self.driver.get_runner_status(runner.container_id)
+                with LOOP_ITERATION_DURATION.labels("monitor_docker_hosts").time():
+                    await self.executors.docker.run(self.driver.refresh)
+            except Exception as e:
+                logger.error(f"Error in Docker host monitor: {e}", exc_info=True)
 
-                        if container_status in ["exited", "not_found", "dead"]:
-                            logger.warning(f"Runner {runner.name} is {container_status}")
-                            runner.status = "offline"
-                            self.db.commit()
-                        else:
-                            runner.last_seen = datetime.utcnow()
-                            self.db.commit()
+            await asyncio.sleep(self.driver.check_interval)
 
-                    except Exception as e:
-                        logger.error(f"Health check failed for {runner.name}: {e}")
+    async def _reconcile_container_snapshot(
+        self, statuses: Dict[str, str], host: Optional[str] = None
+    ):
+        """
+        Mark active runners offline when their container is gone or stopped.
 
-                await asyncio.sleep(30)  # Check every 30 seconds
+        ``statuses`` covers the containers of one Docker host; runners on other
+        hosts are left to that host's snapshot.
+        """
+        with LOOP_ITERATION_DURATION.labels("health_snapshot").time():
+            async with self.session_factory() as db:
+                active_runners = await db.scalars(
+                    select(Runner).where(Runner.status.in_(ACTIVE_RUNNER_STATUSES))
+                )
+                self._mark_stopped_runners_offline(active_runners, statuses, host)
 
-            except Exception as e:
-                logger.error(f"Error in health check task: {e}", exc_info=True)
-                await asyncio.sleep(30)
+                # One commit for the whole reconciliation
+                await db.commit()
+            self.status_cache.invalidate()
 
-    def _get_gitlab_projects(self) -> List[Dict]:
-        """
-        Get all projects from GitLab
+    def _mark_stopped_runners_offline(
+        self, runners: Iterable[Runner], statuses: Dict[str, str], host: Optional[str] = None
+    ) -> List[Runner]:
         """
-        try:
-            response = requests.get(
-                f"{self.gitlab_url}/api/v4/projects",
-                headers={"PRIVATE-TOKEN": self.gitlab_token},
-                timeout=10,
-            )
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            logger.error(f"Failed to get projects: {e}")
-            return []
+        Diff a container snapshot against runner rows in one pass, marking
+        offline the runners whose container has exited or is gone.
 
-    def _get_pending_jobs(self, project_id: int) -> List[Dict]:
+        Runners on a host that could not be listed are not known to be gone,
+        and with ``host`` set only that host's runners are considered.
         """
-        Get pending jobs for a project
+        unavailable = self.driver.unavailable_hosts()
+        stopped = []
+        for runner in runners:
+            runner_host = runner.host or self.driver.default_host
+            if runner_host in unavailable or (host is not None and runner_host != host):
+                continue
+            container_status = statuses.get(runner.container_id, "not_found")
+            if container_status in ["exited", "not_found", "dead"]:
+                logger.warning(f"Runner {runner.name} is {container_status}")
+                runner.status = "offline"
+                stopped.append(runner)
+        return stopped
+
+    async def _handle_container_event(self, event: ContainerEvent):
         """
-        try:
-            response = requests.get(
-                f"{self.gitlab_url}/api/v4/projects/{project_id}/jobs",
-                headers={"PRIVATE-TOKEN": self.gitlab_token},
-                params={"scope[]": "pending"},
-                timeout=10,
-            )
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            logger.debug(f"Failed to get pending jobs for project {project_id}: {e}")
-            return []
+        Apply a single container lifecycle event to its runner row
+        """
+        with LOOP_ITERATION_DURATION.labels("health_event").time():
+            async with self.session_factory() as db:
+                runner = await db.scalar(
+                    select(Runner).where(Runner.container_id == event.container_id).limit(1)
+                )
+                if runner is None:
+                    return
+
+                if event.is_down:
+                    if runner.status == "resetting" and event.action != "destroy":
+                        # The reset restarts a stopped container and decides
+                        # whether the runner stays
+                        logger.info(f"Runner {runner.name} {event.action} during its reset")
+                    elif runner.status != "offline":
+                        logger.warning(
+                            f"Runner {runner.name} went offline ({event.action}, "
+                            f"exit code {event.exit_code})"
+                        )
+                        runner.status = "offline"
+                        await db.commit()
+                        self.status_cache.invalidate()
+                elif runner.status != "offline":
+                    runner.last_seen = datetime.utcnow()
+                    await db.commit()
 
     def _get_registration_token(self) -> Optional[str]:
         """
@@ -392,13 +1035,18 @@ class RunnerManager:
         # Otherwise try to get from environment
         return os.getenv("GITLAB_RUNNER_REGISTRATION_TOKEN")
 
-    def _unregister_runner_from_gitlab(self, runner: Runner):
+    async def _unregister_runner_from_gitlab(self, runner: Runner):
         """
         Unregister a runner from GitLab
         """
         try:
-            # Get runner token from container if possible
-            # For now, we'll just let GitLab mark it as offline
+            if runner.gitlab_runner_id is not None:
+                await self.gitlab_client.delete_runner(runner.gitlab_runner_id)
+                logger.info(f"Runner {runner.name} deleted from GitLab")
+                return
+
+            # Legacy registrations don't record their GitLab id, so we just
+            # let GitLab mark them as offline
             logger.info(f"Runner {runner.name} will be marked as offline in GitLab")
 
         except Exception as e:
@@ -0,0 +1,227 @@
+"""
+Job scheduler - matches queued jobs to idle runners and free host capacity
+
+Each job asks for CPU and memory through its tags (``cpu:2``, ``memory:8g``);
+jobs without them ask for the default runner size:
+
+    RUNNER_CPU_LIMIT     Default CPU request per job and runner (default: 4.0)
+    RUNNER_MEMORY_LIMIT  Default memory request per job and runner (default: 6g)
+
+``schedule`` assigns a whole queue in one pass. Jobs first take the smallest
+idle runner that fits them and carries their tags, oldest job first. The rest are packed onto the
+Docker hosts best-fit decreasing: largest job first, each onto the host it
+leaves with the least free memory. A host's memory is never oversubscribed;
+a job no host could ever hold is rejected rather than left queued.
+"""
+
+import bisect
+import os
+from dataclasses import dataclass, field, replace
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+import docker
+
+CPU_TAG_PREFIXES = ("cpu:", "cpus:")
+MEMORY_TAG_PREFIXES = ("memory:", "mem:")
+
+
+@dataclass(frozen=True)
+class ResourceRequest:
+    """CPU cores and memory bytes a job needs from its runner."""
+
+    cpu: float
+    memory: int
+
+    @classmethod
+    def default(cls) -> "ResourceRequest":
+        return cls(
+            cpu=float(os.getenv("RUNNER_CPU_LIMIT", "4.0")),
+            memory=docker.utils.parse_bytes(os.getenv("RUNNER_MEMORY_LIMIT", "6g")),
+        )
+
+    @classmethod
+    def from_tags(
+        cls, tags: Iterable[str], default: Optional["ResourceRequest"] = None
+    ) -> "ResourceRequest":
+        """
+        ``cpu:N`` / ``memory:SIZE`` tags, falling back to ``default`` for the other
+        """
+        default = default or cls.default()
+        cpu, memory = default.cpu, default.memory
+        for tag in tags:
+            tag = tag.strip().lower()
+            try:
+                if tag.startswith(CPU_TAG_PREFIXES):
+                    cpu = float(tag.split(":", 1)[1])
+                elif tag.startswith(MEMORY_TAG_PREFIXES):
+                    memory = docker.utils.parse_bytes(tag.split(":", 1)[1])
+            except (ValueError, docker.errors.DockerException):
+                continue
+        return cls(cpu=cpu, memory=memory)
+
+    def fits_in(self, cpu: float, memory: int) -> bool:
+        return self.cpu <= cpu and self.memory <= memory
+
+
+@dataclass
+class JobDemand:
+    """A queued job, as the scheduler sees it."""
+
+    key: Hashable
+    request: ResourceRequest
+    architecture: str = "amd64"
+    gpu_vendor: Optional[str] = None
+    # Runner tags the job asks for
+    tags: FrozenSet[str] = frozenset()
+
+    @property
+    def runner_class(self) -> Tuple[str, bool]:
+        return self.architecture, self.gpu_vendor is not None
+
+
+@dataclass
+class RunnerSlot:
+    """An idle runner and the resources its container was given."""
+
+    key: Hashable
+    cpu: float
+    memory: int
+    architecture: str = "amd64"
+    gpu_enabled: bool = False
+    # Tags the runner registered with; None when they are not checked
+    tags: Optional[FrozenSet[str]] = None
+
+    @property
+    def runner_class(self) -> Tuple[str, bool]:
+        return self.architecture, self.gpu_enabled
+
+    def serves(self, job: JobDemand) -> bool:
+        return job.request.fits_in(self.cpu, self.memory) and (
+            self.tags is None or job.tags <= self.tags
+        )
+
+
+@dataclass
+class HostCapacity:
+    """
+    What one Docker host can still hold.
+
+    ``architecture`` and ``gpu_vendors`` are None when the host is not
+    checked for them (a single daemon, which may emulate other platforms).
+    """
+
+    host: str
+    cpu: float
+    memory: int
+    free_cpu: float
+    free_memory: int
+    architecture: Optional[str] = None
+    gpu_vendors: Optional[Set[str]] = None
+
+    def serves(self, job: JobDemand) -> bool:
+        if self.architecture is not None and self.architecture != job.architecture:
+            return False
+        if job.gpu_vendor and self.gpu_vendors is not None:
+            return job.gpu_vendor in self.gpu_vendors
+        return True
+
+
+@dataclass
+class Schedule:
+    """Outcome of one scheduling pass, keyed by job."""
+
+    # Job -> idle runner it takes
+    assignments: Dict[Hashable, Hashable] = field(default_factory=dict)
+    # Job -> host a new runner of the job's size is created on
+    spawns: Dict[Hashable, str] = field(default_factory=dict)
+    # Jobs left queued until capacity frees up
+    waiting: List[Hashable] = field(default_factory=list)
+    # Job -> why no host could ever run it
+    rejected: Dict[Hashable, str] = field(default_factory=dict)
+
+
+def schedule(
+    jobs: Sequence[JobDemand],
+    runners: Iterable[RunnerSlot],
+    hosts: Iterable[HostCapacity],
+) -> Schedule:
+    """
+    Assign ``jobs`` (oldest first) to idle ``runners`` and new runners on ``hosts``
+    """
+    result = Schedule()
+
+    # Idle runners per class, sorted by size so the best fit is a bisect away
+    idle: Dict[Tuple[str, bool], List[Tuple[int, float, int]]] = {}
+    slots: List[RunnerSlot] = []
+    for slot in runners:
+        idle.setdefault(slot.runner_class, []).append((slot.memory, slot.cpu, len(slots)))
+        slots.append(slot)
+    for sizes in idle.values():
+        sizes.sort()
+
+    unplaced: List[JobDemand] = []
+    for job in jobs:
+        sizes = idle.get(job.runner_class)
+        if sizes:
+            start = bisect.bisect_left(sizes, (job.request.memory, float("-inf"), -1))
+            for index in range(start, len(sizes)):
+                if slots[sizes[index][2]].serves(job):
+                    result.assignments[job.key] = slots[sizes.pop(index)[2]].key
+                    break
+            else:
+                unplaced.append(job)
+        else:
+            unplaced.append(job)
+
+    if not unplaced:
+        return result
+
+    # Most of a queue shares a few sizes, so jobs are settled per class and
+    # size, largest first; within a group they keep queue order
+    groups: Dict[Tuple[int, float, str, Optional[str]], List[JobDemand]] = {}
+    for job in unplaced:
+        key = (job.request.memory, job.request.cpu, job.architecture, job.gpu_vendor)
+        groups.setdefault(key, []).append(job)
+    ordered = sorted(groups.items(), key=lambda item: (-item[0][0], -item[0][1]))
+
+    # Copies, so the caller's view of the hosts is left as it was
+    hosts = [replace(host) for host in hosts]
+    by_class: Dict[Tuple[str, Optional[str]], List[HostCapacity]] = {}
+    # Per class, requests already found not to fit on any host
+    no_room: Dict[Tuple[str, Optional[str]], List[ResourceRequest]] = {}
+
+    for (_, _, architecture, gpu_vendor), group in ordered:
+        request = group[0].request
+        job_class = (architecture, gpu_vendor)
+        if job_class not in by_class:
+            by_class[job_class] = [host for host in hosts if host.serves(group[0])]
+            no_room[job_class] = []
+        candidates = by_class[job_class]
+
+        # With no host of its kind up the jobs wait; one may come back
+        if candidates and not any(request.fits_in(host.cpu, host.memory) for host in candidates):
+            reason = (
+                f"needs {request.cpu} CPUs and {request.memory} bytes of memory, more than "
+                f"any {architecture}{' GPU' if gpu_vendor else ''} host has"
+            )
+            result.rejected.update((job.key, reason) for job in group)
+            continue
+        if any(smaller.fits_in(request.cpu, request.memory) for smaller in no_room[job_class]):
+            result.waiting.extend(job.key for job in group)
+            continue
+
+        for index, job in enumerate(group):
+            best = None
+            for host in candidates:
+                if request.fits_in(host.free_cpu, host.free_memory):
+                    if best is None or host.free_memory < best.free_memory:
+                        best = host
+            if best is None:
+                no_room[job_class].append(request)
+                result.waiting.extend(job.key for job in group[index:])
+                break
+            best.free_cpu -= request.cpu
+            best.free_memory -= request.memory
+            result.spawns[job.key] = best.host
+
+    return result
@@ -2,6 +2,8 @@ import logging
 import secrets
 from typing import Any, Dict
 
+from .driver import resource_labels
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,5 +40,5 @@ class SecurityManager:
         return {
             "Name": f"net-{runner_name}",
             "Internal": True,
-            "Labels": {"autogit-managed": "true"},
+            "Labels": resource_labels(runner_name),
         }
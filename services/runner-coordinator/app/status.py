@@ -0,0 +1,135 @@
+"""
+System status snapshot - aggregated runner and job counts served to /status
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .metrics import update_status_gauges
+from .models import Job, Runner
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_RUNNER_STATUSES = ("idle", "busy", "resetting")
+
+# Fields that change on every refresh even when the counts do not
+VOLATILE_FIELDS = ("generated_at", "oldest_queued_job_age_seconds")
+
+
+@dataclass
+class StatusSnapshot:
+    """Counts gathered by one aggregation pass."""
+
+    data: Dict[str, Any]
+    taken_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def etag(self) -> str:
+        # Weak ETag over the counts only
+        counts = {k: v for k, v in self.data.items() if k not in VOLATILE_FIELDS}
+        digest = hashlib.sha1(json.dumps(counts, sort_keys=True).encode()).hexdigest()
+        return f'W/"{digest[:16]}"'
+
+
+async def collect_status(db: AsyncSession, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Aggregate runner counts with one GROUP BY and the queued-job depth with
+    one indexed query
+    """
+    now = now or datetime.utcnow()
+
+    rows = await db.execute(
+        select(
+            Runner.status, Runner.architecture, Runner.gpu_enabled, func.count(Runner.id)
+        ).group_by(Runner.status, Runner.architecture, Runner.gpu_enabled)
+    )
+    by_status: Dict[str, int] = defaultdict(int)
+    by_architecture: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    by_gpu: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for status, architecture, gpu_enabled, count in rows:
+        status = status or "unknown"
+        by_status[status] += count
+        by_architecture[architecture][status] += count
+        by_gpu["gpu" if gpu_enabled else "cpu"][status] += count
+
+    queued, oldest = (
+        await db.execute(
+            select(func.count(Job.id), func.min(Job.created_at)).where(Job.status == "queued")
+        )
+    ).one()
+
+    return {
+        "total_runners": sum(by_status.values()),
+        "active_runners": sum(by_status[s] for s in ACTIVE_RUNNER_STATUSES),
+        "idle_runners": by_status["idle"],
+        "provisioning_runners": by_status["provisioning"],
+        "runners_by_status": dict(by_status),
+        "runners_by_architecture": {k: dict(v) for k, v in by_architecture.items()},
+        "runners_by_gpu": {k: dict(v) for k, v in by_gpu.items()},
+        "queued_jobs": queued,
+        "oldest_queued_job_at": oldest.isoformat() if oldest else None,
+        "oldest_queued_job_age_seconds": (
+            round((now - oldest).total_seconds(), 1) if oldest else None
+        ),
+        "generated_at": now.isoformat(),
+    }
+
+
+class StatusCache:
+    """
+    Holds the latest status snapshot in memory.
+
+    The lifecycle loops refresh it as part of their work and mark it stale
+    when they change runner state; /status only runs the aggregation itself
+    when the snapshot is stale or older than the TTL, and concurrent polls
+    share a single refresh.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else float(os.getenv("STATUS_CACHE_TTL_SECONDS", "5"))
+        )
+        self._snapshot: Optional[StatusSnapshot] = None
+        self._stale = True
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._stale = True
+
+    def is_fresh(self) -> bool:
+        return (
+            self._snapshot is not None
+            and not self._stale
+            and time.monotonic() - self._snapshot.taken_at < self.ttl_seconds
+        )
+
+    async def refresh(self, db: AsyncSession) -> StatusSnapshot:
+        self._stale = False
+        self._snapshot = StatusSnapshot(await collect_status(db))
+        update_status_gauges(self._snapshot.data)
+        return self._snapshot
+
+    async def get(self, db: AsyncSession) -> StatusSnapshot:
+        """
+        The current snapshot, refreshed through ``db`` only when needed
+        """
+        if self.is_fresh():
+            return self._snapshot
+        async with self._lock:
+            # Another poll may have refreshed while we waited
+            if self.is_fresh():
+                return self._snapshot
+            return await self.refresh(db)
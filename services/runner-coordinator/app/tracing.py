@@ -0,0 +1,165 @@
+"""
+OpenTelemetry tracing - follows a job from webhook or poll to a running runner
+
+Spans are created through the OpenTelemetry API, which is a no-op until a
+tracer provider is installed. ``configure_tracing`` installs one at startup
+when an exporter is configured:
+
+    OTEL_TRACES_EXPORTER         otlp, console or none (default: otlp when
+                                 OTEL_EXPORTER_OTLP_ENDPOINT is set, else none)
+    OTEL_EXPORTER_OTLP_ENDPOINT  e.g. http://tempo:4318
+    OTEL_TRACES_SAMPLER_ARG      Fraction of new traces to sample (default: 1.0)
+    OTEL_SERVICE_NAME            (default: runner-coordinator)
+
+Trace context is serialized onto the Job row so work that picks the job up
+later, in another task or process, joins the same trace.
+"""
+
+import json
+import logging
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from .metrics import endpoint_template
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("autogit.runner_coordinator")
+
+# Long statements are cut so span attributes stay small
+MAX_STATEMENT_LENGTH = 500
+
+
+def configure_tracing(exporter=None, sample_ratio: Optional[float] = None):
+    """
+    Install an SDK tracer provider exporting to ``exporter``, or to the
+    exporter selected by the environment. Returns the provider, or None when
+    tracing stays disabled. Tests pass an ``InMemorySpanExporter``.
+    """
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SimpleSpanProcessor,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    processor = None
+    if exporter is not None:
+        processor = SimpleSpanProcessor(exporter)
+    else:
+        default = "otlp" if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT") else "none"
+        name = os.getenv("OTEL_TRACES_EXPORTER", default).lower()
+        if name == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            processor = BatchSpanProcessor(OTLPSpanExporter())
+        elif name == "console":
+            processor = BatchSpanProcessor(ConsoleSpanExporter())
+    if processor is None:
+        logger.info("Tracing disabled (no exporter configured)")
+        return None
+
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        if sample_ratio is None:
+            sample_ratio = float(os.getenv("OTEL_TRACES_SAMPLER_ARG", "1.0"))
+        provider = TracerProvider(
+            resource=Resource.create(
+                {"service.name": os.getenv("OTEL_SERVICE_NAME", "runner-coordinator")}
+            ),
+            # Follow the caller's decision, sample new traces by ratio
+            sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+        )
+        trace.set_tracer_provider(provider)
+    provider.add_span_processor(processor)
+    logger.info(f"Tracing enabled ({type(processor.span_exporter).__name__})")
+    return provider
+
+
+def inject_context() -> Optional[str]:
+    """
+    Serialize the current trace context, for storing on a Job row
+    """
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier)
+    return json.dumps(carrier) if carrier else None
+
+
+def extract_context(serialized: Optional[str]) -> Optional[otel_context.Context]:
+    if not serialized:
+        return None
+    try:
+        return propagate.extract(json.loads(serialized))
+    except ValueError:
+        return None
+
+
+@contextmanager
+def gitlab_span(method: str, endpoint: str) -> Iterator[trace.Span]:
+    template = endpoint_template(endpoint)
+    with tracer.start_as_current_span(
+        f"GitLab {method} {template}",
+        kind=SpanKind.CLIENT,
+        attributes={"http.request.method": method, "url.template": template},
+    ) as span:
+        yield span
+
+
+@contextmanager
+def traced(
+    name: str,
+    parent: Optional[str] = None,
+    kind: SpanKind = SpanKind.INTERNAL,
+    **attributes,
+) -> Iterator[trace.Span]:
+    """
+    Run a block in a span; ``parent`` is a serialized context from ``inject_context``
+    """
+    with tracer.start_as_current_span(
+        name, context=extract_context(parent), kind=kind, attributes=attributes
+    ) as span:
+        yield span
+
+
+def instrument_engine(engine):
+    """
+    Record a client span for every statement the engine executes
+    """
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    system = sync_engine.dialect.name
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_query_span(conn, cursor, statement, parameters, context, executemany):
+        span = tracer.start_span(
+            f"db {statement.split(None, 1)[0].upper() if statement else 'QUERY'}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": system,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            },
+        )
+        conn.info.setdefault("otel_spans", []).append(span)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def end_query_span(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("otel_spans")
+        if spans:
+            spans.pop().end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def fail_query_span(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("otel_spans") if conn is not None else None
+        if spans:
+            span = spans.pop()
+            span.set_status(Status(StatusCode.ERROR, str(exception_context.original_exception)))
+            span.end()
@@ -0,0 +1,308 @@
+"""
+Job resource usage - sizes runners from what past runs of a job used
+
+While jobs run, their build containers are sampled through the Docker stats
+API and each job's peak CPU and memory is kept in memory. When a job's
+containers are gone its peaks are folded into a compact histogram per
+(project, job name). New runners for that job are sized from a high
+percentile of the history plus headroom:
+
+    USAGE_SAMPLE_INTERVAL_SECONDS  Stats sampling interval (default: 15)
+    USAGE_PERCENTILE               Percentile of past peaks to size for (default: 95)
+    USAGE_HEADROOM                 Fraction added on top of it (default: 0.25)
+    USAGE_MIN_SAMPLES              Runs needed before history is used (default: 5)
+    USAGE_MAX_CPU / USAGE_MAX_MEMORY  Largest size ever recommended (default: 16 / 32g)
+    RUNNER_RIGHT_SIZING            Use the recommendations (default: true)
+
+Histograms have log-scale buckets about 19% wide and decay by ``DECAY`` per
+run, so a job whose needs change is re-sized after a few dozen runs.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import docker
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .driver import UsageSample
+from .executors import AsyncDriver
+from .metrics import LOOP_ITERATION_DURATION
+from .models import Job, JobResourceProfile
+from .scheduler import ResourceRequest
+
+logger = logging.getLogger(__name__)
+
+MIB = 1024**2
+
+# Smallest size ever recommended, and the lowest bucket of each histogram
+MIN_CPU = 0.25
+MIN_MEMORY = 256 * MIB
+CPU_BASE = 0.05
+MEMORY_BASE = 16 * MIB
+
+# Weight kept by older runs each time a new one is folded in
+DECAY = 0.97
+# Weights below this are dropped to keep the stored histogram small
+MIN_WEIGHT = 0.01
+
+ProfileKey = Tuple[int, str]
+
+
+def profile_key(job: Dict[str, Any]) -> Tuple[Optional[int], Optional[str]]:
+    """
+    (project id, job name) of a GitLab jobs API item or webhook-shaped job
+    """
+    project_id = (job.get("project") or {}).get("id") or (job.get("pipeline") or {}).get(
+        "project_id"
+    )
+    return project_id, job.get("name")
+
+
+class UsageHistogram:
+    """
+    Decayed log-scale histogram of one resource's per-run peaks.
+    """
+
+    RATIO = 2**0.25
+
+    def __init__(self, base: float, weights: Optional[Dict[int, float]] = None):
+        self.base = base
+        self.weights: Dict[int, float] = weights or {}
+
+    def bucket(self, value: float) -> int:
+        if value <= self.base:
+            return 0
+        return math.ceil(math.log(value / self.base, self.RATIO))
+
+    def upper(self, index: int) -> float:
+        return self.base * self.RATIO**index
+
+    def add(self, value: float):
+        self.weights = {
+            index: weight * DECAY
+            for index, weight in self.weights.items()
+            if weight * DECAY >= MIN_WEIGHT
+        }
+        index = self.bucket(value)
+        self.weights[index] = self.weights.get(index, 0.0) + 1.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Upper edge of the bucket holding the q-th percentile, or None when empty
+        """
+        total = sum(self.weights.values())
+        if not total:
+            return None
+        threshold = total * q / 100
+        cumulative = 0.0
+        for index in sorted(self.weights):
+            cumulative += self.weights[index]
+            if cumulative >= threshold - 1e-9:
+                return self.upper(index)
+        return self.upper(max(self.weights))
+
+    def encode(self) -> str:
+        return json.dumps({str(i): round(w, 3) for i, w in sorted(self.weights.items())})
+
+    @classmethod
+    def decode(cls, base: float, text: Optional[str]) -> "UsageHistogram":
+        weights = {int(i): w for i, w in json.loads(text).items()} if text else {}
+        return cls(base, weights)
+
+
+@dataclass
+class JobPeak:
+    """Highest usage seen for one running job across its build containers."""
+
+    # None until two readings of a container allow a rate
+    cpu: Optional[float] = None
+    memory: int = 0
+    # Docker host of the job's containers
+    host: Optional[str] = None
+
+
+class UsageTracker:
+    """
+    Samples running jobs, keeps per-job peaks and recommends runner sizes.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        async_driver: AsyncDriver,
+        interval: Optional[float] = None,
+        percentile: Optional[float] = None,
+        headroom: Optional[float] = None,
+        min_samples: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.async_driver = async_driver
+        self.interval = interval or float(os.getenv("USAGE_SAMPLE_INTERVAL_SECONDS", "15"))
+        self.percentile = percentile or float(os.getenv("USAGE_PERCENTILE", "95"))
+        self.headroom = (
+            headroom if headroom is not None else float(os.getenv("USAGE_HEADROOM", "0.25"))
+        )
+        self.min_samples = min_samples or int(os.getenv("USAGE_MIN_SAMPLES", "5"))
+        self.max_size = ResourceRequest(
+            cpu=float(os.getenv("USAGE_MAX_CPU", "16")),
+            memory=docker.utils.parse_bytes(os.getenv("USAGE_MAX_MEMORY", "32g")),
+        )
+        self.enabled = os.getenv("RUNNER_RIGHT_SIZING", "true").lower() == "true"
+        # Running GitLab job id -> peak so far; container id -> last reading
+        self.peaks: Dict[str, JobPeak] = {}
+        self._last: Dict[str, UsageSample] = {}
+
+    async def run(self):
+        """
+        Sample running jobs every interval and record the ones that finished
+        """
+        logger.info(f"Starting job usage sampler (every {self.interval:g}s)...")
+        while True:
+            try:
+                with LOOP_ITERATION_DURATION.labels("sample_job_usage").time():
+                    await self.sample()
+            except Exception as e:
+                logger.error(f"Error in job usage sampler: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    async def sample(self):
+        samples = await self.async_driver.sample_job_usage()
+        # Hosts a driver pool skipped or failed to sample this round
+        finished = self.observe(samples, self.async_driver.driver.unavailable_hosts())
+        if finished:
+            async with self.session_factory() as db:
+                await self.record(db, finished)
+                await db.commit()
+
+    def observe(
+        self, samples: List[UsageSample], unavailable_hosts: Iterable[str] = ()
+    ) -> Dict[str, JobPeak]:
+        """
+        Fold one round of readings into the peaks; returns the peaks of the
+        jobs that have no build container left.
+
+        Jobs on ``unavailable_hosts`` were not sampled this round, so missing
+        readings there do not mean the job finished.
+        """
+        unavailable = set(unavailable_hosts)
+        current: Dict[str, JobPeak] = {}
+        for sample in samples:
+            usage = current.setdefault(sample.job_id, JobPeak(host=sample.host))
+            usage.memory += sample.memory
+            previous = self._last.get(sample.container_id)
+            if previous is not None and sample.read_at > previous.read_at:
+                rate = (sample.cpu_time - previous.cpu_time) / 1e9
+                rate /= sample.read_at - previous.read_at
+                usage.cpu = (usage.cpu or 0.0) + max(rate, 0.0)
+        # Readings from unsampled hosts are kept for the rate once they are back
+        self._last = {
+            container_id: sample
+            for container_id, sample in self._last.items()
+            if sample.host in unavailable
+        }
+        self._last.update((sample.container_id, sample) for sample in samples)
+
+        for job_id, usage in current.items():
+            peak = self.peaks.setdefault(job_id, JobPeak())
+            peak.host = usage.host
+            peak.memory = max(peak.memory, usage.memory)
+            if usage.cpu is not None:
+                peak.cpu = max(peak.cpu or 0.0, usage.cpu)
+        finished = [
+            job_id
+            for job_id, peak in self.peaks.items()
+            if job_id not in current and peak.host not in unavailable
+        ]
+        return {job_id: self.peaks.pop(job_id) for job_id in finished}
+
+    async def record(self, db: AsyncSession, peaks: Dict[str, JobPeak]):
+        """
+        Add finished jobs' peaks to their (project, job name) profiles
+        """
+        gitlab_ids = [int(job_id) for job_id in peaks if str(job_id).isdigit()]
+        jobs = (
+            await db.scalars(
+                select(Job).where(Job.gitlab_job_id.in_(gitlab_ids), Job.name.is_not(None))
+            )
+        ).all()
+        profiles = await self._load(db, {(job.project_id, job.name) for job in jobs})
+
+        now = datetime.utcnow()
+        for job in jobs:
+            key = (job.project_id, job.name)
+            profile = profiles.get(key)
+            if profile is None:
+                profile = profiles[key] = JobResourceProfile(
+                    project_id=job.project_id, job_name=job.name, samples=0
+                )
+                db.add(profile)
+            peak = peaks[str(job.gitlab_job_id)]
+            memory = UsageHistogram.decode(MEMORY_BASE, profile.memory_histogram)
+            memory.add(peak.memory)
+            profile.memory_histogram = memory.encode()
+            # Jobs read only once have no CPU rate
+            if peak.cpu is not None:
+                cpu = UsageHistogram.decode(CPU_BASE, profile.cpu_histogram)
+                cpu.add(peak.cpu)
+                profile.cpu_histogram = cpu.encode()
+            profile.samples = (profile.samples or 0) + 1
+            profile.updated_at = now
+        if jobs:
+            # New profiles must be visible to the next record in this session
+            await db.flush()
+            logger.debug(f"Recorded resource usage of {len(jobs)} finished job(s)")
+
+    async def recommend(
+        self, db: AsyncSession, keys: Iterable[Tuple[int, Optional[str]]]
+    ) -> Dict[ProfileKey, ResourceRequest]:
+        """
+        Sizes for the (project id, job name) pairs with enough history
+        """
+        if not self.enabled:
+            return {}
+        profiles = await self._load(db, {key for key in keys if key[0] and key[1]})
+        sizes = {}
+        for key, profile in profiles.items():
+            if (profile.samples or 0) < self.min_samples:
+                continue
+            memory = UsageHistogram.decode(MEMORY_BASE, profile.memory_histogram).percentile(
+                self.percentile
+            )
+            cpu = UsageHistogram.decode(CPU_BASE, profile.cpu_histogram).percentile(self.percentile)
+            if memory is None or cpu is None:
+                continue
+            sizes[key] = ResourceRequest(
+                cpu=round(min(max(cpu * (1 + self.headroom), MIN_CPU), self.max_size.cpu), 2),
+                # Whole MiB
+                memory=min(
+                    max(math.ceil(memory * (1 + self.headroom) / MIB) * MIB, MIN_MEMORY),
+                    self.max_size.memory,
+                ),
+            )
+        return sizes
+
+    @staticmethod
+    async def _load(
+        db: AsyncSession, keys: Iterable[ProfileKey]
+    ) -> Dict[ProfileKey, JobResourceProfile]:
+        keys = set(keys)
+        if not keys:
+            return {}
+        rows = await db.scalars(
+            select(JobResourceProfile).where(
+                JobResourceProfile.project_id.in_({project_id for project_id, _ in keys}),
+                JobResourceProfile.job_name.in_({name for _, name in keys}),
+            )
+        )
+        return {
+            (row.project_id, row.job_name): row
+            for row in rows
+            if (row.project_id, row.job_name) in keys
+        }
@@ -0,0 +1,227 @@
+"""
+Warm runner pools - keeps pre-registered runners ready per runner class
+"""
+
+import json
+import logging
+import math
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Job, Runner
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RUNNER_TAGS = ("docker", "autogit")
+
+
+def split_tags(tags: Optional[str]) -> FrozenSet[str]:
+    return frozenset(t for t in (tags or "").split(",") if t)
+
+
+def join_tags(tags: Iterable[str]) -> str:
+    return ",".join(sorted(tags))
+
+
+@dataclass(frozen=True)
+class PoolClass:
+    """The kind of runner a job needs: architecture, GPU vendor and tags."""
+
+    architecture: str = "amd64"
+    gpu_vendor: Optional[str] = None
+    tags: FrozenSet[str] = frozenset(DEFAULT_RUNNER_TAGS)
+
+    @property
+    def key(self) -> str:
+        return f"{self.architecture}/{self.gpu_vendor or 'cpu'}/{join_tags(self.tags)}"
+
+    def serves(self, job_class: "PoolClass") -> bool:
+        """
+        A runner can pick up a job when the platform matches and the runner
+        carries every tag the job asks for
+        """
+        return (
+            self.architecture == job_class.architecture
+            and self.gpu_vendor == job_class.gpu_vendor
+            and job_class.tags <= self.tags
+        )
+
+    @classmethod
+    def from_runner(cls, runner: Runner) -> "PoolClass":
+        return cls(
+            architecture=runner.architecture,
+            gpu_vendor=runner.gpu_vendor or ("nvidia" if runner.gpu_enabled else None),
+            tags=split_tags(runner.tags) or frozenset(DEFAULT_RUNNER_TAGS),
+        )
+
+    @classmethod
+    def from_job_columns(cls, architecture: str, gpu_req: bool, tags: Optional[str]):
+        return cls(
+            architecture=architecture or "amd64",
+            gpu_vendor="nvidia" if gpu_req else None,
+            tags=split_tags(tags),
+        )
+
+    @classmethod
+    def from_gitlab_job(cls, job: Dict) -> "PoolClass":
+        return cls(tags=frozenset(job.get("tag_list") or ()))
+
+
+@dataclass
+class PoolSpec:
+    """Size bounds for one warm pool."""
+
+    pool_class: PoolClass
+    min_size: int = 0
+    max_size: int = 0
+
+
+def load_pool_specs(default_min: int = 0, default_max: Optional[int] = None) -> List[PoolSpec]:
+    """
+    Load pool specs from WARM_POOLS, a JSON list such as
+    ``[{"architecture": "arm64", "gpu_vendor": null, "tags": ["docker"],
+    "min": 1, "max": 4}]``. Without it, a single amd64 CPU pool is used whose
+    floor is MAX_IDLE_RUNNERS.
+    """
+    raw = os.getenv("WARM_POOLS")
+    if not raw:
+        max_size = default_max if default_max is not None else max(default_min, 4)
+        return [PoolSpec(PoolClass(), min_size=default_min, max_size=max_size)]
+
+    specs = []
+    for entry in json.loads(raw):
+        pool_class = PoolClass(
+            architecture=entry.get("architecture", "amd64"),
+            gpu_vendor=entry.get("gpu_vendor"),
+            tags=frozenset(entry.get("tags") or DEFAULT_RUNNER_TAGS),
+        )
+        min_size = int(entry.get("min", 0))
+        specs.append(PoolSpec(pool_class, min_size, max(min_size, int(entry.get("max", 0)))))
+    return specs
+
+
+class ArrivalForecaster:
+    """
+    Forecasts job arrivals per job class from the ``jobs`` history table.
+
+    Combines an EWMA over recent fixed-size buckets with the historical
+    average for the same hour of day, taking whichever is higher so the pools
+    ramp up both for a burst in progress and ahead of a recurring daily peak.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: Optional[int] = None,
+        alpha: float = 0.3,
+        history_days: int = 7,
+    ):
+        self.bucket_seconds = bucket_seconds or int(os.getenv("WARM_POOL_INTERVAL_SECONDS", "60"))
+        self.alpha = alpha
+        self.history_days = history_days
+        self._ewma: Dict[PoolClass, float] = defaultdict(float)
+        self._last_observed: Optional[datetime] = None
+        self._time_of_day: Dict[Tuple[PoolClass, int], float] = {}
+        self._time_of_day_refreshed: Optional[datetime] = None
+
+    async def observe(self, db: AsyncSession, now: Optional[datetime] = None):
+        """
+        Fold the jobs that arrived since the last observation into the EWMA
+        """
+        now = now or datetime.utcnow()
+        since = self._last_observed or now - timedelta(seconds=self.bucket_seconds)
+        buckets = max(1, int((now - since).total_seconds() // self.bucket_seconds))
+
+        rows = await db.execute(
+            select(Job.architecture_req, Job.gpu_req, Job.tags, func.count(Job.id))
+            .where(Job.created_at > since, Job.created_at <= now)
+            .group_by(Job.architecture_req, Job.gpu_req, Job.tags)
+        )
+        arrivals: Dict[PoolClass, float] = defaultdict(float)
+        for architecture, gpu_req, tags, count in rows:
+            arrivals[PoolClass.from_job_columns(architecture, gpu_req, tags)] += count
+
+        decay = (1 - self.alpha) ** buckets
+        for job_class in set(self._ewma) | set(arrivals):
+            per_bucket = arrivals.get(job_class, 0.0) / buckets
+            self._ewma[job_class] = decay * self._ewma[job_class] + (1 - decay) * per_bucket
+
+        self._last_observed = now
+        await self._refresh_time_of_day(db, now)
+
+    async def _refresh_time_of_day(self, db: AsyncSession, now: datetime):
+        """
+        Rebuild the per-hour arrival averages at most once an hour
+        """
+        if self._time_of_day_refreshed and now - self._time_of_day_refreshed < timedelta(hours=1):
+            return
+
+        counts: Dict[Tuple[PoolClass, int], int] = defaultdict(int)
+        rows = await db.stream(
+            select(Job.created_at, Job.architecture_req, Job.gpu_req, Job.tags)
+            .where(Job.created_at > now - timedelta(days=self.history_days))
+            .execution_options(yield_per=1000)
+        )
+        async for created_at, architecture, gpu_req, tags in rows:
+            job_class = PoolClass.from_job_columns(architecture, gpu_req, tags)
+            counts[(job_class, created_at.hour)] += 1
+
+        buckets_per_hour = 3600 / self.bucket_seconds
+        self._time_of_day = {
+            key: count / (self.history_days * buckets_per_hour) for key, count in counts.items()
+        }
+        self._time_of_day_refreshed = now
+
+    def forecast(self, job_class: PoolClass, now: Optional[datetime] = None) -> float:
+        """
+        Expected arrivals of ``job_class`` in the next bucket
+        """
+        hour = (now or datetime.utcnow()).hour
+        return max(self._ewma.get(job_class, 0.0), self._time_of_day.get((job_class, hour), 0.0))
+
+    def job_classes(self) -> List[PoolClass]:
+        return list(set(self._ewma) | {job_class for job_class, _ in self._time_of_day})
+
+
+class WarmPoolManager:
+    """
+    Maps job classes onto warm pools and computes each pool's target size.
+    """
+
+    def __init__(self, specs: List[PoolSpec], forecaster: ArrivalForecaster):
+        self.specs = specs
+        self.forecaster = forecaster
+
+    def pool_for(self, job_class: PoolClass) -> Optional[PoolSpec]:
+        """The first pool whose runners can run jobs of this class"""
+        for spec in self.specs:
+            if spec.pool_class.serves(job_class):
+                return spec
+        return None
+
+    def targets(self, now: Optional[datetime] = None) -> Dict[PoolClass, int]:
+        """
+        Target idle runners per pool: the forecast demand, clamped to min/max
+        """
+        demand: Dict[PoolClass, float] = defaultdict(float)
+        for job_class in self.forecaster.job_classes():
+            spec = self.pool_for(job_class)
+            if spec is not None:
+                demand[spec.pool_class] += self.forecaster.forecast(job_class, now)
+
+        return {
+            spec.pool_class: min(
+                spec.max_size,
+                # Rounding first stops a long-decayed EWMA from pinning a runner
+                max(spec.min_size, math.ceil(round(demand[spec.pool_class], 1))),
+            )
+            for spec in self.specs
+        }
+
+    def target_for(self, pool_class: PoolClass, now: Optional[datetime] = None) -> int:
+        return self.targets(now).get(pool_class, 0)
@@ -0,0 +1,119 @@
+"""
+Fair-share queue benchmark - simulated queue waits, then raw queue speed
+
+Simulates a fleet of runner slots while one project pushes a large matrix
+and a handful of others push small pipelines a little later. Each project's
+queue wait is reported under plain FIFO and under the fair-share queue:
+with fair share the small projects should wait about as long as it takes a
+slot to free up, instead of draining behind the whole matrix. Then times
+one ``take`` over a large queue.
+
+Usage (from services/runner-coordinator):
+    python -m benchmarks.bench_fair_queue [--slots 20] [--matrix 300] [--projects 8]
+"""
+
+import argparse
+import heapq
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from app.fair_queue import FairSharePolicy, FairShareQueue, QueuedJob
+
+TICK = 5.0
+
+
+def make_arrivals(matrix: int, projects: int):
+    """(arrival time, project, duration) of every job, matrix first"""
+    arrivals = [(0.0, 1, random.uniform(60, 180)) for _ in range(matrix)]
+    for project_id in range(2, projects + 2):
+        # A few small pipelines per project over the first ten minutes
+        for _ in range(3):
+            at = random.uniform(10, 600)
+            arrivals.extend((at, project_id, random.uniform(30, 120)) for _ in range(5))
+    return sorted(arrivals, key=lambda arrival: arrival[0])
+
+
+def simulate(arrivals, slots: int, fair: bool):
+    """Queue wait per project, dispatching every TICK seconds"""
+    queue = FairShareQueue(FairSharePolicy())
+    fifo = []
+    durations = {}
+    waits = defaultdict(list)
+    finishing = []  # (finish time, project)
+    running = defaultdict(int)
+    pending = list(enumerate(arrivals))
+    now = 0.0
+
+    while pending or len(queue) or fifo or finishing:
+        while finishing and finishing[0][0] <= now:
+            _, project_id = heapq.heappop(finishing)
+            running[project_id] -= 1
+        while pending and pending[0][1][0] <= now:
+            key, (at, project_id, duration) = pending.pop(0)
+            durations[key] = duration
+            job = QueuedJob(key, project_id, enqueued_at=at)
+            if fair:
+                queue.add(job)
+            else:
+                fifo.append(job)
+
+        free = slots - len(finishing)
+        if free > 0:
+            if fair:
+                started = queue.take(now, dict(running), limit=free)
+                queue.charge(started, now)
+            else:
+                started, fifo = fifo[:free], fifo[free:]
+            for job in started:
+                waits[job.project_id].append(now - job.enqueued_at)
+                running[job.project_id] += 1
+                heapq.heappush(finishing, (now + durations[job.key], job.project_id))
+        now += TICK
+    return waits, now
+
+
+def report(label: str, waits, makespan: float):
+    print(f"{label} (all jobs done after {makespan / 60:.1f} min)")
+    for project_id in sorted(waits):
+        samples = sorted(waits[project_id])
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(
+            f"  project {project_id:>2}: {len(samples):>3} jobs, "
+            f"median wait {statistics.median(samples):6.0f}s, p95 {p95:6.0f}s"
+        )
+
+
+def time_take(jobs: int, projects: int, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        queue = FairShareQueue(FairSharePolicy())
+        for key in range(jobs):
+            queue.add(QueuedJob(key, random.randrange(projects), random.randrange(4), key * 0.01))
+        started = time.perf_counter()
+        queue.take(jobs * 0.01, {}, limit=1000)
+        samples.append((time.perf_counter() - started) * 1000)
+    print(
+        f"take 1000 of {jobs} queued jobs over {projects} projects: "
+        f"median {statistics.median(samples):.2f} ms, max {max(samples):.2f} ms"
+    )
+
+
+def main(slots: int, matrix: int, projects: int, repeat: int):
+    random.seed(42)
+    arrivals = make_arrivals(matrix, projects)
+    print(f"{slots} runner slots, a {matrix}-job matrix in project 1, {projects} small projects")
+    report("FIFO", *simulate(arrivals, slots, fair=False))
+    report("Fair share", *simulate(arrivals, slots, fair=True))
+    time_take(10_000, 200, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate and benchmark the fair-share queue")
+    parser.add_argument("--slots", type=int, default=20)
+    parser.add_argument("--matrix", type=int, default=300)
+    parser.add_argument("--projects", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    main(args.slots, args.matrix, args.projects, args.repeat)
@@ -0,0 +1,103 @@
+"""
+GitLab transport benchmark - per-request connections vs the pooled session
+
+Starts a local stand-in for the GitLab API (HTTP/1.1 with keep-alive) and
+times a burst of small ``GET /api/v4/projects`` calls, first with a fresh
+connection per call as ``requests.get`` makes them, then through the shared
+keep-alive session, both from one thread and from a pool of worker threads
+as job discovery uses them.
+
+Usage (from services/runner-coordinator):
+    python -m benchmarks.bench_http_session [--calls 2000] [--threads 16] [--delay-ms 0]
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from autogit_gitlab.http_session import create_session
+
+BODY = json.dumps([{"id": i, "name": f"project-{i}"} for i in range(20)]).encode()
+
+
+class StandInGitLab(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body leave in one segment, as from a real server; split
+    # writes would stall on delayed ACKs and hide the difference
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    delay = 0.0
+
+    def do_GET(self):
+        if self.delay:
+            time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(get, url: str, calls: int, threads: int):
+    """(per-call latencies in ms, calls per second)"""
+    latencies = []
+
+    def call(_):
+        started = time.perf_counter()
+        response = get(url, headers={"PRIVATE-TOKEN": "token"}, timeout=10)
+        response.raise_for_status()
+        response.json()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    if threads == 1:
+        for i in range(calls):
+            call(i)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(call, range(calls)))
+    return latencies, calls / (time.perf_counter() - started)
+
+
+def report(label: str, latencies, throughput: float):
+    latencies.sort()
+    print(
+        f"  {label:<24} median {statistics.median(latencies):6.2f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)]:6.2f} ms, {throughput:7.0f} calls/s"
+    )
+
+
+def main(calls: int, threads: int, delay_ms: float):
+    StandInGitLab.delay = delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInGitLab)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/v4/projects"
+
+    session = create_session(pool_maxsize=threads)
+    try:
+        for workers in (1, threads):
+            print(f"{calls} calls from {workers} thread(s), {delay_ms:g} ms server time")
+            report("connection per call", *run(requests.get, url, calls, workers))
+            report("pooled session", *run(session.get, url, calls, workers))
+    finally:
+        session.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pooled GitLab session")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    main(args.calls, args.threads, args.delay_ms)
@@ -0,0 +1,161 @@
+"""
+Query benchmark - cost of the lifecycle loops' queries as the job history grows
+
+Fills a scratch SQLite database with completed jobs (plus a handful of queued
+and running ones, as in production), then times each hot query at several
+table sizes with and without the hot-path indexes. With the indexes the
+timings should stay flat up to 1M rows; without them they grow linearly.
+
+Usage (from services/runner-coordinator):
+    python -m benchmarks.bench_queries [--rows 1000000] [--repeat 20] [--explain]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app.database import create_engine_from_url, init_db
+from app.models import Job, Runner
+from sqlalchemy import func, insert, select, text
+
+BATCH = 50_000
+NOW = datetime(2026, 1, 5, 12, 0, 0)
+
+HOT_QUERIES = {
+    # ArrivalForecaster.observe
+    "arrivals in last bucket": select(
+        Job.architecture_req, Job.gpu_req, Job.tags, func.count(Job.id)
+    )
+    .where(Job.created_at > NOW - timedelta(minutes=1), Job.created_at <= NOW)
+    .group_by(Job.architecture_req, Job.gpu_req, Job.tags),
+    # RunnerManager cleanup
+    "idle runners past cooldown": select(Runner).where(
+        Runner.status == "idle", Runner.last_seen < NOW - timedelta(minutes=5)
+    ),
+}
+
+
+def job_rows(start: int, count: int):
+    for i in range(start, start + count):
+        # Roughly one job every 3 seconds going back in time
+        created_at = NOW - timedelta(seconds=3 * i + random.random())
+        if i < 20:
+            status, runner_id = "queued", None
+        elif i < 40:
+            status, runner_id = "running", f"runner-{i}"
+        else:
+            status, runner_id = random.choice(["completed", "failed"]), f"runner-{i % 500}"
+        yield {
+            "gitlab_job_id": i,
+            "project_id": i % 200,
+            "project_name": f"project-{i % 200}",
+            "status": status,
+            "runner_id": runner_id,
+            "architecture_req": random.choice(["amd64", "amd64", "amd64", "arm64"]),
+            "gpu_req": i % 50 == 0,
+            "tags": "docker",
+            "created_at": created_at,
+        }
+
+
+async def fill_jobs(engine, start: int, count: int):
+    for offset in range(start, start + count, BATCH):
+        rows = list(job_rows(offset, min(BATCH, start + count - offset)))
+        async with engine.begin() as conn:
+            await conn.execute(insert(Job), rows)
+
+
+async def fill_runners(engine, count: int = 200):
+    rows = [
+        {
+            "id": f"runner-{i}",
+            "name": f"runner-{i}",
+            "status": random.choice(["idle", "busy", "offline", "offline"]),
+            "architecture": random.choice(["amd64", "arm64"]),
+            "gpu_enabled": False,
+            "last_seen": NOW - timedelta(minutes=random.randint(0, 30)),
+        }
+        for i in range(count)
+    ]
+    async with engine.begin() as conn:
+        await conn.execute(insert(Runner), rows)
+
+
+async def set_indexes(engine, enabled: bool):
+    async with engine.begin() as conn:
+        for table in (Runner.__table__, Job.__table__):
+            for index in table.indexes:
+                if enabled:
+                    await conn.run_sync(lambda c, index=index: index.create(c, checkfirst=True))
+                else:
+                    await conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        await conn.execute(text("ANALYZE"))
+
+
+async def time_queries(engine, repeat: int):
+    timings = {}
+    async with engine.connect() as conn:
+        for name, query in HOT_QUERIES.items():
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                (await conn.execute(query)).all()
+                samples.append((time.perf_counter() - started) * 1000)
+            timings[name] = statistics.median(samples)
+    return timings
+
+
+async def explain(engine):
+    async with engine.connect() as conn:
+        for name, query in HOT_QUERIES.items():
+            compiled = query.compile(engine.sync_engine, compile_kwargs={"literal_binds": True})
+            plan = await conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+            print(f"  {name}: {' / '.join(row[-1] for row in plan)}")
+
+
+async def main(rows: int, repeat: int, show_plan: bool):
+    random.seed(42)
+    sizes = sorted({size for size in (10_000, 100_000, rows) if size <= rows})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine_from_url(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        await init_db(engine)
+        await fill_runners(engine)
+
+        filled = 0
+        header = f"{'query':<28}" + "".join(f"{'rows=' + str(size):>26}" for size in sizes)
+        results = {True: {}, False: {}}
+        for size in sizes:
+            await fill_jobs(engine, filled, size - filled)
+            filled = size
+            for indexed in (False, True):
+                await set_indexes(engine, indexed)
+                results[indexed][size] = await time_queries(engine, repeat)
+            if show_plan and size == sizes[-1]:
+                print(f"Query plans at {size} rows (indexed):")
+                await explain(engine)
+
+        await engine.dispose()
+
+    print(header)
+    for name in HOT_QUERIES:
+        cells = "".join(
+            f"{results[False][size][name]:>11.2f} -> {results[True][size][name]:>7.2f} ms  "
+            for size in sizes
+        )
+        print(f"{name:<28}{cells}")
+    print("(median, without -> with indexes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the coordinator's hot queries")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--explain", action="store_true", help="Print SQLite query plans")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat, args.explain))
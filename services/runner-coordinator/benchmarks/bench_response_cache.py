@@ -0,0 +1,108 @@
+"""
+GitLab polling benchmark - full downloads vs ETag revalidation
+
+Replays the reconciliation loop's reads (the project listing, then each
+project's pending jobs) against a stand-in GitLab that answers
+``If-None-Match`` with a 304, as GitLab does. Between polls a fraction of
+the projects gain or lose a pending job. Reports the response bytes sent
+with the cache disabled and enabled.
+
+Usage (from services/runner-coordinator):
+    python -m benchmarks.bench_response_cache [--projects 300] [--polls 30] [--churn 0.02]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+import httpx
+from app.gitlab_client import AsyncGitLabClient
+
+from autogit_gitlab.response_cache import ResponseCache
+
+
+class StandInGitLab:
+    def __init__(self, projects: int, seed: int = 7):
+        self.random = random.Random(seed)
+        self.projects = [
+            {"id": i, "name": f"project-{i}", "path_with_namespace": f"group/project-{i}"}
+            for i in range(1, projects + 1)
+        ]
+        self.jobs = {project["id"]: [] for project in self.projects}
+        self.bytes_sent = 0
+        self.requests = 0
+
+    def churn(self, fraction: float):
+        for project_id in self.random.sample(
+            list(self.jobs), max(1, int(len(self.jobs) * fraction))
+        ):
+            jobs = self.jobs[project_id]
+            if jobs and self.random.random() < 0.5:
+                jobs.pop()
+            else:
+                jobs.append({"id": self.random.randrange(10**9), "status": "pending"})
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        path = request.url.path
+        if path == "/api/v4/projects":
+            page = int(request.url.params.get("page", "1"))
+            items = self.projects[(page - 1) * 100 : page * 100]
+            next_page = str(page + 1) if page * 100 < len(self.projects) else ""
+        else:
+            items = self.jobs[int(path.split("/")[4])]
+            next_page = ""
+        body = json.dumps(items).encode()
+        etag = f'W/"{hashlib.md5(body).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        self.bytes_sent += len(body)
+        headers = {"ETag": etag, "X-Next-Page": next_page, "Content-Type": "application/json"}
+        return httpx.Response(200, content=body, headers=headers)
+
+
+async def poll(projects: int, polls: int, churn: float, cache_entries: int):
+    gitlab = StandInGitLab(projects)
+    client = AsyncGitLabClient(
+        "http://gitlab.example.com",
+        "token",
+        transport=httpx.MockTransport(gitlab.handle),
+        cache=ResponseCache(max_entries=cache_entries),
+    )
+    started = time.perf_counter()
+    for _ in range(polls):
+        listed = [project async for project in client.paginate("projects")]
+        await asyncio.gather(
+            *(
+                client._collect(client.iter_project_pending_jobs(project["id"]))
+                for project in listed
+            )
+        )
+        gitlab.churn(churn)
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+    return gitlab.bytes_sent, gitlab.requests, elapsed
+
+
+def main(projects: int, polls: int, churn: float):
+    print(f"{projects} projects, {polls} polls, {churn:.0%} of job lists change per poll")
+    baseline = None
+    for label, entries in (("no cache", 0), ("ETag cache", projects + 16)):
+        sent, requests, elapsed = asyncio.run(poll(projects, polls, churn, entries))
+        baseline = baseline or sent
+        print(
+            f"  {label:<12} {sent / 1024:9.1f} KiB sent over {requests} requests "
+            f"({sent / baseline:6.1%} of uncached), {elapsed:5.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the GitLab response cache")
+    parser.add_argument("--projects", type=int, default=300)
+    parser.add_argument("--polls", type=int, default=30)
+    parser.add_argument("--churn", type=float, default=0.02)
+    args = parser.parse_args()
+    main(args.projects, args.polls, args.churn)
@@ -0,0 +1,118 @@
+"""
+Scheduler benchmark - one scheduling pass over a large queue
+
+Builds a queue of mixed-size jobs, a fleet of idle runners of assorted sizes
+and a set of Docker hosts, then times ``schedule`` over the whole batch. A
+pass over 10k queued jobs and 1k idle runners should take milliseconds, and
+no host's memory may end up oversubscribed.
+
+Usage (from services/runner-coordinator):
+    python -m benchmarks.bench_scheduler [--jobs 10000] [--runners 1000] [--hosts 50]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from app.scheduler import HostCapacity, JobDemand, ResourceRequest, RunnerSlot, schedule
+
+GB = 1024**3
+
+# (cpu, memory GB, weight): mostly default-size jobs, some small and large ones
+SIZES = [(1, 2, 2), (2, 4, 3), (4, 6, 10), (4, 8, 3), (8, 16, 2), (16, 32, 1)]
+ARCHITECTURES = ["amd64", "amd64", "amd64", "arm64"]
+
+
+def random_size():
+    cpu, memory, _ = random.choices(SIZES, weights=[w for *_, w in SIZES])[0]
+    return ResourceRequest(float(cpu), memory * GB)
+
+
+def make_jobs(count: int):
+    return [
+        JobDemand(
+            key=i,
+            request=random_size(),
+            architecture=random.choice(ARCHITECTURES),
+            gpu_vendor="nvidia" if i % 50 == 0 else None,
+        )
+        for i in range(count)
+    ]
+
+
+def make_runners(count: int):
+    runners = []
+    for i in range(count):
+        size = random_size()
+        runners.append(
+            RunnerSlot(
+                key=f"runner-{i}",
+                cpu=size.cpu,
+                memory=size.memory,
+                architecture=random.choice(ARCHITECTURES),
+                gpu_enabled=i % 50 == 0,
+            )
+        )
+    return runners
+
+
+def make_hosts(count: int):
+    hosts = []
+    for i in range(count):
+        cpu, memory = random.choice([(32.0, 64), (64.0, 128), (128.0, 256)])
+        used = random.random() * 0.5
+        hosts.append(
+            HostCapacity(
+                host=f"host-{i}",
+                cpu=cpu,
+                memory=memory * GB,
+                free_cpu=cpu * (1 - used),
+                free_memory=int(memory * GB * (1 - used)),
+                architecture=random.choice(ARCHITECTURES),
+                gpu_vendors={"nvidia"} if i % 10 == 0 else set(),
+            )
+        )
+    return hosts
+
+
+def check_memory(jobs, hosts, plan):
+    placed = defaultdict(int)
+    sizes = {job.key: job.request for job in jobs}
+    for job_key, host in plan.spawns.items():
+        placed[host] += sizes[job_key].memory
+    for host in hosts:
+        assert placed[host.host] <= host.free_memory, f"{host.host} oversubscribed"
+
+
+def main(jobs: int, runners: int, hosts: int, repeat: int):
+    random.seed(42)
+    queue, fleet, capacity = make_jobs(jobs), make_runners(runners), make_hosts(hosts)
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        plan = schedule(queue, fleet, capacity)
+        samples.append((time.perf_counter() - started) * 1000)
+    check_memory(queue, capacity, plan)
+
+    print(f"{jobs} jobs, {runners} idle runners, {hosts} hosts")
+    print(
+        f"  {len(plan.assignments)} to idle runners, {len(plan.spawns)} new runners, "
+        f"{len(plan.waiting)} waiting, {len(plan.rejected)} rejected"
+    )
+    print(
+        f"  schedule: median {statistics.median(samples):.2f} ms, "
+        f"max {max(samples):.2f} ms over {repeat} passes"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark one scheduling pass")
+    parser.add_argument("--jobs", type=int, default=10_000)
+    parser.add_argument("--runners", type=int, default=1_000)
+    parser.add_argument("--hosts", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.jobs, args.runners, args.hosts, args.repeat)
@@ -6,6 +6,7 @@ This conftest.py provides shared fixtures and configuration for all tests.
 
 from __future__ import annotations
 
+import asyncio
 import sys
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -13,7 +14,7 @@ from typing import TYPE_CHECKING
 import pytest
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import AsyncGenerator
 
 # Add project root to path for imports
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -48,18 +49,13 @@ def test_data_dir(project_root: Path) -> Path:
 
 @pytest.fixture(scope="function")
 def in_memory_db():
-    """Create an in-memory SQLite database for testing."""
-    from sqlalchemy import create_engine
-    from sqlalchemy.orm import sessionmaker
+    """Create an in-memory async SQLite database for testing."""
+    from app.database import create_engine_from_url, create_session_factory
     from sqlalchemy.pool import StaticPool
 
-    engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+    engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
 
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    TestingSessionLocal = create_session_factory(engine)
 
     yield {"engine": engine, "session_factory": TestingSessionLocal}
 
@@ -90,20 +86,23 @@ def mock_gitlab_url() -> str:
 def test_client(in_memory_db):
     """Create a FastAPI test client with in-memory database."""
     # Import here to avoid circular imports
+    from app.database import init_db
     from app.main import app, get_db
     from app.models import Base
     from fastapi.testclient import TestClient
 
+    async def drop_db(engine):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
     # Create tables
-    Base.metadata.create_all(bind=in_memory_db["engine"])
+    asyncio.run(init_db(in_memory_db["engine"]))
 
     # Override the database dependency
-    def override_get_db() -> Generator:
-        db = in_memory_db["session_factory"]()
-        try:
+    async def override_get_db() -> AsyncGenerator:
+        async with in_memory_db["session_factory"]() as db:
             yield db
-        finally:
-            db.close()
 
     app.dependency_overrides[get_db] = override_get_db
 
@@ -111,7 +110,7 @@ def test_client(in_memory_db):
         yield client
 
     # Cleanup
-    Base.metadata.drop_all(bind=in_memory_db["engine"])
+    asyncio.run(drop_db(in_memory_db["engine"]))
     app.dependency_overrides.clear()
 
 
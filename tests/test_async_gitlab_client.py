@@ -0,0 +1,188 @@
+import asyncio
+import unittest
+
+import httpx
+from app.gitlab_client import AsyncGitLabClient, GitLabApiError
+
+from autogit_gitlab.rate_limit import CircuitBreaker, RetryPolicy
+from autogit_gitlab.response_cache import ResponseCache
+
+
+def client_for(handler, **kwargs):
+    kwargs.setdefault("retry", RetryPolicy(max_retries=2, backoff_base=0))
+    return AsyncGitLabClient(
+        "http://gitlab.example.com", "test-token", transport=httpx.MockTransport(handler), **kwargs
+    )
+
+
+def flaky(*statuses):
+    """A handler answering with ``statuses`` in turn, then 200"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        status = statuses[len(calls) - 1] if len(calls) <= len(statuses) else 200
+        headers = {"Retry-After": "0"} if status == 429 else {}
+        return httpx.Response(status, json={"id": 1, "message": "error"}, headers=headers)
+
+    return handler, calls
+
+
+class TestAsyncGitLabClient(unittest.IsolatedAsyncioTestCase):
+    async def test_error_responses_raise_gitlab_api_error(self):
+        client = client_for(lambda request: httpx.Response(404, json={"message": "Not found"}))
+
+        with self.assertRaises(GitLabApiError) as cm:
+            await client.delete_project(999)
+
+        self.assertEqual(cm.exception.status_code, 404)
+        self.assertEqual(cm.exception.message, "Not found")
+        self.assertEqual(cm.exception.endpoint, "projects/999")
+        # A runner that is already gone is not an error
+        self.assertFalse(await client.delete_runner(7))
+
+    async def test_transport_errors_are_wrapped(self):
+        def handler(request):
+            raise httpx.ConnectError("connection refused", request=request)
+
+        with self.assertRaises(GitLabApiError) as cm:
+            await client_for(handler).get_current_user()
+
+        self.assertEqual(cm.exception.status_code, 0)
+
+    async def test_throttled_calls_are_retried_for_any_method(self):
+        handler, calls = flaky(429)
+
+        group = await client_for(handler).create_group("infra", "infra")
+
+        self.assertEqual(group["id"], 1)
+        self.assertEqual(len(calls), 2)
+
+    async def test_server_errors_are_only_retried_when_idempotent(self):
+        handler, calls = flaky(503)
+        self.assertEqual((await client_for(handler).get_current_user())["id"], 1)
+        self.assertEqual(len(calls), 2)
+
+        handler, calls = flaky(503)
+        with self.assertRaises(GitLabApiError) as cm:
+            await client_for(handler).create_group("infra", "infra")
+        self.assertEqual(cm.exception.status_code, 503)
+        self.assertEqual(len(calls), 1)
+
+    async def test_retries_give_up_after_the_policy_limit(self):
+        handler, calls = flaky(502, 502, 502, 502)
+
+        with self.assertRaises(GitLabApiError) as cm:
+            await client_for(handler).get_current_user()
+
+        self.assertEqual(cm.exception.status_code, 502)
+        self.assertEqual(len(calls), 3)
+
+    async def test_open_circuit_stops_calling_gitlab(self):
+        handler, calls = flaky(*[500] * 10)
+        client = client_for(
+            handler,
+            retry=RetryPolicy(max_retries=0),
+            breaker=CircuitBreaker(threshold=2, cooldown=60),
+        )
+
+        for _ in range(2):
+            with self.assertRaises(GitLabApiError):
+                await client.get_current_user()
+        with self.assertRaises(GitLabApiError) as cm:
+            await client.get_current_user()
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cm.exception.status_code, 0)
+        self.assertGreater(cm.exception.retry_after, 0)
+
+    async def test_runners_are_created_with_form_data(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(201, json={"id": 5, "token": "glrt-abc"})
+
+        runner = await client_for(handler).create_runner("autogit-runner-1", ["docker", "amd64"])
+
+        self.assertEqual(runner["token"], "glrt-abc")
+        self.assertEqual(requests[0].url.path, "/api/v4/user/runners")
+        self.assertIn(b"tag_list=docker%2Camd64", requests[0].content)
+
+    async def test_runner_listing_follows_pagination(self):
+        def handler(request):
+            page = request.url.params.get("page", "1")
+            next_page = "2" if page == "1" else ""
+            return httpx.Response(200, json=[{"id": int(page)}], headers={"X-Next-Page": next_page})
+
+        runners = await client_for(handler).get_runners()
+
+        self.assertEqual([runner["id"] for runner in runners], [1, 2])
+
+    async def test_throttled_runner_deletes_wait_for_the_shared_limiter(self):
+        handler, calls = flaky(429)
+        client = client_for(handler)
+
+        self.assertTrue(await client.delete_runner(7))
+
+        self.assertEqual(len(calls), 2)
+        # The 429 paused the client's limiter for every other caller too
+        self.assertGreater(client.limiter._next, 0)
+
+    async def test_requests_in_flight_are_capped_per_host(self):
+        in_flight = peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json={"id": 1})
+
+        client = client_for(handler, max_per_host=3)
+        await asyncio.gather(*(client.get_current_user() for _ in range(20)))
+
+        self.assertEqual(peak, 3)
+
+    async def test_unchanged_listings_are_served_from_the_cache(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            page = int(request.url.params.get("page", "1"))
+            etag = f'W/"page-{page}"'
+            if request.headers.get("If-None-Match") == etag:
+                return httpx.Response(304, headers={"ETag": etag})
+            headers = {"ETag": etag, "X-Next-Page": "2" if page == 1 else ""}
+            return httpx.Response(200, json=[{"id": page}], headers=headers)
+
+        client = client_for(handler, cache=ResponseCache(max_entries=10))
+        first = await client.get_groups()
+        second = await client.get_groups()
+
+        self.assertEqual(first, second)
+        self.assertEqual(second, [{"id": 1}, {"id": 2}])
+        self.assertEqual(
+            [r.headers.get("If-None-Match") for r in requests[2:]], ['W/"page-1"', 'W/"page-2"']
+        )
+
+    async def test_iterators_fetch_pages_on_demand(self):
+        pages = []
+
+        def handler(request):
+            page = int(request.url.params.get("page", "1"))
+            pages.append(page)
+            headers = {"X-Next-Page": str(page + 1)} if page < 3 else {}
+            return httpx.Response(200, json=[{"id": page}], headers=headers)
+
+        client = client_for(handler)
+        runners = client.iter_runner_jobs(5, status="running")
+        self.assertEqual(await runners.__anext__(), {"id": 1})
+        self.assertEqual(pages, [1])
+        self.assertEqual([job["id"] async for job in runners], [2, 3])
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from app.docker_events import DockerEventMonitor
+
+
+class FakeStream:
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def close(self):
+        self.closed = True
+
+
+class TestDockerEventMonitor(unittest.TestCase):
+    def test_parse_event(self):
+        event = DockerEventMonitor.parse_event(
+            {
+                "Type": "container",
+                "Action": "die",
+                "Actor": {
+                    "ID": "abc",
+                    "Attributes": {"name": "autogit-runner-x", "exitCode": "137"},
+                },
+            }
+        )
+        self.assertEqual(event.container_id, "abc")
+        self.assertEqual(event.exit_code, 137)
+        self.assertTrue(event.is_down)
+
+        self.assertIsNone(
+            DockerEventMonitor.parse_event({"Type": "container", "Action": "exec_start"})
+        )
+        self.assertFalse(
+            DockerEventMonitor.parse_event(
+                {
+                    "Type": "container",
+                    "Action": "health_status: healthy",
+                    "Actor": {"ID": "a", "Attributes": {"autogit-managed": "true", "name": "r"}},
+                }
+            ).is_down
+        )
+
+    def test_parse_event_matches_runners_by_label_or_name(self):
+        def die(attributes):
+            return DockerEventMonitor.parse_event(
+                {
+                    "Type": "container",
+                    "Action": "die",
+                    "Actor": {"ID": "a", "Attributes": attributes},
+                }
+            )
+
+        self.assertIsNotNone(die({"autogit-managed": "true", "name": "renamed"}))
+        # Runners from before the labels existed are known only by name
+        self.assertIsNotNone(die({"name": "autogit-runner-legacy"}))
+        self.assertIsNone(die({"name": "runner-abc-project-1-concurrent-0"}))
+
+    def test_run_reconciles_then_streams_events(self):
+        stream = FakeStream(
+            [
+                {"Type": "container", "Action": "exec_create", "Actor": {"ID": "abc"}},
+                {
+                    "Type": "container",
+                    "Action": "oom",
+                    "Actor": {"ID": "abc", "Attributes": {"name": "autogit-runner-x"}},
+                },
+            ]
+        )
+        driver = MagicMock()
+        driver.get_runner_statuses.return_value = {"abc": "running"}
+        driver.client.events.return_value = stream
+
+        snapshots, events = [], []
+
+        async def on_snapshot(statuses):
+            snapshots.append(statuses)
+
+        async def on_event(event):
+            events.append(event)
+
+        async def scenario():
+            monitor = DockerEventMonitor(driver, reconnect_delay=60)
+            task = asyncio.create_task(monitor.run(on_snapshot, on_event))
+            for _ in range(100):
+                if stream.closed:
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+
+        self.assertEqual(snapshots, [{"abc": "running"}])
+        self.assertEqual([event.action for event in events], ["oom"])
+        self.assertTrue(stream.closed)
+        filters = driver.client.events.call_args.kwargs["filters"]
+        self.assertEqual(filters, {"type": "container"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+from unittest.mock import MagicMock
+
+import docker
+from app.driver import CPU_LABEL, MEMORY_LABEL, DockerDriver
+from app.driver_pool import DriverPool, HostSpec, NoHostAvailable, load_host_specs
+
+GB = 1024**3
+
+
+def fake_host(ncpu=8, memory=16 * GB, machine="x86_64", runtimes=None, containers=()):
+    driver = MagicMock()
+    driver.client.info.return_value = {
+        "Architecture": machine,
+        "NCPU": ncpu,
+        "MemTotal": memory,
+        "Runtimes": runtimes or {"runc": {}},
+    }
+    driver.client.containers.list.return_value = list(containers)
+    driver.client.containers.get.side_effect = docker.errors.NotFound("no such container")
+    driver.inventory.side_effect = lambda: DockerDriver.inventory(driver)
+    return driver
+
+
+def running(id, name, cpu, memory):
+    return MagicMock(
+        id=id,
+        attrs={
+            "Names": [f"/{name}"],
+            "State": "running",
+            "Labels": {CPU_LABEL: str(cpu), MEMORY_LABEL: str(memory)},
+        },
+    )
+
+
+def pool(drivers, policy="least_loaded", specs=None):
+    specs = specs or [HostSpec(name=name, url=f"tcp://{name}:2376") for name in drivers]
+    return DriverPool(specs, policy=policy, connect=lambda spec: drivers[spec.name])
+
+
+class TestHostSpecs(unittest.TestCase):
+    def test_comma_separated_and_json_forms(self):
+        self.assertEqual(
+            [s.name for s in load_host_specs("tcp://a:2376, ssh://ci@b")],
+            ["tcp://a:2376", "ssh://ci@b"],
+        )
+        (spec,) = load_host_specs(
+            '[{"name": "gpu1", "url": "tcp://gpu1:2376", "gpu_vendors": ["nvidia"],'
+            ' "tls": {"ca_cert": "/certs/ca.pem"}}]'
+        )
+        self.assertEqual((spec.name, spec.gpu_vendors), ("gpu1", ["nvidia"]))
+        self.assertEqual(spec.tls, {"ca_cert": "/certs/ca.pem"})
+
+
+class TestPlacement(unittest.TestCase):
+    def setUp(self):
+        # a: half full, b: empty, both 8 cores
+        self.drivers = {
+            "a": fake_host(containers=[running("c1", "r1", 2, 4 * GB), running("c2", "r2", 2, GB)]),
+            "b": fake_host(),
+        }
+
+    def test_policies_choose_differently(self):
+        self.assertEqual(pool(self.drivers, "least_loaded").place("new", cpu=2, memory="2g"), "b")
+        self.assertEqual(pool(self.drivers, "spread").place("new", cpu=2, memory="2g"), "b")
+        self.assertEqual(pool(self.drivers, "bin_pack").place("new", cpu=2, memory="2g"), "a")
+
+    def test_reservations_count_until_the_container_is_seen(self):
+        drivers = pool(self.drivers, "bin_pack")
+        self.assertEqual(drivers.place("r3", cpu=4, memory="1g"), "a")
+        # a has no CPU left for another four
+        self.assertEqual(drivers.place("r4", cpu=4, memory="1g"), "b")
+
+        self.drivers["a"].client.containers.list.return_value.append(running("c3", "r3", 4, GB))
+        drivers.refresh()
+        self.assertEqual(drivers.hosts["a"].reservations, {})
+        self.assertEqual(drivers.hosts["a"].free_cpu, 0)
+
+    def test_architecture_gpu_and_capacity_are_constraints(self):
+        self.drivers["c"] = fake_host(machine="aarch64")
+        self.drivers["d"] = fake_host(runtimes={"nvidia": {}})
+        drivers = pool(self.drivers)
+
+        self.assertEqual(drivers.place("arm", architecture="arm64"), "c")
+        self.assertEqual(drivers.place("gpu", gpu_vendor="nvidia"), "d")
+        with self.assertRaises(NoHostAvailable):
+            drivers.place("huge", cpu=16)
+
+    def test_released_placements_free_their_reservation(self):
+        drivers = pool(self.drivers)
+        host = drivers.place("r3", cpu=8)
+        drivers.release("r3")
+        self.assertEqual(drivers.hosts[host].reservations, {})
+        self.assertEqual(drivers.place("r4", cpu=8), host)
+
+
+class TestHealth(unittest.TestCase):
+    def test_failed_hosts_are_excluded_until_they_recover(self):
+        drivers = {"a": fake_host(), "b": fake_host(ncpu=4)}
+        drivers["a"].client.info.side_effect = ConnectionError("refused")
+        pool_ = pool(drivers)
+
+        self.assertEqual(pool_.unavailable_hosts(), {"a"})
+        self.assertEqual(pool_.place("r1", cpu=2), "b")
+
+        drivers["a"].client.info.side_effect = None
+        pool_.refresh()
+        self.assertEqual(pool_.unavailable_hosts(), set())
+        self.assertEqual(pool_.place("r2", cpu=2), "a")
+
+    def test_listing_failure_marks_the_host_and_keeps_the_rest(self):
+        drivers = {"a": fake_host(), "b": fake_host()}
+        drivers["a"].get_runner_statuses.return_value = {"c1": "running"}
+        drivers["b"].get_runner_statuses.side_effect = ConnectionError("timed out")
+        pool_ = pool(drivers)
+
+        self.assertEqual(pool_.get_runner_statuses(), {"c1": "running"})
+        self.assertEqual(pool_.unavailable_hosts(), {"b"})
+
+
+class TestRouting(unittest.TestCase):
+    def test_calls_go_to_the_host_of_the_container(self):
+        drivers = {"a": fake_host(), "b": fake_host()}
+        pool_ = pool(drivers, "bin_pack")
+        drivers["b"].create_runner_container.return_value = {
+            "id": "cb",
+            "network": "autogit-network",
+        }
+        pool_.hosts["a"].allocated_cpu = 7
+
+        created = pool_.create_runner_container(name="r1", cpu_limit=2.0, mem_limit="1g")
+        pool_.start_runner_container(created["id"], network=created["network"])
+        pool_.stop_runner("cb")
+
+        drivers["b"].start_runner_container.assert_called_once_with("cb", network="autogit-network")
+        drivers["b"].stop_runner.assert_called_once_with("cb", remove=True)
+        drivers["a"].start_runner_container.assert_not_called()
+
+    def test_unknown_containers_are_looked_up_on_each_host(self):
+        drivers = {"a": fake_host(), "b": fake_host()}
+        drivers["b"].client.containers.get.side_effect = None
+        drivers["b"].get_runner_status.return_value = "running"
+        pool_ = pool(drivers)
+
+        self.assertEqual(pool_.get_runner_status("elsewhere"), "running")
+        self.assertIs(pool_.driver_for("elsewhere"), drivers["b"])
+        drivers["b"].client.containers.get.side_effect = docker.errors.NotFound("gone")
+        self.assertEqual(pool_.get_runner_status("missing"), "not_found")
+
+
+if __name__ == "__main__":
+    unittest.main()
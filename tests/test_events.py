@@ -0,0 +1,51 @@
+import asyncio
+import unittest
+
+from app.events import JobEvent, JobEventBus, next_event
+
+
+class TestJobEventBus(unittest.TestCase):
+    def test_publish_fans_out_to_every_subscriber(self):
+        async def scenario():
+            bus = JobEventBus()
+            first, second = bus.subscribe(), bus.subscribe()
+            bus.publish(JobEvent(job_id=7, project_id=1, project_name="demo"))
+            return await first.get(), await second.get()
+
+        first_event, second_event = asyncio.run(scenario())
+        self.assertEqual(first_event.job_id, 7)
+        self.assertIs(first_event, second_event)
+
+    def test_full_subscriber_drops_instead_of_blocking(self):
+        async def scenario():
+            bus = JobEventBus(maxsize=1)
+            queue = bus.subscribe()
+            bus.publish(JobEvent(job_id=1, project_id=1, project_name="demo"))
+            bus.publish(JobEvent(job_id=2, project_id=1, project_name="demo"))
+            return queue.qsize(), (await queue.get()).job_id
+
+        size, job_id = asyncio.run(scenario())
+        self.assertEqual(size, 1)
+        self.assertEqual(job_id, 1)
+
+    def test_next_event_times_out(self):
+        async def scenario():
+            return await next_event(JobEventBus().subscribe(), timeout=0.01)
+
+        self.assertIsNone(asyncio.run(scenario()))
+
+    def test_event_matches_gitlab_job_shape(self):
+        event = JobEvent(
+            job_id=42, project_id=3, project_name="demo", status="pending", tags=["docker"]
+        )
+        job = event.as_gitlab_job()
+        self.assertTrue(event.is_pending)
+        self.assertEqual(job["id"], 42)
+        self.assertEqual(job["tag_list"], ["docker"])
+        self.assertFalse(
+            JobEvent(job_id=1, project_id=1, project_name="x", status="success").is_pending
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
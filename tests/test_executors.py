@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import unittest
+
+from app.executors import AsyncDriver, BoundedExecutor
+
+
+class FakeDriver:
+    network = "autogit-network"
+
+    def __init__(self):
+        self.threads = []
+
+    def spawn_runner(self, name):
+        self.threads.append(threading.current_thread().name)
+        return {"id": name}
+
+
+class TestBoundedExecutor(unittest.TestCase):
+    def test_tracks_queue_depth_and_saturation(self):
+        executor = BoundedExecutor("test", max_workers=2)
+        release = threading.Event()
+        observed = {}
+
+        async def scenario():
+            tasks = [asyncio.create_task(executor.run(release.wait, 5)) for _ in range(3)]
+            for _ in range(100):
+                if executor.stats()["active"] == 2:
+                    break
+                await asyncio.sleep(0.01)
+            observed.update(executor.stats())
+            release.set()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(scenario())
+        executor.shutdown(wait=True)
+
+        self.assertEqual(observed["active"], 2)
+        self.assertEqual(observed["queued"], 1)
+        self.assertEqual(observed["saturation"], 1.0)
+        stats = executor.stats()
+        self.assertEqual((stats["active"], stats["queued"], stats["completed"]), (0, 0, 3))
+
+    def test_cancelled_queued_call_leaves_the_queue(self):
+        executor = BoundedExecutor("test", max_workers=1)
+        release = threading.Event()
+
+        async def scenario():
+            busy = asyncio.create_task(executor.run(release.wait, 5))
+            queued = asyncio.create_task(executor.run(release.wait, 5))
+            for _ in range(100):
+                if executor.stats()["queued"] == 1:
+                    break
+                await asyncio.sleep(0.01)
+            queued.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await queued
+            release.set()
+            await busy
+
+        asyncio.run(scenario())
+        executor.shutdown(wait=True)
+
+        stats = executor.stats()
+        self.assertEqual((stats["active"], stats["queued"], stats["completed"]), (0, 0, 1))
+
+    def test_failures_are_counted_and_raised(self):
+        executor = BoundedExecutor("test", max_workers=1)
+
+        def boom():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(executor.run(boom))
+        self.assertEqual(executor.stats()["failed"], 1)
+        executor.shutdown(wait=True)
+
+
+class TestAsyncDriver(unittest.TestCase):
+    def test_methods_run_on_the_pool(self):
+        driver = FakeDriver()
+        async_driver = AsyncDriver(driver, BoundedExecutor("docker", max_workers=1))
+
+        result = asyncio.run(async_driver.spawn_runner(name="runner-1"))
+
+        self.assertEqual(result, {"id": "runner-1"})
+        self.assertTrue(driver.threads[0].startswith("docker"))
+        self.assertEqual(async_driver.network, "autogit-network")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+from unittest.mock import MagicMock
+
+from app.database import create_engine_from_url, create_session_factory, init_db
+from app.fair_queue import (
+    PRIORITY_CLASSES,
+    FairSharePolicy,
+    FairShareQueue,
+    ProjectShare,
+    QueuedJob,
+    job_priority,
+)
+from app.runner_manager import RunnerManager
+from app.scheduler import HostCapacity
+from sqlalchemy.pool import StaticPool
+
+GB = 1024**3
+NOW = 10_000.0
+
+
+def queue_of(*jobs, **policy):
+    queue = FairShareQueue(FairSharePolicy(**policy))
+    for job in jobs:
+        queue.add(job)
+    return queue
+
+
+def matrix(project_id, count, start=0, priority=1, enqueued_at=NOW):
+    return [
+        QueuedJob(f"{project_id}-{i}", project_id, priority, enqueued_at + i)
+        for i in range(start, start + count)
+    ]
+
+
+class TestJobPriority(unittest.TestCase):
+    def test_tags_then_release_then_protected_refs(self):
+        refs = {"main"}
+        self.assertEqual(job_priority("feature", False, [], refs), PRIORITY_CLASSES["normal"])
+        self.assertEqual(job_priority("main", False, [], refs), PRIORITY_CLASSES["protected"])
+        self.assertEqual(job_priority("v1.0", True, [], refs), PRIORITY_CLASSES["release"])
+        self.assertEqual(
+            job_priority("main", True, ["docker", "Priority:low"], refs), PRIORITY_CLASSES["low"]
+        )
+
+
+class TestFairShareQueue(unittest.TestCase):
+    def test_projects_take_turns(self):
+        # Project 1 queued a large matrix before project 2's two jobs
+        queue = queue_of(*matrix(1, 300), *matrix(2, 2, enqueued_at=NOW + 500))
+
+        taken = queue.take(NOW + 600, {}, limit=4)
+
+        self.assertEqual([job.project_id for job in taken], [1, 2, 1, 2])
+        self.assertEqual(len(queue), 298)
+
+    def test_weights_share_dispatches(self):
+        queue = queue_of(*matrix(1, 30), *matrix(2, 30), projects={1: ProjectShare(weight=2.0)})
+
+        taken = queue.take(NOW, {}, limit=30)
+
+        self.assertEqual(sum(job.project_id == 1 for job in taken), 20)
+
+    def test_higher_classes_first_and_aging(self):
+        low = QueuedJob("low", 1, PRIORITY_CLASSES["low"], NOW)
+        release = QueuedJob("release", 2, PRIORITY_CLASSES["release"], NOW + 100)
+        normal = QueuedJob("normal", 3, PRIORITY_CLASSES["normal"], NOW + 50)
+
+        fresh = queue_of(low, release, normal, aging_seconds=300)
+        self.assertEqual(
+            [job.key for job in fresh.take(NOW + 100, {})], ["release", "normal", "low"]
+        )
+        # Ten minutes on, the low job has aged two classes past the normal one
+        aged = queue_of(low, release, normal, aging_seconds=300)
+        self.assertEqual(
+            [job.key for job in aged.take(NOW + 601, {})], ["release", "low", "normal"]
+        )
+
+    def test_running_jobs_count_against_the_cap(self):
+        queue = queue_of(*matrix(1, 10), *matrix(2, 1), max_running=4)
+
+        taken = queue.take(NOW, {1: 3})
+
+        self.assertEqual(sorted(job.key for job in taken), ["1-0", "2-0"])
+
+    def test_requeued_jobs_keep_their_place(self):
+        queue = queue_of(*matrix(1, 3), *matrix(2, 3))
+        first = queue.take(NOW, {}, limit=2)
+        queue.charge(first[:1], NOW)
+        queue.requeue(first[1:])
+
+        # Project 1 was charged for its dispatched job, project 2 was not
+        self.assertEqual([job.key for job in queue.take(NOW, {}, limit=3)], ["2-0", "1-1", "2-1"])
+
+    def test_sync_drops_jobs_that_left_the_queue(self):
+        queue = queue_of(*matrix(1, 3))
+        queue.sync(matrix(1, 2, start=1) + matrix(2, 1))
+
+        self.assertEqual(sorted(job.key for job in queue.take(NOW, {})), ["1-1", "1-2", "2-0"])
+
+    def test_unconfigured_projects_are_not_remembered(self):
+        queue = queue_of(
+            *(job for project_id in range(1000) for job in matrix(project_id, 1)),
+            projects={7: ProjectShare(weight=2.0)},
+        )
+
+        queue.charge(queue.take(NOW, {}), NOW)
+
+        self.assertEqual(list(queue.policy.projects), [7])
+
+
+class TestFairShareDispatch(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+        await init_db(self.engine)
+        self.session_factory = create_session_factory(self.engine)
+        self.driver = MagicMock()
+        self.driver.host_capacities.return_value = [
+            HostCapacity("local", 64.0, 256 * GB, 64.0, 256 * GB)
+        ]
+        self.driver.place.side_effect = lambda name, host=None, **requirements: host or "local"
+        self.manager = RunnerManager(
+            session_factory=self.session_factory,
+            driver=self.driver,
+            gitlab_url="http://gitlab",
+            gitlab_token="token",
+            fair_share=FairSharePolicy(aging_seconds=0),
+        )
+        self.manager.pipeline.submit = MagicMock()
+        # Room for two runners
+        self.manager.max_runners = 2
+
+    async def asyncTearDown(self):
+        self.manager.executors.shutdown()
+        await self.engine.dispose()
+
+    async def test_a_late_project_is_not_starved(self):
+        self.manager.pending_jobs = {
+            i: {"id": i, "tag_list": ["docker"], "project": {"id": 1}} for i in range(20)
+        }
+        self.manager.pending_jobs[100] = {"id": 100, "tag_list": ["docker"], "project": {"id": 2}}
+
+        await self.manager.scale_to_demand()
+
+        served = {self.manager.pending_jobs[key]["project"]["id"] for key in self.manager._charged}
+        self.assertEqual(self.manager.pipeline.submit.call_count, 2)
+        self.assertEqual(served, {1, 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
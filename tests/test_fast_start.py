@@ -0,0 +1,105 @@
+import io
+import os
+import tarfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.database import create_engine_from_url, create_session_factory, init_db
+from app.driver import DockerDriver
+from app.models import Runner
+from app.runner_config import RUNNER_RUN_COMMAND, render_runner_config
+from app.runner_manager import RunnerManager
+from sqlalchemy import func, select
+from sqlalchemy.pool import StaticPool
+
+
+class TestRunnerConfig(unittest.TestCase):
+    def test_render_runner_config(self):
+        config = render_runner_config(
+            name="autogit-runner-abc",
+            gitlab_url="http://autogit-git-server:3000",
+            token='glrt-tok"en',
+            network_mode="autogit-network",
+            clone_url="http://autogit-git-server:3000",
+        )
+        self.assertIn('token = "glrt-tok\\"en"', config)
+        self.assertIn('network_mode = "autogit-network"', config)
+        self.assertIn('clone_url = "http://autogit-git-server:3000"', config)
+        self.assertIn('"/var/run/docker.sock:/var/run/docker.sock"', config)
+
+    def test_config_is_copied_into_the_container(self):
+        container = MagicMock()
+        DockerDriver._copy_runner_config(container, "concurrent = 1\n")
+
+        path, data = container.put_archive.call_args.args
+        self.assertEqual(path, "/etc/gitlab-runner")
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            self.assertEqual(tar.extractfile("config.toml").read(), b"concurrent = 1\n")
+
+
+class TestFastStartProvisioning(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+        await init_db(self.engine)
+        self.session_factory = create_session_factory(self.engine)
+        self.driver = MagicMock()
+        self.driver.host = "local"
+        self.driver.place.return_value = "local"
+        self.driver.get_network_name.return_value = "autogit-network"
+        self.driver.create_runner_container.return_value = {
+            "id": "container-1",
+            "name": "autogit-runner-x",
+            "network": "autogit-network",
+        }
+        self.driver.start_runner_container.return_value = {"ip_address": "10.0.0.5"}
+
+        with patch.dict(os.environ, {"RUNNER_FAST_START": "true"}):
+            self.manager = RunnerManager(
+                session_factory=self.session_factory,
+                driver=self.driver,
+                gitlab_url="http://gitlab",
+                gitlab_token="t",
+            )
+        self.manager.gitlab_client.create_runner = AsyncMock(
+            return_value={"id": 77, "token": "glrt-abc"}
+        )
+        self.manager.gitlab_client.delete_runner = AsyncMock(return_value=True)
+
+    async def asyncTearDown(self):
+        self.manager.executors.shutdown()
+        await self.engine.dispose()
+
+    async def test_runner_is_idle_after_one_container_start(self):
+        runner = await self.manager.spawn_runner(tags=["docker"])
+
+        self.assertIsNotNone(runner)
+        self.assertEqual(runner.status, "idle")
+        self.assertEqual(runner.gitlab_runner_id, 77)
+        self.assertEqual(runner.ip_address, "10.0.0.5")
+        async with self.session_factory() as db:
+            self.assertEqual((await db.get(Runner, "container-1")).status, "idle")
+
+        create_kwargs = self.driver.create_runner_container.call_args.kwargs
+        self.assertEqual(create_kwargs["command"], RUNNER_RUN_COMMAND)
+        self.assertIn('token = "glrt-abc"', create_kwargs["runner_config"])
+        # No exec-based registration or service start
+        self.driver.register_gitlab_runner.assert_not_called()
+        self.driver.client.containers.get.assert_not_called()
+
+    async def test_runner_calls_share_the_discovery_client(self):
+        # One rate limit, retry policy and circuit breaker for every GitLab call
+        self.assertIs(self.manager.job_discovery.client, self.manager.gitlab_client)
+        self.assertIs(self.manager.reconciler.gitlab_client, self.manager.gitlab_client)
+
+    async def test_gitlab_runner_is_deleted_when_container_creation_fails(self):
+        self.driver.create_runner_container.side_effect = RuntimeError("no such image")
+
+        self.assertIsNone(await self.manager.spawn_runner(tags=["docker"]))
+
+        self.manager.gitlab_client.delete_runner.assert_awaited_once_with(77)
+        async with self.session_factory() as db:
+            self.assertEqual(await db.scalar(select(func.count(Runner.id))), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
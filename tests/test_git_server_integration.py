@@ -24,7 +24,7 @@ class TestGitServerIntegration(unittest.TestCase):
         self.client = GitLabClient(base_url=self.base_url, token=self.token)
         self.project_name = f"test-project-{int(time.time())}"
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_repository_lifecycle(self, mock_request):
         """Test the full lifecycle: Create -> Protect -> Add Webhook -> Delete"""
 
@@ -93,7 +93,7 @@ class TestGitServerIntegration(unittest.TestCase):
         self.assertEqual(calls[3][0][0], "DELETE")  # Delete
         self.assertIn("projects/101", calls[3][0][1])
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_user_ssh_workflow(self, mock_request):
         """Test User SSH key management workflow"""
 
@@ -102,6 +102,8 @@ class TestGitServerIntegration(unittest.TestCase):
         mock_get_keys.status_code = 200
         mock_get_keys.content = b"[]"
         mock_get_keys.json.return_value = []
+        mock_get_keys.headers = {}
+        mock_get_keys.links = {}
 
         # 2. Mock Add Key
         mock_add_key = MagicMock()
@@ -1,26 +1,41 @@
 import os
 import sys
+import threading
 import unittest
 from unittest.mock import MagicMock, patch
 
-from gitlab_client import GitLabApiError, GitLabClient
+from app.gitlab_client import GitLabApiError as CoordinatorApiError
+from gitlab_client import GitLabApiError, GitLabClient, ResponseCache
+
+from autogit_gitlab.rate_limit import CircuitBreaker, RateLimiter
 
 # Add tools directory to path to import GitLabClient
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../tools")))
 
 
+def page(items, next_url=None, next_page=""):
+    response = MagicMock()
+    response.status_code = 200
+    response.content = b"[...]"
+    response.json.return_value = items
+    response.links = {"next": {"url": next_url}} if next_url else {}
+    response.headers = {"X-Next-Page": next_page}
+    return response
+
+
 class TestGitLabClient(unittest.TestCase):
     def setUp(self):
         self.token = "test-token"
         self.base_url = "http://gitlab.example.com"
         self.client = GitLabClient(base_url=self.base_url, token=self.token)
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_request_success(self, mock_request):
         # Mock successful response
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b'{"id": 1, "name": "test-project"}'
+        mock_response.headers = {}
         mock_response.json.return_value = {"id": 1, "name": "test-project"}
         mock_request.return_value = mock_response
 
@@ -36,11 +51,12 @@ class TestGitLabClient(unittest.TestCase):
             timeout=10,
         )
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_request_error(self, mock_request):
         # Mock error response
         mock_response = MagicMock()
         mock_response.status_code = 404
+        mock_response.headers = {}
         mock_response.text = "Not Found"
         mock_response.json.return_value = {"message": "Project not found"}
         mock_request.return_value = mock_response
@@ -49,25 +65,30 @@ class TestGitLabClient(unittest.TestCase):
             self.client._request("GET", "projects/999")
 
         self.assertEqual(cm.exception.status_code, 404)
+        # One exception type for the coordinator's and the tools' clients
+        self.assertIsInstance(cm.exception, CoordinatorApiError)
         self.assertIn("Project not found", cm.exception.message)
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_get_users(self, mock_request):
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b'[{"id": 1, "username": "admin"}]'
         mock_response.json.return_value = [{"id": 1, "username": "admin"}]
+        mock_response.headers = {}
+        mock_response.links = {}
         mock_request.return_value = mock_response
 
         result = self.client.get_users()
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]["username"], "admin")
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_create_project(self, mock_request):
         mock_response = MagicMock()
         mock_response.status_code = 201
         mock_response.content = b'{"id": 1, "name": "New Project"}'
+        mock_response.headers = {}
         mock_response.json.return_value = {"id": 1, "name": "New Project"}
         mock_request.return_value = mock_response
 
@@ -78,11 +99,12 @@ class TestGitLabClient(unittest.TestCase):
         args, kwargs = mock_request.call_args
         self.assertEqual(kwargs["json"]["path"], "new-project")
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_protect_branch(self, mock_request):
         mock_response = MagicMock()
         mock_response.status_code = 201
         mock_response.content = b'{"name": "main"}'
+        mock_response.headers = {}
         mock_response.json.return_value = {"name": "main"}
         mock_request.return_value = mock_response
 
@@ -93,10 +115,11 @@ class TestGitLabClient(unittest.TestCase):
         self.assertEqual(kwargs["json"]["name"], "main")
         self.assertEqual(kwargs["json"]["push_access_level"], 40)
 
-    @patch("requests.request")
+    @patch("requests.Session.request")
     def test_unprotect_branch_encoding(self, mock_request):
         mock_response = MagicMock()
         mock_response.status_code = 204
+        mock_response.headers = {}
         mock_response.content = b""
         mock_request.return_value = mock_response
 
@@ -106,6 +129,199 @@ class TestGitLabClient(unittest.TestCase):
         # Check if branch name was URL encoded
         self.assertIn("feature%2Ftest", args[1])
 
+    @patch("requests.Session.request")
+    def test_calls_share_one_pooled_session(self, mock_request):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = b"[]"
+        mock_response.json.return_value = []
+        mock_response.headers = {}
+        mock_response.links = {}
+        mock_request.return_value = mock_response
+
+        self.client.get_users()
+        self.client.get_groups()
+
+        self.assertEqual(mock_request.call_count, 2)
+        adapter = self.client.session.get_adapter(self.base_url)
+        # The coordinator's default: one connection per GitLab worker thread
+        self.assertEqual(adapter._pool_maxsize, 16)
+
+        shared = GitLabClient(base_url=self.base_url, token=self.token, session=self.client.session)
+        self.assertIs(shared.session, self.client.session)
+
+
+class TestPagination(unittest.TestCase):
+    def setUp(self):
+        self.client = GitLabClient(base_url="http://gitlab.example.com", token="test-token")
+
+    @patch("requests.Session.request")
+    def test_projects_follow_keyset_links_lazily(self, mock_request):
+        next_url = "http://gitlab.example.com/api/v4/projects?id_after=2&pagination=keyset"
+        mock_request.side_effect = [
+            page([{"id": 1}, {"id": 2}], next_url=next_url),
+            page([{"id": 3}]),
+        ]
+
+        projects = self.client.iter_projects()
+        self.assertEqual(next(projects), {"id": 1})
+        # Only the first page has been fetched so far
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual([project["id"] for project in projects], [2, 3])
+
+        first, second = mock_request.call_args_list
+        self.assertEqual(first.kwargs["params"]["pagination"], "keyset")
+        self.assertEqual(first.kwargs["params"]["per_page"], 100)
+        self.assertEqual(second.args[1], next_url)
+
+    @patch("requests.Session.request")
+    def test_offset_listings_follow_x_next_page(self, mock_request):
+        mock_request.side_effect = [
+            page([{"id": 1}], next_page="2"),
+            page([{"id": 2}], next_page="3"),
+            page([{"id": 3}]),
+        ]
+
+        groups = self.client.get_groups()
+
+        self.assertEqual([group["id"] for group in groups], [1, 2, 3])
+        self.assertEqual(mock_request.call_args.kwargs["params"]["page"], "3")
+        self.assertNotIn("pagination", mock_request.call_args.kwargs["params"])
+
+    @patch("requests.Session.request")
+    def test_prefetch_yields_the_same_items(self, mock_request):
+        mock_request.side_effect = [
+            page(
+                [{"id": i} for i in range(n * 3, n * 3 + 3)], next_page=str(n + 2) if n < 4 else ""
+            )
+            for n in range(5)
+        ]
+
+        users = list(self.client.iter_users(prefetch=True))
+
+        self.assertEqual([user["id"] for user in users], list(range(15)))
+        self.assertEqual(mock_request.call_count, 5)
+
+
+def status(code, headers=None):
+    response = MagicMock()
+    response.status_code = code
+    response.content = b'{"id": 1}'
+    response.json.return_value = {"id": 1, "message": "error"}
+    response.headers = headers or {}
+    return response
+
+
+class TestRetries(unittest.TestCase):
+    def setUp(self):
+        self.client = GitLabClient(
+            base_url="http://gitlab.example.com", token="test-token", max_retries=2, backoff_base=0
+        )
+
+    @patch("requests.Session.request")
+    def test_throttled_calls_wait_out_retry_after(self, mock_request):
+        mock_request.side_effect = [status(429, {"Retry-After": "0"}), status(201)]
+
+        self.assertEqual(self.client.create_group("infra", "infra")["id"], 1)
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual((self.client.throttled, self.client.retried), (1, 1))
+
+    @patch("requests.Session.request")
+    def test_server_errors_are_only_retried_when_idempotent(self, mock_request):
+        mock_request.side_effect = [status(503), status(200)]
+        self.assertEqual(self.client.get_current_user()["id"], 1)
+
+        mock_request.side_effect = [status(503), status(201)]
+        with self.assertRaises(GitLabApiError) as cm:
+            self.client.create_group("infra", "infra")
+        self.assertEqual(cm.exception.status_code, 503)
+        self.assertEqual(mock_request.call_count, 3)
+
+    @patch("requests.Session.request")
+    def test_repeated_failures_open_the_circuit(self, mock_request):
+        mock_request.return_value = status(500)
+
+        for _ in range(2):
+            with self.assertRaises(GitLabApiError):
+                self.client.get_current_user()
+        with self.assertRaises(GitLabApiError) as cm:
+            self.client.get_current_user()
+
+        # The fifth consecutive failure (threshold 5) opened it mid-retry
+        self.assertEqual(mock_request.call_count, 5)
+        self.assertEqual(cm.exception.status_code, 0)
+        self.assertGreater(cm.exception.retry_after, 0)
+
+    @patch("requests.Session.request")
+    def test_one_trial_call_goes_through_after_the_cooldown(self, mock_request):
+        now = [0.0]
+        client = GitLabClient(
+            base_url="http://gitlab.example.com",
+            token="test-token",
+            max_retries=0,
+            breaker=CircuitBreaker(threshold=1, cooldown=10, clock=lambda: now[0]),
+        )
+        mock_request.return_value = status(500)
+        with self.assertRaises(GitLabApiError):
+            client.get_current_user()
+
+        now[0] = 11
+        sent, release = threading.Event(), threading.Event()
+
+        def trial(*args, **kwargs):
+            sent.set()
+            release.wait(5)
+            return status(200)
+
+        mock_request.side_effect = trial
+        thread = threading.Thread(target=client.get_current_user)
+        thread.start()
+        sent.wait(5)
+
+        # Other threads fail fast while the trial is in flight
+        with self.assertRaises(GitLabApiError) as cm:
+            client.get_current_user()
+        self.assertEqual(cm.exception.status_code, 0)
+        release.set()
+        thread.join(5)
+
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual(client.breaker.state, "closed")
+
+    @patch("requests.Session.request")
+    def test_a_429_holds_back_every_caller(self, mock_request):
+        limiter = RateLimiter(per_minute=6000, clock=lambda: 0.0)
+        client = GitLabClient(
+            base_url="http://gitlab.example.com", token="test-token", max_retries=0, limiter=limiter
+        )
+        mock_request.return_value = status(429, {"Retry-After": "5"})
+
+        with self.assertRaises(GitLabApiError) as cm:
+            client.get_current_user()
+
+        self.assertEqual(cm.exception.retry_after, 5)
+        # The next call from any thread waits out the pause
+        self.assertGreaterEqual(limiter.reserve(), 5)
+
+
+class TestResponseCache(unittest.TestCase):
+    @patch("requests.Session.request")
+    def test_unchanged_responses_are_served_from_the_cache(self, mock_request):
+        fresh = page([{"id": 1}])
+        fresh.content = b'[{"id": 1}]'
+        fresh.headers = {"ETag": 'W/"abc"', "X-Request-Id": "1"}
+        not_modified = status(304, {"ETag": 'W/"abc"'})
+        mock_request.side_effect = [fresh, not_modified]
+        client = GitLabClient(
+            base_url="http://gitlab.example.com", token="test-token", cache=ResponseCache(10)
+        )
+
+        self.assertEqual(client.get_groups(), [{"id": 1}])
+        self.assertEqual(client.get_groups(), [{"id": 1}])
+
+        self.assertEqual(mock_request.call_args.kwargs["headers"]["If-None-Match"], 'W/"abc"')
+        self.assertEqual(client.cache.hits, 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch
+
+import httpx
+from app.gitlab_client import AsyncGitLabClient
+from app.job_discovery import PendingJobDiscovery
+
+from autogit_gitlab.http_session import create_session
+
+
+def gitlab(handler):
+    """A discovery whose client talks to ``handler`` instead of GitLab"""
+    requests = []
+
+    def record(request):
+        requests.append(request)
+        return handler(request)
+
+    client = AsyncGitLabClient(
+        "http://gitlab.example.com", "test-token", transport=httpx.MockTransport(record)
+    )
+    return PendingJobDiscovery("http://gitlab.example.com", "test-token", client=client), requests
+
+
+class TestPendingJobDiscovery(unittest.IsolatedAsyncioTestCase):
+    async def test_instance_source_follows_pagination(self):
+        def handler(request):
+            if request.url.params.get("page") == "2":
+                return httpx.Response(200, json=[{"id": 2}, {"id": 3}])
+            return httpx.Response(200, json=[{"id": 1}, {"id": 2}], headers={"X-Next-Page": "2"})
+
+        discovery, requests = gitlab(handler)
+        jobs = await discovery.fetch_pending_jobs()
+
+        self.assertEqual([job["id"] for job in jobs], [1, 2, 3])
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[0].url.path, "/api/v4/jobs")
+        self.assertEqual(requests[0].headers["PRIVATE-TOKEN"], "test-token")
+
+    async def test_falls_back_to_per_project_fanout(self):
+        def handler(request):
+            path = request.url.path
+            if path == "/api/v4/jobs":
+                return httpx.Response(403, json={"message": "403 Forbidden"})
+            if path == "/api/v4/projects":
+                return httpx.Response(200, json=[{"id": 10}, {"id": 20}])
+            project_id = int(path.split("/projects/")[1].split("/")[0])
+            return httpx.Response(200, json=[{"id": project_id + 1}])
+
+        discovery, requests = gitlab(handler)
+        jobs = await discovery.fetch_pending_jobs()
+
+        self.assertEqual(sorted(job["id"] for job in jobs), [11, 21])
+        self.assertFalse(discovery.instance_source_available)
+
+        # The unavailable instance source is not probed again until the
+        # probe interval elapses
+        requests.clear()
+        await discovery.fetch_pending_jobs()
+        self.assertNotIn("/api/v4/jobs", [request.url.path for request in requests])
+
+    async def test_projects_are_listed_by_keyset_cursor(self):
+        next_url = "http://gitlab.example.com/api/v4/projects?id_after=2&pagination=keyset"
+
+        def handler(request):
+            if "id_after" in request.url.params:
+                return httpx.Response(200, json=[{"id": 3}])
+            return httpx.Response(
+                200, json=[{"id": 1}, {"id": 2}], headers={"Link": f'<{next_url}>; rel="next"'}
+            )
+
+        discovery, requests = gitlab(handler)
+        projects = await discovery._get_projects()
+
+        self.assertEqual([project["id"] for project in projects], [1, 2, 3])
+        self.assertEqual(requests[0].url.params["pagination"], "keyset")
+        self.assertEqual(str(requests[1].url), next_url)
+
+
+class TestSharedSession(unittest.TestCase):
+    def test_pool_size_follows_the_environment(self):
+        with patch.dict("os.environ", {"GITLAB_HTTP_POOL_MAXSIZE": "32"}):
+            session = create_session()
+
+        self.assertEqual(session.get_adapter("https://gitlab.example.com")._pool_maxsize, 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
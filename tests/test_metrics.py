@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from app.executors import AsyncDriver, BoundedExecutor
+from app.metrics import endpoint_template, update_status_gauges
+from app.provisioning import ProvisioningPipeline, ProvisioningRequest
+from prometheus_client import REGISTRY
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics(unittest.TestCase):
+    def test_endpoint_template_strips_ids(self):
+        self.assertEqual(endpoint_template("projects/42/jobs"), "/projects/:id/jobs")
+        self.assertEqual(endpoint_template("/runners/7?x=1"), "/runners/:id")
+        self.assertEqual(endpoint_template("jobs"), "/jobs")
+
+    def test_stage_durations_are_recorded_with_outcome(self):
+        async def ok(request):
+            pass
+
+        async def broken(request):
+            raise RuntimeError("boom")
+
+        before_ok = sample("coordinator_provisioning_stage_seconds_count", stage="ok", outcome="ok")
+        before_err = sample(
+            "coordinator_provisioning_stage_seconds_count", stage="broken", outcome="error"
+        )
+        pipeline = ProvisioningPipeline([("ok", ok), ("broken", broken)])
+        asyncio.run(pipeline.run(ProvisioningRequest(name="r", tags=[])))
+
+        self.assertEqual(
+            sample("coordinator_provisioning_stage_seconds_count", stage="ok", outcome="ok"),
+            before_ok + 1,
+        )
+        self.assertEqual(
+            sample("coordinator_provisioning_stage_seconds_count", stage="broken", outcome="error"),
+            before_err + 1,
+        )
+
+    def test_driver_calls_are_timed_by_method(self):
+        driver = MagicMock()
+        driver.get_runner_status.return_value = "running"
+        executor = BoundedExecutor("docker-test", max_workers=1)
+        before = sample("coordinator_docker_api_seconds_count", operation="get_runner_status")
+
+        asyncio.run(AsyncDriver(driver, executor).get_runner_status("abc"))
+        executor.shutdown()
+
+        self.assertEqual(
+            sample("coordinator_docker_api_seconds_count", operation="get_runner_status"),
+            before + 1,
+        )
+
+    def test_status_gauges_drop_series_that_disappear(self):
+        status = {
+            "runners_by_architecture": {"amd64": {"idle": 2}, "arm64": {"busy": 1}},
+            "queued_jobs": 3,
+            "oldest_queued_job_age_seconds": 12.5,
+        }
+        update_status_gauges(status)
+        self.assertEqual(sample("coordinator_runners", status="idle", architecture="amd64"), 2)
+        self.assertEqual(sample("coordinator_queued_jobs"), 3)
+
+        update_status_gauges(
+            {
+                "runners_by_architecture": {"amd64": {"idle": 1}},
+                "queued_jobs": 0,
+                "oldest_queued_job_age_seconds": None,
+            }
+        )
+        self.assertIsNone(
+            REGISTRY.get_sample_value(
+                "coordinator_runners", {"status": "busy", "architecture": "arm64"}
+            )
+        )
+        self.assertEqual(sample("coordinator_oldest_queued_job_age_seconds"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
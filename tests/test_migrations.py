@@ -0,0 +1,69 @@
+import unittest
+
+from app.database import create_engine_from_url, init_db
+from app.migrations import MIGRATIONS, pending_migrations
+from sqlalchemy import inspect, text
+from sqlalchemy.pool import StaticPool
+
+# The runners/jobs tables as the first release created them
+LEGACY_SCHEMA = [
+    """CREATE TABLE runners (
+        id VARCHAR PRIMARY KEY, name VARCHAR NOT NULL, status VARCHAR,
+        architecture VARCHAR NOT NULL, gpu_enabled BOOLEAN, gpu_vendor VARCHAR,
+        container_id VARCHAR, ip_address VARCHAR, last_seen DATETIME, created_at DATETIME
+    )""",
+    """CREATE TABLE jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, gitlab_job_id INTEGER NOT NULL UNIQUE,
+        project_id INTEGER NOT NULL, project_name VARCHAR NOT NULL, status VARCHAR,
+        runner_id VARCHAR, architecture_req VARCHAR, gpu_req BOOLEAN,
+        created_at DATETIME, started_at DATETIME, finished_at DATETIME
+    )""",
+]
+
+
+class TestMigrations(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def inspect(self, fn):
+        async with self.engine.connect() as conn:
+            return await conn.run_sync(lambda sync_conn: fn(inspect(sync_conn)))
+
+    async def test_legacy_database_is_upgraded(self):
+        async with self.engine.begin() as conn:
+            for statement in LEGACY_SCHEMA:
+                await conn.execute(text(statement))
+            await conn.execute(
+                text(
+                    "INSERT INTO jobs (gitlab_job_id, project_id, project_name, status) "
+                    "VALUES (1, 1, 'demo', 'queued')"
+                )
+            )
+
+        self.assertEqual(len(await pending_migrations(self.engine)), len(MIGRATIONS))
+        applied = await init_db(self.engine)
+
+        self.assertEqual(applied, [version for version, _, _ in MIGRATIONS])
+        columns = await self.inspect(lambda i: {c["name"] for c in i.get_columns("runners")})
+        self.assertTrue({"tags", "gitlab_runner_id"} <= columns)
+        indexes = await self.inspect(lambda i: {x["name"] for x in i.get_indexes("jobs")})
+        self.assertIn("ix_jobs_status_created_at", indexes)
+        self.assertIn("ix_jobs_runner_id_status", indexes)
+        indexes = await self.inspect(lambda i: {x["name"] for x in i.get_indexes("runners")})
+        self.assertIn("ix_runners_status_architecture_gpu", indexes)
+
+        async with self.engine.connect() as conn:
+            self.assertEqual((await conn.execute(text("SELECT count(*) FROM jobs"))).scalar(), 1)
+
+    async def test_fresh_database_needs_no_second_pass(self):
+        await init_db(self.engine)
+
+        self.assertEqual(await init_db(self.engine), [])
+        self.assertEqual(await pending_migrations(self.engine), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,227 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from app.database import create_engine_from_url, create_session_factory, init_db
+from app.fair_queue import FairSharePolicy, FairShareQueue
+from app.models import Job, Runner
+from app.provisioning import ProvisioningPipeline, ProvisioningRequest
+from app.runner_manager import RunnerManager
+from app.scheduler import HostCapacity, ResourceRequest
+from sqlalchemy.pool import StaticPool
+
+GB = 1024**3
+
+
+class TestProvisioningPipeline(unittest.TestCase):
+    def test_runners_overlap_up_to_the_per_host_cap(self):
+        running = {"now": 0, "peak": 0}
+
+        async def stage(request):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.01)
+            running["now"] -= 1
+
+        async def scenario():
+            pipeline = ProvisioningPipeline(
+                stages=[("create", stage), ("register", stage)], max_concurrent_per_host=3
+            )
+            for i in range(9):
+                pipeline.submit(ProvisioningRequest(name=f"runner-{i}", tags=[]))
+            self.assertEqual(pipeline.in_flight, 9)
+            await pipeline.drain()
+            return pipeline
+
+        pipeline = asyncio.run(scenario())
+
+        self.assertEqual(running["peak"], 3)
+        self.assertEqual(pipeline.in_flight, 0)
+
+    def test_hosts_provision_in_parallel(self):
+        running = {"now": 0, "peak": 0}
+
+        async def stage(request):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.01)
+            running["now"] -= 1
+
+        async def scenario():
+            pipeline = ProvisioningPipeline(
+                stages=[("create", stage), ("register", stage)], max_concurrent_per_host=2
+            )
+            for i in range(12):
+                pipeline.submit(
+                    ProvisioningRequest(name=f"runner-{i}", tags=[], host=f"host-{i % 3}")
+                )
+            await pipeline.drain()
+
+        asyncio.run(scenario())
+
+        # No stage is capped across the fleet: each host adds its own slots
+        self.assertEqual(running["peak"], 6)
+
+    def test_stage_limits_apply_per_host(self):
+        registering = {"now": 0, "peak": 0}
+
+        async def create(request):
+            await asyncio.sleep(0.001)
+
+        async def register(request):
+            registering["now"] += 1
+            registering["peak"] = max(registering["peak"], registering["now"])
+            await asyncio.sleep(0.01)
+            registering["now"] -= 1
+
+        async def scenario():
+            pipeline = ProvisioningPipeline(
+                stages=[("create", create), ("register", register)],
+                max_concurrent_per_host=4,
+                stage_concurrency={"register": 1},
+            )
+            for i in range(8):
+                pipeline.submit(
+                    ProvisioningRequest(name=f"runner-{i}", tags=[], host=f"host-{i % 2}")
+                )
+            await pipeline.drain()
+
+        asyncio.run(scenario())
+
+        self.assertEqual(registering["peak"], 2)
+
+    def test_failure_stops_the_request_and_calls_back(self):
+        failures = []
+
+        async def ok(request):
+            request.container_id = "abc"
+
+        async def broken(request):
+            raise RuntimeError("exec failed")
+
+        async def never(request):
+            raise AssertionError("later stages must not run")
+
+        async def on_failure(request, error):
+            failures.append((request.stage, str(error)))
+
+        pipeline = ProvisioningPipeline(
+            stages=[("create", ok), ("register", broken), ("start_service", never)],
+            on_failure=on_failure,
+        )
+        request = ProvisioningRequest(name="runner", tags=[])
+
+        self.assertFalse(asyncio.run(pipeline.run(request)))
+        self.assertEqual(failures, [("register", "exec failed")])
+        self.assertIn("create", request.stage_durations)
+
+    def test_cancelled_request_is_cleaned_up(self):
+        failures = []
+
+        async def hang(request):
+            await asyncio.Event().wait()
+
+        async def on_failure(request, error):
+            failures.append((request.stage, type(error)))
+
+        async def scenario():
+            pipeline = ProvisioningPipeline(stages=[("create", hang)], on_failure=on_failure)
+            task = pipeline.submit(ProvisioningRequest(name="runner", tags=[]))
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return pipeline
+
+        pipeline = asyncio.run(scenario())
+        self.assertEqual(failures, [("create", asyncio.CancelledError)])
+        self.assertEqual(pipeline.in_flight, 0)
+
+
+class TestScaleToDemand(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+        await init_db(self.engine)
+        self.session_factory = create_session_factory(self.engine)
+        driver = MagicMock()
+        driver.host = "local"
+        driver.host_capacities.return_value = [
+            HostCapacity("local", 512, 1024 * GB, 512, 1024 * GB)
+        ]
+        driver.place.side_effect = lambda name, host=None, **requirements: host or "local"
+        self.driver = driver
+        self.manager = RunnerManager(
+            session_factory=self.session_factory,
+            driver=driver,
+            gitlab_url="http://gitlab",
+            gitlab_token="token",
+        )
+        self.manager.pipeline.submit = MagicMock()
+
+    async def asyncTearDown(self):
+        self.manager.executors.shutdown()
+        await self.engine.dispose()
+
+    async def add_idle_runner(self):
+        async with self.session_factory() as db:
+            db.add(Runner(id="r1", name="r1", status="idle", architecture="amd64"))
+            await db.commit()
+
+    async def test_burst_is_provisioned_in_one_batch(self):
+        await self.add_idle_runner()
+        self.manager.pending_jobs = {i: {"id": i, "tag_list": ["docker"]} for i in range(50)}
+
+        await self.manager.scale_to_demand()
+
+        # 50 jobs, one idle runner, capped by MAX_RUNNERS (default 20)
+        self.assertEqual(self.manager.pipeline.submit.call_count, 19)
+
+    async def test_no_spawn_when_idle_runners_cover_demand(self):
+        await self.add_idle_runner()
+        self.manager.pending_jobs = {1: {"id": 1, "tag_list": []}}
+
+        await self.manager.scale_to_demand()
+
+        self.manager.pipeline.submit.assert_not_called()
+
+    async def test_runners_go_where_the_scheduler_packed_them(self):
+        self.driver.host_capacities.return_value = [
+            HostCapacity("a", 8, 16 * GB, 8, 6 * GB),
+            HostCapacity("b", 8, 16 * GB, 8, 16 * GB),
+        ]
+        self.manager.default_request = ResourceRequest(2.0, 4 * GB)
+        self.manager.pending_jobs = {i: {"id": i, "tag_list": ["docker"]} for i in range(6)}
+
+        await self.manager.scale_to_demand()
+
+        # One 4g runner fits on a, four on b; the sixth job waits for room
+        hosts = [call.args[0].host for call in self.manager.pipeline.submit.call_args_list]
+        self.assertEqual(sorted(hosts), ["a", "b", "b", "b", "b"])
+
+    async def test_projects_at_their_running_cap_wait(self):
+        self.manager.queue = FairShareQueue(FairSharePolicy(max_running=1))
+        async with self.session_factory() as db:
+            db.add(Job(gitlab_job_id=1, project_id=1, project_name="p", status="running"))
+            await db.commit()
+        self.manager.pending_jobs = {
+            i: {"id": i, "tag_list": ["docker"], "project": {"id": 1 if i < 5 else 2}}
+            for i in range(2, 7)
+        }
+
+        await self.manager.scale_to_demand()
+
+        # Only project 2's job gets a runner
+        self.assertEqual(self.manager.pipeline.submit.call_count, 1)
+
+    async def test_idle_runner_without_the_job_tags_does_not_count(self):
+        await self.add_idle_runner()
+        self.manager.pending_jobs = {1: {"id": 1, "tag_list": ["cuda"]}}
+
+        await self.manager.scale_to_demand()
+
+        request = self.manager.pipeline.submit.call_args.args[0]
+        self.assertIn("cuda", request.tags)
+
+
+if __name__ == "__main__":
+    unittest.main()
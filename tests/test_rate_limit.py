@@ -0,0 +1,84 @@
+import unittest
+
+from autogit_gitlab.rate_limit import BURST, CircuitBreaker, RateLimiter, retry_after
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_requests_past_the_burst_are_spaced_out(self):
+        clock = FakeClock()
+        limiter = RateLimiter(per_minute=60, clock=clock)
+
+        waits = [limiter.reserve() for _ in range(BURST + 3)]
+
+        self.assertEqual(waits[: BURST + 1], [0.0] * (BURST + 1))
+        self.assertEqual(waits[BURST + 1 :], [1.0, 2.0])
+
+    def test_exhausted_budget_pauses_until_reset(self):
+        clock = FakeClock()
+        limiter = RateLimiter(per_minute=600, clock=clock, wall_clock=lambda: 5000.0)
+
+        limiter.update(
+            {"RateLimit-Limit": "600", "RateLimit-Remaining": "0", "RateLimit-Reset": "5020"}
+        )
+
+        self.assertAlmostEqual(limiter.reserve(), 20.0)
+        # Callers resume one interval apart, not all at once
+        self.assertAlmostEqual(limiter.reserve(), 20.1)
+
+    def test_low_remaining_budget_is_spread_over_the_window(self):
+        limiter = RateLimiter(per_minute=600, clock=FakeClock(), wall_clock=lambda: 5000.0)
+
+        limiter.update(
+            {"RateLimit-Limit": "600", "RateLimit-Remaining": "10", "RateLimit-Reset": "5030"}
+        )
+
+        self.assertEqual(limiter.interval, 3.0)
+
+    def test_retry_after_accepts_seconds_and_dates(self):
+        self.assertEqual(retry_after({"Retry-After": "7"}), 7.0)
+        self.assertEqual(
+            retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:10 GMT"}, now=1445412480.0), 10.0
+        )
+        self.assertIsNone(retry_after({}))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_consecutive_failures_and_closes_after_a_trial(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(threshold=3, cooldown=30, clock=clock)
+
+        for _ in range(3):
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+
+        clock.now += 30
+        # One trial call goes through; others wait on its outcome
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_failed_trial_reopens_the_circuit(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(threshold=1, cooldown=30, clock=clock)
+        breaker.record_failure()
+
+        clock.now += 30
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+
+        self.assertEqual(breaker.retry_after(), 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
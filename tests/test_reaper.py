@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from app.database import create_engine_from_url, create_session_factory, init_db
+from app.driver import (
+    COORDINATOR_INSTANCE_ID,
+    INSTANCE_LABEL,
+    MANAGED_LABEL,
+    RUNNER_LABEL,
+    DockerDriver,
+    ManagedResource,
+    resource_labels,
+)
+from app.executors import AsyncDriver, BoundedExecutor
+from app.models import Runner
+from app.reaper import OrphanReaper, RateLimiter
+from sqlalchemy.pool import StaticPool
+
+OLD = time.time() - 3600
+
+
+def resource(kind, id, runner=None, instance=COORDINATOR_INSTANCE_ID, created=OLD):
+    labels = {MANAGED_LABEL: "true"}
+    if runner:
+        labels[RUNNER_LABEL] = runner
+    if instance:
+        labels[INSTANCE_LABEL] = instance
+    return ManagedResource(kind=kind, id=id, name=runner or id, labels=labels, created=created)
+
+
+def bare_driver():
+    driver = object.__new__(DockerDriver)
+    driver.client = MagicMock()
+    driver.host = "local"
+    driver._detected_network = "autogit-network"
+    return driver
+
+
+class TestOwnershipLabels(unittest.TestCase):
+    def test_created_containers_carry_owner_labels(self):
+        driver = bare_driver()
+        driver.create_runner_container(name="autogit-runner-abc")
+
+        labels = driver.client.containers.create.call_args.kwargs["labels"]
+        self.assertLessEqual(resource_labels("autogit-runner-abc").items(), labels.items())
+        self.assertEqual(labels[INSTANCE_LABEL], COORDINATOR_INSTANCE_ID)
+
+    def test_managed_resources_are_listed_from_sparse_entries(self):
+        driver = bare_driver()
+        driver.client.containers.list.return_value = [
+            MagicMock(
+                id="c1",
+                attrs={"Names": ["/autogit-runner-a"], "Labels": {"x": "y"}, "Created": 100},
+            )
+        ]
+        network = MagicMock(id="n1", attrs={"Created": "2026-01-05T12:00:00.123456789Z"})
+        network.name = "net-a"
+        driver.client.networks.list.return_value = [network]
+        driver.client.volumes.list.return_value = []
+
+        container, network = driver.list_managed_resources()
+
+        self.assertEqual(
+            (container.kind, container.name, container.created),
+            ("container", "autogit-runner-a", 100.0),
+        )
+        self.assertEqual(network.created, 1767614400.0)
+        self.assertTrue(driver.client.containers.list.call_args.kwargs["sparse"])
+
+
+class TestFindOrphans(unittest.TestCase):
+    def test_only_resources_without_a_live_runner_are_orphans(self):
+        resources = [
+            resource("volume", "v1", runner="gone"),
+            resource("container", "c1", runner="live"),
+            resource("container", "c2", runner="gone"),
+            resource("container", "c3", runner="young", created=time.time()),
+            resource("container", "legacy-live"),
+            resource("container", "legacy-gone"),
+            resource("network", "shared"),
+            resource("container", "c4", runner="foreign", instance="other"),
+        ]
+
+        orphans = DockerDriver.find_orphans(resources, {"live"}, {"legacy-live"})
+        self.assertEqual([r.id for r in orphans], ["c2", "legacy-gone", "c4", "v1"])
+
+        scoped = DockerDriver.find_orphans(
+            resources, {"live"}, {"legacy-live"}, instance=COORDINATOR_INSTANCE_ID
+        )
+        self.assertNotIn("c4", [r.id for r in scoped])
+
+
+class TestOrphanReaper(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+        await init_db(self.engine)
+        self.db = create_session_factory(self.engine)()
+        self.db.add_all(
+            [
+                Runner(id="c0", name="r0", status="busy", architecture="amd64", container_id="c0"),
+                Runner(
+                    id="c1", name="r1", status="offline", architecture="amd64", container_id="c1"
+                ),
+            ]
+        )
+        await self.db.commit()
+
+        self.resources = [resource("container", f"c{i}", runner=f"r{i}") for i in range(10)]
+        self.resources.append(resource("network", "n1", runner="r1"))
+
+        self.driver = MagicMock()
+        self.driver.list_managed_resources.return_value = self.resources
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.removed = []
+
+        def remove_resource(resource):
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(0.02)
+            with self.lock:
+                self.active -= 1
+                self.removed.append(resource.id)
+            return True
+
+        self.driver.remove_resource.side_effect = remove_resource
+        self.executor = BoundedExecutor("docker-test", max_workers=8)
+        self.async_driver = AsyncDriver(self.driver, self.executor)
+
+    async def asyncTearDown(self):
+        self.executor.shutdown()
+        await self.db.close()
+        await self.engine.dispose()
+
+    async def test_dry_run_only_reports(self):
+        reaper = OrphanReaper(self.async_driver, dry_run=True)
+        report = await reaper.reap(self.db)
+
+        self.assertEqual(len(report.orphans), 10)
+        self.assertEqual(report.to_dict()["removed"], 0)
+        self.driver.remove_resource.assert_not_called()
+
+    async def test_orphans_are_removed_concurrently_with_a_bound(self):
+        reaper = OrphanReaper(self.async_driver, concurrency=3, rate=1000, dry_run=False)
+        report = await reaper.reap(self.db)
+
+        self.assertEqual(sorted(self.removed), sorted(f"c{i}" for i in range(1, 10)) + ["n1"])
+        self.assertEqual(self.removed[-1], "n1")
+        self.assertEqual(len(report.removed), 10)
+        self.assertGreater(self.peak, 1)
+        self.assertLessEqual(self.peak, 3)
+
+    async def test_rate_limiter_spaces_calls(self):
+        limiter = RateLimiter(rate=50)
+        started = time.monotonic()
+        await asyncio.gather(*(limiter.wait() for _ in range(5)))
+        self.assertGreaterEqual(time.monotonic() - started, 0.08 - 0.005)
+
+
+if __name__ == "__main__":
+    unittest.main()
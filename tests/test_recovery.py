@@ -0,0 +1,155 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.database import create_engine_from_url, create_session_factory, init_db
+from app.driver import ARCHITECTURE_LABEL, TAGS_LABEL, ManagedResource, resource_labels
+from app.executors import AsyncDriver, BoundedExecutor
+from app.models import Job, Runner
+from app.recovery import StartupReconciler
+from sqlalchemy import select
+from sqlalchemy.pool import StaticPool
+
+
+def container(id, runner, status="running", **labels):
+    return ManagedResource(
+        kind="container",
+        id=id,
+        name=runner,
+        labels={**resource_labels(runner), **labels},
+        status=status,
+        created=1767614400.0,
+    )
+
+
+class TestStartupReconciler(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+        await init_db(self.engine)
+        self.session_factory = create_session_factory(self.engine)
+
+        def runner(name, status, gitlab_runner_id=None):
+            return Runner(
+                id=f"c-{name}",
+                name=name,
+                status=status,
+                architecture="amd64",
+                container_id=f"c-{name}",
+                gitlab_runner_id=gitlab_runner_id,
+            )
+
+        def job(gitlab_job_id, runner_name):
+            return Job(
+                gitlab_job_id=gitlab_job_id,
+                project_id=1,
+                project_name="p",
+                status="running",
+                runner_id=f"c-{runner_name}",
+            )
+
+        async with self.session_factory() as db:
+            db.add_all(
+                [
+                    runner("healthy-idle", "idle", gitlab_runner_id=1),
+                    runner("healthy-busy", "busy", gitlab_runner_id=2),
+                    runner("vanished", "busy"),
+                    runner("stopped", "idle"),
+                    runner("deleted-in-gitlab", "idle", gitlab_runner_id=99),
+                    runner("half-provisioned", "provisioning", gitlab_runner_id=3),
+                    runner("never-registered", "provisioning"),
+                    job(10, "healthy-busy"),
+                    job(11, "vanished"),
+                ]
+            )
+            await db.commit()
+
+        self.containers = [
+            container("c-healthy-idle", "healthy-idle"),
+            container("c-healthy-busy", "healthy-busy"),
+            container("c-stopped", "stopped", status="exited"),
+            container("c-deleted-in-gitlab", "deleted-in-gitlab"),
+            container("c-half-provisioned", "half-provisioned"),
+            container("c-never-registered", "never-registered"),
+            # Created just before the crash, row never committed
+            container(
+                "c-rowless",
+                "rowless",
+                **{ARCHITECTURE_LABEL: "arm64", TAGS_LABEL: "docker,arm64"},
+            ),
+            # Unregistered and without pool labels; left to the reaper
+            container("c-stray", "stray"),
+        ]
+        self.gitlab_runners = [
+            {"id": 1, "description": "healthy-idle"},
+            {"id": 2, "description": "healthy-busy"},
+            {"id": 3, "description": "half-provisioned"},
+            {"id": 7, "description": "rowless"},
+        ]
+
+        self.driver = MagicMock()
+        self.driver.list_managed_resources.return_value = self.containers
+        self.gitlab_client = MagicMock()
+        self.gitlab_client.get_runners = AsyncMock(return_value=self.gitlab_runners)
+        self.executor = BoundedExecutor("test", max_workers=2)
+        self.reconciler = StartupReconciler(
+            self.session_factory, AsyncDriver(self.driver, self.executor), self.gitlab_client
+        )
+
+    async def asyncTearDown(self):
+        self.executor.shutdown()
+        await self.engine.dispose()
+
+    async def statuses(self):
+        async with self.session_factory() as db:
+            runners = {r.name: r for r in (await db.scalars(select(Runner))).all()}
+            jobs = {j.gitlab_job_id: j.status for j in (await db.scalars(select(Job))).all()}
+        return runners, jobs
+
+    async def test_restart_repairs_rows_and_adopts_healthy_runners(self):
+        report = await self.reconciler.run()
+
+        # One bulk listing of each system
+        self.driver.list_managed_resources.assert_called_once_with(kinds=("container",))
+        self.gitlab_client.get_runners.assert_awaited_once()
+
+        runners, jobs = await self.statuses()
+        self.assertEqual(
+            {name: runner.status for name, runner in runners.items()},
+            {
+                "healthy-idle": "idle",
+                "healthy-busy": "busy",
+                "vanished": "offline",
+                "stopped": "offline",
+                "deleted-in-gitlab": "offline",
+                "half-provisioned": "idle",
+                "never-registered": "error",
+                "rowless": "idle",
+            },
+        )
+        rowless = runners["rowless"]
+        self.assertEqual(
+            (rowless.architecture, rowless.tags, rowless.gitlab_runner_id),
+            ("arm64", "docker,arm64", 7),
+        )
+        self.assertEqual(jobs, {10: "running", 11: "failed"})
+
+        self.assertEqual(sorted(report.adopted), ["half-provisioned", "rowless"])
+        self.assertEqual(sorted(report.kept), ["healthy-busy", "healthy-idle"])
+        self.assertEqual(report.abandoned, ["never-registered"])
+        self.assertEqual(report.failed_jobs, [11])
+
+    async def test_gitlab_outage_falls_back_to_docker_state(self):
+        self.gitlab_client.get_runners.side_effect = RuntimeError("403 Forbidden")
+
+        report = await self.reconciler.run()
+
+        runners, _ = await self.statuses()
+        self.assertFalse(report.gitlab_checked)
+        # Running containers are trusted, nothing is adopted without GitLab
+        self.assertEqual(runners["deleted-in-gitlab"].status, "idle")
+        self.assertEqual(runners["half-provisioned"].status, "error")
+        self.assertNotIn("rowless", runners)
+        self.assertEqual(runners["vanished"].status, "offline")
+
+
+if __name__ == "__main__":
+    unittest.main()
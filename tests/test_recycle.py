@@ -0,0 +1,152 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from app.database import create_engine_from_url, create_session_factory, init_db
+from app.docker_events import ContainerEvent
+from app.driver import GITLAB_JOB_LABEL, GITLAB_MANAGED_LABEL, DockerDriver
+from app.events import JobEvent
+from app.models import Runner
+from app.recycle import RecyclePolicy
+from app.runner_manager import RunnerManager
+from sqlalchemy import select
+from sqlalchemy.pool import StaticPool
+
+
+class TestRecyclePolicy(unittest.TestCase):
+    def test_runners_retire_by_job_count_or_age(self):
+        policy = RecyclePolicy(enabled=True, max_jobs=3, max_age=timedelta(hours=1))
+        now = datetime(2026, 1, 5, 12, 0, 0)
+
+        fresh = Runner(jobs_completed=2, created_at=now - timedelta(minutes=5))
+        self.assertIsNone(policy.retire_reason(fresh, now))
+        self.assertIn("3 jobs", policy.retire_reason(Runner(jobs_completed=3), now))
+        self.assertIn(
+            "older", policy.retire_reason(Runner(created_at=now - timedelta(hours=2)), now)
+        )
+
+        unlimited = RecyclePolicy(enabled=True, max_jobs=0, max_age=timedelta(0))
+        self.assertIsNone(unlimited.retire_reason(Runner(jobs_completed=1000), now))
+
+
+class TestResetRunner(unittest.TestCase):
+    def test_reset_prunes_only_the_finished_jobs_leftovers(self):
+        driver = object.__new__(DockerDriver)
+        driver.client = MagicMock()
+        driver.client.containers.list.return_value = [
+            MagicMock(id="build-7", attrs={"Labels": {GITLAB_JOB_LABEL: "7"}}),
+            MagicMock(id="build-8", attrs={"Labels": {GITLAB_JOB_LABEL: "8"}}),
+        ]
+        driver.client.volumes.list.return_value = [
+            MagicMock(id="cache-7", attrs={"Labels": {GITLAB_JOB_LABEL: "7"}})
+        ]
+        runner = driver.client.containers.get.return_value
+        runner.status = "running"
+        runner.exec_run.return_value = (0, b"")
+
+        self.assertTrue(driver.reset_runner("c1", [7]))
+
+        driver.client.api.remove_container.assert_called_once_with("build-7", force=True, v=True)
+        driver.client.api.remove_volume.assert_called_once_with("cache-7", force=True)
+        filters = driver.client.containers.list.call_args.kwargs["filters"]
+        self.assertEqual(filters, {"label": f"{GITLAB_MANAGED_LABEL}=true"})
+
+        runner.exec_run.return_value = (1, b"ERROR: verification failed")
+        self.assertFalse(driver.reset_runner("c1", [7]))
+
+
+class TestRunnerManagerRecycle(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+        await init_db(self.engine)
+        self.session_factory = create_session_factory(self.engine)
+        self.driver = MagicMock()
+        self.driver.host = "local"
+        self.manager = RunnerManager(
+            session_factory=self.session_factory,
+            driver=self.driver,
+            gitlab_url="http://gitlab",
+            gitlab_token="token",
+            recycle=RecyclePolicy(enabled=True, max_jobs=3, max_age=timedelta(hours=4)),
+        )
+
+        async with self.session_factory() as db:
+            for name, gitlab_runner_id, jobs_completed in (("r1", 21, 1), ("r2", 22, 3)):
+                db.add(
+                    Runner(
+                        id=name,
+                        name=name,
+                        status="idle",
+                        architecture="amd64",
+                        container_id=f"c-{name}",
+                        gitlab_runner_id=gitlab_runner_id,
+                        jobs_completed=jobs_completed,
+                        created_at=datetime.utcnow(),
+                    )
+                )
+            await db.commit()
+
+    async def asyncTearDown(self):
+        self.manager.executors.shutdown()
+        await self.engine.dispose()
+
+    async def runners(self):
+        async with self.session_factory() as db:
+            return {r.id: r for r in (await db.scalars(select(Runner))).all()}
+
+    async def test_finished_job_resets_the_runner_in_place(self):
+        self.driver.reset_runner.return_value = True
+
+        await self.manager.recycle_runner({"id": 21, "description": "r1"}, 7)
+
+        self.driver.reset_runner.assert_called_once_with("c-r1", [7])
+        self.driver.stop_runner.assert_not_called()
+        self.assertEqual((await self.runners())["r1"].status, "idle")
+
+    async def test_runner_due_for_retirement_is_torn_down(self):
+        await self.manager.recycle_runner({"id": 22, "description": "r2"}, 8)
+
+        self.driver.reset_runner.assert_not_called()
+        self.driver.stop_runner.assert_called_once_with("c-r2", remove=True)
+        self.assertNotIn("r2", await self.runners())
+
+    async def test_runner_failing_its_reset_is_torn_down(self):
+        self.driver.reset_runner.return_value = False
+
+        await self.manager.recycle_runner({"id": 21}, 7)
+
+        self.driver.stop_runner.assert_called_once_with("c-r1", remove=True)
+        self.assertNotIn("r1", await self.runners())
+
+    async def test_stop_event_during_a_reset_keeps_the_runner(self):
+        async def reset(container_id, job_ids):
+            # The reset restarts the container, which emits a die event
+            await self.manager._handle_container_event(ContainerEvent(container_id, "die"))
+            return True
+
+        self.manager.async_driver.reset_runner = reset
+
+        await self.manager.recycle_runner({"id": 21}, 7)
+
+        self.assertEqual((await self.runners())["r1"].status, "idle")
+
+    async def test_finished_job_event_triggers_the_reset(self):
+        self.driver.reset_runner.return_value = True
+        dispatcher = asyncio.create_task(self.manager.dispatch_job_events())
+        await asyncio.sleep(0)
+
+        self.manager.event_bus.publish(
+            JobEvent(job_id=7, project_id=1, project_name="p", status="success", runner={"id": 21})
+        )
+        for _ in range(500):
+            await asyncio.sleep(0.01)
+            if self.driver.reset_runner.called and not self.manager._resets:
+                break
+        dispatcher.cancel()
+
+        self.driver.reset_runner.assert_called_once_with("c-r1", [7])
+
+
+if __name__ == "__main__":
+    unittest.main()
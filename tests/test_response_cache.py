@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from autogit_gitlab.response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_responses_without_validators_are_not_kept(self):
+        cache = ResponseCache(max_entries=10)
+
+        self.assertIsNone(cache.put("/projects", b"[]", {}, None, None))
+        self.assertIsNone(cache.get("/projects"))
+
+    def test_least_recently_used_entries_are_evicted_by_count_and_size(self):
+        cache = ResponseCache(max_entries=2, max_bytes=10)
+        cache.put("/a", b"aaaa", {}, '"a"', None)
+        cache.put("/b", b"bbbb", {}, '"b"', None)
+        cache.get("/a")
+        cache.put("/c", b"cccc", {}, '"c"', None)
+
+        self.assertIsNone(cache.get("/b"))
+        self.assertEqual(cache.get("/a").etag, '"a"')
+
+        cache = ResponseCache(max_entries=10, max_bytes=10)
+        for url in ("/a", "/b", "/c"):
+            cache.put(url, b"xxxx", {}, '"x"', None)
+        self.assertEqual((len(cache), cache.size), (2, 8))
+
+    def test_entries_expire_unless_revalidated(self):
+        clock = FakeClock()
+        cache = ResponseCache(max_entries=10, ttl=60, clock=clock)
+        entry = cache.put("/a", b"[]", {"Link": "<next>", "X-Request-Id": "1"}, '"a"', None)
+        self.assertEqual(entry.headers, {"Link": "<next>"})
+
+        clock.now += 50
+        cache.touch("/a", entry)
+        clock.now += 50
+        self.assertIsNotNone(cache.get("/a"))
+        clock.now += 61
+        self.assertIsNone(cache.get("/a"))
+
+    def test_disk_backend_survives_a_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            cache = ResponseCache(max_entries=10, path=path)
+            cache.put("/a", b'[{"id": 1}]', {}, '"a"', "Wed, 21 Oct 2015 07:28:00 GMT")
+            cache.close()
+
+            entry = ResponseCache(max_entries=10, path=path).get("/a")
+
+        self.assertEqual(entry.content, b'[{"id": 1}]')
+        self.assertEqual(
+            entry.validators(),
+            {"If-None-Match": '"a"', "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT"},
+        )
+
+    def test_disk_writes_are_batched_off_the_caller(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            cache = ResponseCache(max_entries=1, path=path, flush_interval=60)
+            cache.put("/a", b"[]", {}, '"a"', None)
+            cache.put("/b", b"[]", {}, '"b"', None)
+
+            def stored():
+                with sqlite3.connect(path) as db:
+                    return db.execute("SELECT url FROM responses").fetchall()
+
+            self.assertEqual(stored(), [])
+            cache.flush()
+            # Only the survivor of the eviction is written
+            self.assertEqual(stored(), [("/b",)])
+            cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
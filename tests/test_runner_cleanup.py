@@ -0,0 +1,105 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from app.database import create_engine_from_url, create_session_factory, init_db
+from app.driver import DockerDriver
+from app.models import Runner
+from app.runner_manager import RunnerManager
+from sqlalchemy import select
+from sqlalchemy.pool import StaticPool
+
+
+class TestBulkStatus(unittest.TestCase):
+    def test_statuses_come_from_one_sparse_listing(self):
+        driver = object.__new__(DockerDriver)
+        driver.client = MagicMock()
+        driver.client.containers.list.return_value = [
+            MagicMock(id="c1", status="running"),
+            MagicMock(id="c2", status="exited"),
+        ]
+
+        self.assertEqual(driver.get_runner_statuses(), {"c1": "running", "c2": "exited"})
+        driver.client.containers.list.assert_called_once()
+        kwargs = driver.client.containers.list.call_args.kwargs
+        self.assertTrue(kwargs["all"])
+        self.assertTrue(kwargs["sparse"])
+        self.assertEqual(kwargs["filters"], {"name": "autogit-runner-"})
+
+
+class TestRunnerManagerCleanup(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+        await init_db(self.engine)
+        self.session_factory = create_session_factory(self.engine)
+        self.driver = MagicMock()
+        self.driver.host = "local"
+        self.driver.default_host = "local"
+        self.driver.unavailable_hosts.return_value = set()
+        self.manager = RunnerManager(
+            session_factory=self.session_factory,
+            driver=self.driver,
+            gitlab_url="http://gitlab",
+            gitlab_token="token",
+        )
+
+    async def asyncTearDown(self):
+        self.manager.executors.shutdown()
+        await self.engine.dispose()
+
+    async def test_idle_cleanup_diffs_one_snapshot(self):
+        statuses = {}
+        async with self.session_factory() as db:
+            for i in range(500):
+                db.add(
+                    Runner(
+                        id=f"r{i}",
+                        name=f"r{i}",
+                        status="idle" if i % 2 else "busy",
+                        architecture="amd64",
+                        container_id=f"c{i}",
+                        last_seen=datetime.utcnow(),
+                    )
+                )
+                if i % 50:
+                    statuses[f"c{i}"] = "running"
+            await db.commit()
+        self.driver.get_runner_statuses.return_value = statuses
+
+        async with self.session_factory() as db:
+            await self.manager._cleanup_idle_runners_once(db)
+
+        self.driver.get_runner_statuses.assert_called_once()
+        self.driver.get_runner_status.assert_not_called()
+        # Gone containers have nothing left to stop
+        self.driver.stop_runner.assert_not_called()
+        async with self.session_factory() as db:
+            offline = set(
+                (await db.scalars(select(Runner.id).where(Runner.status == "offline"))).all()
+            )
+        self.assertEqual(offline, {f"r{i}" for i in range(0, 500, 50)})
+
+    async def test_runners_on_unreachable_hosts_are_not_marked_offline(self):
+        async with self.session_factory() as db:
+            db.add(
+                Runner(
+                    id="r1",
+                    name="r1",
+                    status="idle",
+                    architecture="amd64",
+                    host="far",
+                    container_id="c1",
+                )
+            )
+            await db.commit()
+        self.driver.get_runner_statuses.return_value = {}
+        self.driver.unavailable_hosts.return_value = {"far"}
+
+        async with self.session_factory() as db:
+            await self.manager._cleanup_idle_runners_once(db)
+            runner = await db.get(Runner, "r1")
+        self.assertEqual(runner.status, "idle")
+
+
+if __name__ == "__main__":
+    unittest.main()
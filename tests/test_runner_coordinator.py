@@ -1,11 +1,15 @@
+import asyncio
+import time
 import unittest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.main import app, get_db
-from app.models import Base
+from app.database import create_engine_from_url, create_session_factory, init_db
+from app.main import app, event_bus, get_db, status_cache
+from app.models import Base, Job, Runner
+from app.runner_manager import RunnerManager
+from app.scheduler import HostCapacity
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func, select
 from sqlalchemy.pool import StaticPool
 
 # Add the service directory to path if needed, but uv run should handle it if configured
@@ -14,32 +18,36 @@ from sqlalchemy.pool import StaticPool
 
 
 # Use a single connection for the in-memory database to keep it alive
-engine = create_engine(
-    "sqlite:///:memory:",
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+TestingSessionLocal = create_session_factory(engine)
 
 
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
+async def override_get_db():
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def drop_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
 
 
 app.dependency_overrides[get_db] = override_get_db
 
 
+async def dispatch_only(manager):
+    # Only the webhook-driven dispatcher; the other loops would reach Docker
+    await manager.dispatch_job_events()
+
+
 class TestRunnerCoordinatorIntegration(unittest.TestCase):
     def setUp(self):
-        Base.metadata.create_all(bind=engine)
+        asyncio.run(init_db(engine))
+        status_cache.invalidate()
         self.client = TestClient(app)
 
     def tearDown(self):
-        Base.metadata.drop_all(bind=engine)
+        asyncio.run(drop_db())
 
     def test_health_check(self):
         response = self.client.get("/health")
@@ -56,11 +64,12 @@ class TestRunnerCoordinatorIntegration(unittest.TestCase):
             "checkout_sha": "abc123sha",
             "user_name": "testuser",
             "project_name": "test-project",
+            "build_id": 101,
         }
         # Ensure we use the same engine for the app and the test
         response = self.client.post("/webhook/job", json=payload)
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json()["job_id"], "abc123sha")
+        self.assertEqual(response.json()["job_id"], 101)
 
         # 2. Verify job is in database
         response = self.client.get("/status")
@@ -68,6 +77,85 @@ class TestRunnerCoordinatorIntegration(unittest.TestCase):
         # Note: status endpoint currently returns placeholders,
         # but we can verify the webhook accepted the job.
 
+    def test_finished_job_is_counted_against_its_runner(self):
+        async def add_runner():
+            async with TestingSessionLocal() as db:
+                db.add(Runner(id="c1", name="r1", architecture="amd64", gitlab_runner_id=5))
+                await db.commit()
+
+        async def jobs_completed():
+            async with TestingSessionLocal() as db:
+                return (await db.get(Runner, "c1")).jobs_completed
+
+        asyncio.run(add_runner())
+        payload = {
+            "object_kind": "build",
+            "project_id": 1,
+            "ref": "main",
+            "project_name": "test-project",
+            "build_id": 42,
+            "build_status": "success",
+            "runner": {"id": 5, "description": "r1"},
+        }
+        self.client.post("/webhook/job", json=payload)
+        # A redelivered event is not counted twice
+        self.client.post("/webhook/job", json=payload)
+
+        self.assertEqual(asyncio.run(jobs_completed()), 1)
+
+    def test_status_supports_conditional_requests(self):
+        response = self.client.get("/status")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total_runners"], 0)
+        etag = response.headers["etag"]
+
+        response = self.client.get("/status", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_metrics_endpoint(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("coordinator_executor_saturation", response.text)
+
+    def test_pipeline_webhook_events_carry_ref(self):
+        queue = event_bus.subscribe()
+        self.addCleanup(event_bus.unsubscribe, queue)
+        payload = {
+            "object_kind": "pipeline",
+            "object_attributes": {"id": 7, "ref": "v1.2.0", "tag": True},
+            "project": {"id": 1, "name": "project-1"},
+            "builds": [
+                {"id": 11, "status": "pending", "name": "build", "tag_list": ["docker"]},
+                {"id": 12, "status": "success", "name": "lint", "tag_list": ["docker"]},
+            ],
+        }
+        response = self.client.post("/webhook/pipeline", json=payload)
+        self.assertEqual(response.json()["pending_jobs"], 1)
+
+        event = queue.get_nowait()
+        self.assertEqual(event.job_id, 11)
+        self.assertEqual(event.ref, "v1.2.0")
+        self.assertTrue(event.tag)
+
+    def test_job_webhook_without_build_id_is_rejected(self):
+        payload = {
+            "object_kind": "build",
+            "project_id": 1,
+            "ref": "main",
+            "project_name": "project-1",
+            "checkout_sha": "0123456789abcdef0123456789abcdef01234567",
+            "build_status": "pending",
+        }
+        response = self.client.post("/webhook/job", json=payload)
+        self.assertEqual(response.status_code, 400)
+
+        async def count_jobs():
+            async with TestingSessionLocal() as db:
+                return await db.scalar(select(func.count(Job.id)))
+
+        self.assertEqual(asyncio.run(count_jobs()), 0)
+
     def test_invalid_webhook(self):
         # Missing required fields
         payload = {"invalid": "data"}
@@ -75,5 +163,82 @@ class TestRunnerCoordinatorIntegration(unittest.TestCase):
         self.assertEqual(response.status_code, 422)
 
 
+class TestLifespanDispatch(unittest.TestCase):
+    """Runs last: leaving the lifespan shuts down the shared executors."""
+
+    def setUp(self):
+        asyncio.run(init_db(engine))
+        self.submitted = []
+        self.driver = MagicMock()
+        self.driver.host = "local"
+        self.driver.endpoints = []
+        self.driver.host_capacities.return_value = [
+            HostCapacity("local", 64.0, 256 * 1024**3, 64.0, 256 * 1024**3)
+        ]
+
+    def tearDown(self):
+        asyncio.run(drop_db())
+
+    def record_submit(self):
+        def submit(manager, pool_class, size=None, host=None):
+            self.submitted.append(pool_class)
+            return True
+
+        return submit
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def post_job(self, client, build_id, project_id, ref="feature", tags=("docker",)):
+        payload = {
+            "object_kind": "build",
+            "project_id": project_id,
+            "ref": ref,
+            "project_name": f"project-{project_id}",
+            "build_id": build_id,
+            "build_status": "pending",
+            "tag_list": list(tags),
+        }
+        self.assertEqual(client.post("/webhook/job", json=payload).status_code, 200)
+
+    def test_webhooks_get_runners_in_fair_share_order(self):
+        with (
+            patch("app.main.engine", engine),
+            patch("app.main.SessionLocal", TestingSessionLocal),
+            patch("app.main.driver", self.driver),
+            patch("app.main.GITLAB_TOKEN", "token"),
+            patch.dict("os.environ", {"MAX_RUNNERS": "0"}),
+            patch.object(RunnerManager, "recover", AsyncMock()),
+            patch.object(RunnerManager, "start_lifecycle_manager", dispatch_only),
+            patch.object(RunnerManager, "_submit", self.record_submit()),
+            TestClient(app) as client,
+        ):
+            import app.main as main
+
+            manager = main.runner_manager_instance
+            # A large matrix from project 1, then one job each from project 2
+            # on a protected branch and from project 3
+            for build_id in range(1, 4):
+                self.post_job(client, build_id, project_id=1)
+            self.post_job(client, 4, project_id=2, ref="main", tags=("docker", "protected"))
+            self.post_job(client, 5, project_id=3, tags=("docker", "third"))
+            self.wait_for(lambda: len(manager.pending_jobs) == 5)
+            self.assertEqual(self.submitted, [])
+
+            # Room for three runners frees up as another job arrives
+            manager.max_runners = 3
+            self.post_job(client, 6, project_id=1)
+            self.wait_for(lambda: len(self.submitted) == 3)
+
+        # The protected job first, then projects 1 and 3 take turns; first in,
+        # first out would have given all three runners to project 1
+        tags = [pool_class.tags for pool_class in self.submitted]
+        self.assertIn("protected", tags[0])
+        self.assertTrue(any("third" in runner_tags for runner_tags in tags))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from app.scheduler import HostCapacity, JobDemand, ResourceRequest, RunnerSlot, schedule
+
+GB = 1024**3
+DEFAULT = ResourceRequest(cpu=2.0, memory=4 * GB)
+
+
+def job(key, cpu=2.0, memory=4, architecture="amd64", gpu_vendor=None):
+    return JobDemand(key, ResourceRequest(cpu, memory * GB), architecture, gpu_vendor)
+
+
+def host(name, cpu=16.0, memory=32, free_memory=None, architecture=None):
+    free_memory = memory if free_memory is None else free_memory
+    return HostCapacity(name, cpu, memory * GB, cpu, free_memory * GB, architecture=architecture)
+
+
+class TestResourceRequest(unittest.TestCase):
+    def test_tags_override_the_default(self):
+        self.assertEqual(
+            ResourceRequest.from_tags(["docker", "cpu:8", "memory:16g"], DEFAULT),
+            ResourceRequest(8.0, 16 * GB),
+        )
+        self.assertEqual(
+            ResourceRequest.from_tags(["mem:512m", "cpu:lots"], DEFAULT),
+            ResourceRequest(2.0, 512 * 1024**2),
+        )
+
+
+class TestSchedule(unittest.TestCase):
+    def test_jobs_take_the_smallest_idle_runner_that_fits(self):
+        runners = [
+            RunnerSlot("big", cpu=8, memory=16 * GB),
+            RunnerSlot("small", cpu=2, memory=4 * GB),
+            RunnerSlot("arm", cpu=8, memory=16 * GB, architecture="arm64"),
+        ]
+        plan = schedule([job("j1", memory=2), job("j2", memory=8)], runners, [])
+
+        self.assertEqual(plan.assignments, {"j1": "small", "j2": "big"})
+
+    def test_idle_runners_must_carry_the_job_tags(self):
+        runners = [
+            RunnerSlot("plain", cpu=2, memory=4 * GB, tags=frozenset({"docker"})),
+            RunnerSlot("gpu", cpu=8, memory=16 * GB, tags=frozenset({"docker", "cuda"})),
+        ]
+        tagged = JobDemand("j1", ResourceRequest(2.0, 2 * GB), tags=frozenset({"cuda"}))
+
+        plan = schedule([tagged, job("j2", memory=2)], runners, [])
+
+        self.assertEqual(plan.assignments, {"j1": "gpu", "j2": "plain"})
+
+    def test_new_runners_are_packed_largest_first(self):
+        plan = schedule(
+            [job("s1", memory=4), job("l1", memory=24), job("s2", memory=4), job("l2", memory=24)],
+            [],
+            [host("a"), host("b")],
+        )
+
+        # Each large job fills most of a host; the small ones share the gaps
+        self.assertEqual({plan.spawns["l1"], plan.spawns["l2"]}, {"a", "b"})
+        self.assertEqual(sorted(plan.spawns), ["l1", "l2", "s1", "s2"])
+
+    def test_memory_is_never_oversubscribed(self):
+        plan = schedule(
+            [job(f"j{i}", cpu=1, memory=6) for i in range(10)], [], [host("a", free_memory=20)]
+        )
+
+        self.assertEqual(len(plan.spawns), 3)
+        self.assertEqual(len(plan.waiting), 7)
+
+    def test_jobs_larger_than_any_host_are_rejected(self):
+        plan = schedule(
+            [job("huge", memory=64), job("arm", architecture="arm64")],
+            [],
+            [host("a", architecture="amd64")],
+        )
+
+        self.assertIn("huge", plan.rejected)
+        # No arm64 host is up right now; one may come back
+        self.assertEqual(plan.waiting, ["arm"])
+
+
+if __name__ == "__main__":
+    unittest.main()
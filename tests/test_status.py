@@ -0,0 +1,87 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.database import create_engine_from_url, create_session_factory, init_db
+from app.models import Job, Runner
+from app.status import StatusCache, collect_status
+from sqlalchemy.pool import StaticPool
+
+
+class TestStatusSnapshot(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+        await init_db(self.engine)
+        self.db = create_session_factory(self.engine)()
+        self.now = datetime(2026, 1, 5, 12, 0, 0)
+
+        self.db.add_all(
+            [
+                Runner(id="a", name="a", status="idle", architecture="amd64"),
+                Runner(id="b", name="b", status="busy", architecture="amd64"),
+                Runner(id="c", name="c", status="idle", architecture="arm64", gpu_enabled=True),
+                Runner(id="d", name="d", status="provisioning", architecture="arm64"),
+                Job(
+                    gitlab_job_id=1,
+                    project_id=1,
+                    project_name="p",
+                    status="queued",
+                    created_at=self.now - timedelta(seconds=90),
+                ),
+                Job(
+                    gitlab_job_id=2,
+                    project_id=1,
+                    project_name="p",
+                    status="queued",
+                    created_at=self.now - timedelta(seconds=10),
+                ),
+                Job(
+                    gitlab_job_id=3,
+                    project_id=1,
+                    project_name="p",
+                    status="completed",
+                    created_at=self.now - timedelta(hours=1),
+                ),
+            ]
+        )
+        await self.db.commit()
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        await self.engine.dispose()
+
+    async def test_counts_are_broken_down_by_status_architecture_and_gpu(self):
+        status = await collect_status(self.db, now=self.now)
+
+        self.assertEqual(status["total_runners"], 4)
+        self.assertEqual(status["active_runners"], 3)
+        self.assertEqual(status["idle_runners"], 2)
+        self.assertEqual(status["provisioning_runners"], 1)
+        self.assertEqual(status["runners_by_architecture"]["arm64"], {"idle": 1, "provisioning": 1})
+        self.assertEqual(status["runners_by_gpu"]["gpu"], {"idle": 1})
+        self.assertEqual(status["queued_jobs"], 2)
+        self.assertEqual(status["oldest_queued_job_age_seconds"], 90.0)
+
+    async def test_cache_serves_the_snapshot_until_ttl_or_invalidation(self):
+        cache = StatusCache(ttl_seconds=60)
+
+        with patch("app.status.collect_status", wraps=collect_status) as collect:
+            first = await cache.get(self.db)
+            second = await cache.get(self.db)
+            self.assertIs(first, second)
+            self.assertEqual(collect.call_count, 1)
+
+            cache.invalidate()
+            third = await cache.get(self.db)
+            self.assertEqual(collect.call_count, 2)
+
+        # Same counts, same ETag
+        self.assertEqual(first.etag, third.etag)
+
+        self.db.add(Runner(id="e", name="e", status="idle", architecture="amd64"))
+        await self.db.commit()
+        self.assertNotEqual((await cache.refresh(self.db)).etag, first.etag)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from app.database import create_engine_from_url, create_session_factory, init_db
+from app.executors import AsyncDriver, BoundedExecutor
+from app.models import Runner
+from app.provisioning import ProvisioningPipeline, ProvisioningRequest
+from app.tracing import configure_tracing, inject_context, instrument_engine, traced
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import StatusCode
+from sqlalchemy import select
+from sqlalchemy.pool import StaticPool
+
+exporter = InMemorySpanExporter()
+
+
+def setUpModule():
+    configure_tracing(exporter=exporter, sample_ratio=1.0)
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        exporter.clear()
+
+    def spans(self):
+        return {span.name: span for span in exporter.get_finished_spans()}
+
+    def test_stored_context_continues_the_webhook_trace(self):
+        with traced("webhook.job") as root:
+            serialized = inject_context()
+
+        # Later, in a task that has no span of its own
+        with traced("dispatch_job", parent=serialized):
+            pass
+
+        spans = self.spans()
+        self.assertEqual(spans["dispatch_job"].context.trace_id, root.get_span_context().trace_id)
+        self.assertEqual(spans["dispatch_job"].parent.span_id, root.get_span_context().span_id)
+
+    def test_provisioning_stages_are_child_spans(self):
+        async def ok(request):
+            pass
+
+        async def broken(request):
+            raise RuntimeError("exec failed")
+
+        async def scenario():
+            with traced("dispatch_job_event"):
+                pipeline = ProvisioningPipeline([("create", ok), ("register", broken)])
+                await pipeline.run(ProvisioningRequest(name="r", tags=[]))
+
+        asyncio.run(scenario())
+
+        spans = self.spans()
+        root = spans["dispatch_job_event"]
+        self.assertEqual(spans["provision_runner"].parent.span_id, root.context.span_id)
+        self.assertEqual(
+            spans["provision.create"].parent.span_id, spans["provision_runner"].context.span_id
+        )
+        self.assertEqual(spans["provision.register"].status.status_code, StatusCode.ERROR)
+        self.assertEqual(spans["provision_runner"].status.status_code, StatusCode.ERROR)
+
+    def test_docker_calls_on_the_pool_join_the_trace(self):
+        executor = BoundedExecutor("docker-test", max_workers=1)
+        async_driver = AsyncDriver(MagicMock(), executor)
+
+        async def scenario():
+            with traced("provision.create"):
+                await async_driver.create_runner_container(name="r")
+
+        asyncio.run(scenario())
+        executor.shutdown()
+
+        spans = self.spans()
+        self.assertEqual(
+            spans["docker.create_runner_container"].parent.span_id,
+            spans["provision.create"].context.span_id,
+        )
+
+    def test_database_queries_are_child_spans(self):
+        async def scenario():
+            engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+            await init_db(engine)
+            instrument_engine(engine)
+            async with create_session_factory(engine)() as db:
+                with traced("cleanup_idle_runners"):
+                    await db.scalars(select(Runner).where(Runner.status == "idle"))
+            await engine.dispose()
+
+        asyncio.run(scenario())
+
+        spans = self.spans()
+        self.assertEqual(
+            spans["db SELECT"].parent.span_id, spans["cleanup_idle_runners"].context.span_id
+        )
+        self.assertEqual(spans["db SELECT"].attributes["db.system"], "sqlite")
+
+
+if __name__ == "__main__":
+    unittest.main()
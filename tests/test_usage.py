@@ -0,0 +1,139 @@
+import unittest
+from unittest.mock import MagicMock
+
+from app.database import create_engine_from_url, create_session_factory, init_db
+from app.driver import DockerDriver, UsageSample
+from app.models import Job
+from app.usage import MEMORY_BASE, MIB, JobPeak, UsageHistogram, UsageTracker
+from sqlalchemy.pool import StaticPool
+
+GB = 1024**3
+
+
+def sample(container_id, job_id, cpu_seconds, read_at, memory_mb, host=None):
+    return UsageSample(container_id, job_id, int(cpu_seconds * 1e9), read_at, memory_mb * MIB, host)
+
+
+class TestUsageHistogram(unittest.TestCase):
+    def test_percentile_is_the_upper_edge_of_its_bucket(self):
+        histogram = UsageHistogram(MEMORY_BASE)
+        for _ in range(19):
+            histogram.add(500 * MIB)
+        histogram.add(4 * GB)
+
+        p50 = histogram.percentile(50)
+        self.assertGreaterEqual(p50, 500 * MIB)
+        self.assertLess(p50, 500 * MIB * UsageHistogram.RATIO)
+        self.assertGreaterEqual(histogram.percentile(99), 4 * GB)
+
+    def test_old_runs_decay(self):
+        histogram = UsageHistogram(MEMORY_BASE)
+        for _ in range(10):
+            histogram.add(4 * GB)
+        for _ in range(100):
+            histogram.add(1 * GB)
+
+        self.assertLess(histogram.percentile(95), 1.2 * GB)
+        decoded = UsageHistogram.decode(MEMORY_BASE, histogram.encode())
+        self.assertEqual(decoded.percentile(95), histogram.percentile(95))
+
+
+class TestUsageTracker(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+        await init_db(self.engine)
+        self.session_factory = create_session_factory(self.engine)
+        self.tracker = UsageTracker(
+            self.session_factory, MagicMock(), percentile=95, headroom=0.25, min_samples=3
+        )
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    def test_observe_keeps_peaks_until_the_job_is_gone(self):
+        # Two build containers of job 7 (service + build), then the job ends
+        self.assertEqual(self.tracker.observe([sample("a", "7", 10, 100.0, 300)]), {})
+        self.assertEqual(
+            self.tracker.observe(
+                [sample("a", "7", 25, 110.0, 600), sample("b", "7", 0, 110.0, 100)]
+            ),
+            {},
+        )
+        finished = self.tracker.observe([])
+
+        # 15 CPU seconds over 10 seconds; memory summed across containers
+        self.assertEqual(finished, {"7": JobPeak(cpu=1.5, memory=700 * MIB)})
+        self.assertEqual(self.tracker.peaks, {})
+
+    def test_observe_waits_for_a_skipped_host(self):
+        self.tracker.observe([sample("a", "7", 10, 100.0, 300, host="b")])
+        # Host b was unhealthy and skipped, so job 7 is not known to be done
+        self.assertEqual(self.tracker.observe([], unavailable_hosts={"b"}), {})
+        self.assertEqual(self.tracker.observe([sample("a", "7", 20, 110.0, 400, host="b")]), {})
+        finished = self.tracker.observe([])
+
+        # The rate spans the skipped round
+        self.assertEqual(finished, {"7": JobPeak(cpu=1.0, memory=400 * MIB, host="b")})
+
+    async def test_recommend_after_enough_runs(self):
+        async with self.session_factory() as db:
+            for gitlab_job_id in range(1, 5):
+                db.add(
+                    Job(gitlab_job_id=gitlab_job_id, project_id=1, project_name="p", name="build")
+                )
+            await db.commit()
+
+            await self.tracker.record(db, {"1": JobPeak(cpu=1.0, memory=GB)})
+            await self.tracker.record(
+                db, {"2": JobPeak(cpu=1.0, memory=GB), "3": JobPeak(cpu=1.5, memory=GB)}
+            )
+            await db.commit()
+            sizes = await self.tracker.recommend(db, [(1, "build"), (1, "test"), (2, "build")])
+
+        self.assertEqual(set(sizes), {(1, "build")})
+        size = sizes[(1, "build")]
+        # p95 bucket edge plus 25% headroom
+        self.assertGreaterEqual(size.cpu, 1.5 * 1.25)
+        self.assertLess(size.cpu, 1.5 * 1.25 * UsageHistogram.RATIO)
+        self.assertGreaterEqual(size.memory, 1.25 * GB)
+        self.assertEqual(size.memory % MIB, 0)
+
+    async def test_recommendations_are_clamped_and_can_be_disabled(self):
+        async with self.session_factory() as db:
+            db.add(Job(gitlab_job_id=1, project_id=1, project_name="p", name="lint"))
+            await db.commit()
+            for _ in range(3):
+                await self.tracker.record(db, {"1": JobPeak(cpu=0.01, memory=10 * MIB)})
+            await db.commit()
+
+            size = (await self.tracker.recommend(db, [(1, "lint")]))[(1, "lint")]
+            self.tracker.enabled = False
+            disabled = await self.tracker.recommend(db, [(1, "lint")])
+
+        self.assertEqual((size.cpu, size.memory), (0.25, 256 * MIB))
+        self.assertEqual(disabled, {})
+
+
+class TestSampleJobUsage(unittest.TestCase):
+    def test_reads_one_shot_stats_of_build_containers(self):
+        driver = object.__new__(DockerDriver)
+        driver.client = MagicMock()
+        driver.host = "local"
+        container = MagicMock(id="c1", attrs={"Labels": {"com.gitlab.gitlab-runner.job.id": "42"}})
+        driver.client.containers.list.return_value = [container]
+        driver.client.api.stats.return_value = {
+            "cpu_stats": {"cpu_usage": {"total_usage": 5_000_000_000}},
+            # cgroup v2 reports no max_usage
+            "memory_stats": {"usage": 900 * MIB, "stats": {"inactive_file": 100 * MIB}},
+        }
+
+        (reading,) = driver.sample_job_usage()
+
+        self.assertEqual((reading.job_id, reading.cpu_time), ("42", 5_000_000_000))
+        self.assertEqual(reading.memory, 800 * MIB)
+        self.assertEqual(reading.host, "local")
+        driver.client.api.stats.assert_called_once_with("c1", stream=False, one_shot=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
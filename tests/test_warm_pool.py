@@ -0,0 +1,103 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.database import create_engine_from_url, create_session_factory, init_db
+from app.models import Job
+from app.warm_pool import (
+    ArrivalForecaster,
+    PoolClass,
+    PoolSpec,
+    WarmPoolManager,
+    load_pool_specs,
+)
+from sqlalchemy import func, select
+from sqlalchemy.pool import StaticPool
+
+
+class TestPoolClass(unittest.TestCase):
+    def test_runner_serves_jobs_whose_tags_it_carries(self):
+        runner_class = PoolClass("amd64", None, frozenset({"docker", "autogit"}))
+
+        self.assertTrue(runner_class.serves(PoolClass("amd64", None, frozenset({"docker"}))))
+        self.assertTrue(runner_class.serves(PoolClass("amd64", None, frozenset())))
+        self.assertFalse(runner_class.serves(PoolClass("amd64", None, frozenset({"gpu"}))))
+        self.assertFalse(runner_class.serves(PoolClass("arm64", None, frozenset())))
+        self.assertFalse(runner_class.serves(PoolClass("amd64", "nvidia", frozenset())))
+
+    def test_load_pool_specs_from_env(self):
+        raw = '[{"architecture": "arm64", "tags": ["docker"], "min": 1, "max": 3}]'
+        with patch.dict(os.environ, {"WARM_POOLS": raw}):
+            specs = load_pool_specs()
+
+        self.assertEqual(len(specs), 1)
+        self.assertEqual(specs[0].pool_class.key, "arm64/cpu/docker")
+        self.assertEqual((specs[0].min_size, specs[0].max_size), (1, 3))
+
+
+class TestWarmPoolTargets(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_engine_from_url("sqlite:///:memory:", poolclass=StaticPool)
+        await init_db(self.engine)
+        self.db = create_session_factory(self.engine)()
+        self.now = datetime(2026, 1, 5, 12, 0, 0)
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        await self.engine.dispose()
+
+    async def add_jobs(self, count, created_at, tags="docker", architecture="amd64"):
+        start = await self.db.scalar(select(func.count(Job.id)))
+        for i in range(count):
+            self.db.add(
+                Job(
+                    gitlab_job_id=start + i,
+                    project_id=1,
+                    project_name="demo",
+                    architecture_req=architecture,
+                    tags=tags,
+                    created_at=created_at,
+                )
+            )
+        await self.db.commit()
+
+    async def test_targets_follow_recent_arrivals_within_bounds(self):
+        cpu_pool = PoolClass("amd64", None, frozenset({"docker", "autogit"}))
+        arm_pool = PoolClass("arm64", None, frozenset({"docker"}))
+        manager = WarmPoolManager(
+            [PoolSpec(cpu_pool, min_size=1, max_size=5), PoolSpec(arm_pool, 0, 2)],
+            ArrivalForecaster(bucket_seconds=60, alpha=0.5),
+        )
+
+        # A burst of amd64 jobs in the last minute
+        await self.add_jobs(8, self.now - timedelta(seconds=30))
+        await manager.forecaster.observe(self.db, now=self.now)
+        targets = manager.targets(now=self.now)
+
+        self.assertEqual(targets[cpu_pool], 4)
+        self.assertEqual(targets[arm_pool], 0)
+
+        # The burst decays away but the floor stays
+        for minute in range(1, 20):
+            await manager.forecaster.observe(self.db, now=self.now + timedelta(minutes=minute))
+        self.assertEqual(manager.targets(now=self.now + timedelta(minutes=20))[cpu_pool], 1)
+
+    async def test_time_of_day_history_pre_warms_recurring_peaks(self):
+        cpu_pool = PoolClass("amd64", None, frozenset({"docker", "autogit"}))
+        manager = WarmPoolManager(
+            [PoolSpec(cpu_pool, min_size=0, max_size=20)],
+            ArrivalForecaster(bucket_seconds=3600, history_days=7),
+        )
+
+        # Every day at 09:xx, 14 jobs arrive
+        for day in range(7):
+            await self.add_jobs(14, self.now.replace(hour=9, minute=15) - timedelta(days=day))
+        await manager.forecaster.observe(self.db, now=self.now)
+
+        self.assertEqual(manager.targets(now=self.now.replace(hour=9))[cpu_pool], 14)
+        self.assertEqual(manager.targets(now=self.now)[cpu_pool], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
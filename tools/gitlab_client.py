@@ -1,26 +1,71 @@
+import dataclasses
 import os
+import threading
+import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
+# The HTTP transport, rate limiting, response cache and errors are shared
+# with the runner coordinator
+from autogit_gitlab import (
+    IDEMPOTENT_METHODS,
+    CircuitBreaker,
+    GitLabApiError,
+    RateLimiter,
+    ResponseCache,
+    RetryPolicy,
+    create_session,
+    retry_after,
+)
 
-class GitLabApiError(Exception):
-    """Raised when a GitLab API request returns an error response."""
-
-    def __init__(self, status_code, message, method=None, endpoint=None):
-        self.status_code = status_code
-        self.message = message
-        self.method = method
-        self.endpoint = endpoint
-        super().__init__(f"GitLab API Error ({status_code}): {message} [{method} {endpoint}]")
+# Largest page GitLab serves
+MAX_PER_PAGE = 100
 
 
 class GitLabClient:
     """
     A lightweight Python client for the GitLab REST API v4.
+
+    Requests go through one pooled keep-alive session, so TCP and TLS
+    connections are reused across calls and across threads sharing the
+    client. Pass ``session`` to share a pool between clients.
+
+    Listings are read lazily: the ``iter_*`` methods yield one object at a
+    time and hold at most a page or two in memory, however large the
+    instance. The ``get_*`` listing methods collect every page.
+
+    Calls are paced, retried and cut off by the coordinator's
+    ``RateLimiter``, ``RetryPolicy`` and ``CircuitBreaker`` (see
+    ``app/rate_limit.py`` for the settings), shared by every thread using the
+    client: a 429 pauses all of them, and once the circuit's cooldown is over
+    a single trial call goes through. Pass ``limiter``, ``retry`` or
+    ``breaker`` to share them between clients. ``throttled`` and ``retried``
+    count the calls held back and sent again.
+
+    GET responses carrying an ``ETag`` or ``Last-Modified`` are kept in a
+    ``ResponseCache`` (the coordinator's, with the same ``GITLAB_CACHE_*``
+    settings) and revalidated with ``If-None-Match`` /
+    ``If-Modified-Since``; a 304 is answered from the cache. Pass ``cache``
+    to share one between clients.
     """
 
-    def __init__(self, base_url=None, token=None, timeout=10):
+    def __init__(
+        self,
+        base_url=None,
+        token=None,
+        timeout=10,
+        session=None,
+        pool_maxsize=None,
+        max_retries=None,
+        backoff_base=None,
+        backoff_max=None,
+        cache=None,
+        limiter=None,
+        retry=None,
+        breaker=None,
+    ):
         self.base_url = base_url or os.getenv("GITLAB_URL", "http://localhost:3000")
         self.api_url = f"{self.base_url.rstrip('/')}/api/v4"
         self.token = token or os.getenv("GITLAB_TOKEN")
@@ -33,41 +78,188 @@ class GitLabClient:
             )
 
         self.headers = {"PRIVATE-TOKEN": self.token, "Content-Type": "application/json"}
+        self.session = session or create_session(pool_maxsize)
+        self.cache = cache if cache is not None else ResponseCache()
 
-    def _request(self, method, endpoint, data=None, params=None):
-        url = f"{self.api_url}/{endpoint.lstrip('/')}"
-        try:
-            response = requests.request(
-                method, url, headers=self.headers, json=data, params=params, timeout=self.timeout
+        overrides = {
+            name: value
+            for name, value in (
+                ("max_retries", max_retries),
+                ("backoff_base", backoff_base),
+                ("backoff_max", backoff_max),
             )
+            if value is not None
+        }
+        self.retry = dataclasses.replace(retry or RetryPolicy.from_env(), **overrides)
+        self.limiter = limiter or RateLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self.throttled = 0
+        self.retried = 0
+        # The limiter and breaker are not thread-safe; every access holds this
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Close the pooled connections and the cache."""
+        self.session.close()
+        self.cache.close()
+
+    def __enter__(self):
+        return self
 
-            if response.status_code >= 400:
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _request(self, method, endpoint, data=None, params=None):
+        response = self._send(method, endpoint, data=data, params=params)
+        return response.json() if response.content else None
+
+    def _send(self, method, endpoint, data=None, params=None, url=None):
+        """Send one request and return the response, raising GitLabApiError on failure."""
+        url = url or f"{self.api_url}/{endpoint.lstrip('/')}"
+        retryable = method.upper() in IDEMPOTENT_METHODS
+        key = cached = None
+        headers = self.headers
+        if method.upper() == "GET" and self.cache.enabled:
+            key = requests.Request(method, url, params=params).prepare().url
+            cached = self.cache.get(key)
+            if cached is not None:
+                headers = {**self.headers, **cached.validators()}
+        attempt = 0
+        while True:
+            with self._lock:
+                if not self.breaker.allow():
+                    raise GitLabApiError(
+                        0,
+                        "GitLab circuit open after repeated failures",
+                        method,
+                        endpoint,
+                        retry_after=self.breaker.retry_after(),
+                    )
+                wait = self.limiter.reserve()
+                if wait > 0:
+                    self.throttled += 1
+            if wait > 0:
+                time.sleep(wait)
+
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    headers=headers,
+                    json=data,
+                    params=params,
+                    timeout=self.timeout,
+                )
+            except requests.exceptions.RequestException as e:
+                with self._lock:
+                    self.breaker.record_failure()
+                if retryable and attempt < self.retry.max_retries:
+                    attempt = self._retry(attempt)
+                    continue
+                # Wrap transport-level errors in GitLabApiError for uniformity
+                status_code = getattr(getattr(e, "response", None), "status_code", 0)
+                message = f"Request to GitLab failed: {e}"
+                raise GitLabApiError(status_code, message, method, endpoint) from e
+
+            status = response.status_code
+            delay = None
+            with self._lock:
+                self.limiter.update(response.headers)
+                if status == 429:
+                    # Not a failure of GitLab: every thread waits out the pause
+                    self.throttled += 1
+                    delay = retry_after(response.headers) or self.retry.backoff(attempt)
+                    self.limiter.pause(delay)
+                    self.breaker.record_success()
+                elif status >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+
+            if status == 429 and attempt < self.retry.max_retries:
+                # The limiter holds the retry back until the pause is over
+                attempt = self._retry(attempt, delay=0)
+                continue
+            if status >= 500 and retryable and attempt < self.retry.max_retries:
+                attempt = self._retry(attempt)
+                continue
+
+            if status >= 400:
                 try:
                     error_msg = response.json().get("message", response.text)
                 except ValueError:
                     error_msg = response.text
-                raise GitLabApiError(response.status_code, error_msg, method, endpoint)
+                raise GitLabApiError(status, error_msg, method, endpoint, retry_after=delay)
+            if key is not None:
+                if status == 304 and cached is not None:
+                    self.cache.touch(key, cached)
+                    return _from_cache(cached, response)
+                if status == 200:
+                    self.cache.put(
+                        key,
+                        response.content,
+                        dict(response.headers),
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"),
+                    )
+            return response
 
-            return response.json() if response.content else None
-        except requests.exceptions.RequestException as e:
-            if isinstance(e, GitLabApiError):
-                raise e
-            # Wrap transport-level errors in GitLabApiError for uniformity
-            status_code = getattr(getattr(e, "response", None), "status_code", 0)
-            message = f"Request to GitLab failed: {e}"
-            raise GitLabApiError(status_code, message, method, endpoint) from e
+    def _retry(self, attempt, delay=None):
+        """Sleep before retry ``attempt`` (full jitter unless ``delay`` is given)."""
+        with self._lock:
+            self.retried += 1
+        time.sleep(self.retry.backoff(attempt) if delay is None else delay)
+        return attempt + 1
+
+    def _paginate(self, endpoint, params=None, keyset=False, prefetch=False):
+        """
+        Yield every item of a listing, one page at a time.
+
+        Follows the ``Link`` header, falling back to ``X-Next-Page``. With
+        ``keyset`` the listing is ordered by id and paged by cursor, which
+        GitLab serves in constant time however deep the page. With
+        ``prefetch`` the next page is fetched on a worker thread while the
+        caller works through the current one.
+        """
+        params = {**(params or {}), "per_page": MAX_PER_PAGE}
+        if keyset:
+            params.update({"pagination": "keyset", "order_by": "id", "sort": "asc"})
+        pages = self._pages(endpoint, params)
+        if prefetch:
+            pages = _prefetched(pages)
+        for page in pages:
+            yield from page
+
+    def _pages(self, endpoint, params):
+        response = self._send("GET", endpoint, params=params)
+        while True:
+            yield response.json() or []
+            next_url = response.links.get("next", {}).get("url")
+            if next_url:
+                response = self._send("GET", endpoint, url=next_url)
+                continue
+            next_page = response.headers.get("X-Next-Page")
+            if not next_page:
+                return
+            response = self._send("GET", endpoint, params={**params, "page": next_page})
 
     # User Operations
+    def iter_users(self, prefetch=False):
+        return self._paginate("users", keyset=True, prefetch=prefetch)
+
     def get_users(self):
-        return self._request("GET", "users")
+        return list(self.iter_users())
 
     def get_current_user(self):
         return self._request("GET", "user")
 
     # Project Operations
-    def get_projects(self, owned=True):
+    def iter_projects(self, owned=True, prefetch=False):
         params = {"owned": "true"} if owned else {}
-        return self._request("GET", "projects", params=params)
+        return self._paginate("projects", params=params, keyset=True, prefetch=prefetch)
+
+    def get_projects(self, owned=True):
+        return list(self.iter_projects(owned=owned))
 
     def create_project(self, name, path=None, namespace_id=None, visibility="private"):
         data = {
@@ -83,16 +275,23 @@ class GitLabClient:
         return self._request("DELETE", f"projects/{project_id}")
 
     # SSH Key Operations
+    def iter_ssh_keys(self, prefetch=False):
+        return self._paginate("user/keys", prefetch=prefetch)
+
     def get_ssh_keys(self):
-        return self._request("GET", "user/keys")
+        return list(self.iter_ssh_keys())
 
     def add_ssh_key(self, title, key):
         data = {"title": title, "key": key}
         return self._request("POST", "user/keys", data=data)
 
     # Group Operations
+    def iter_groups(self, prefetch=False):
+        # Groups only support keyset pagination ordered by name
+        return self._paginate("groups", prefetch=prefetch)
+
     def get_groups(self):
-        return self._request("GET", "groups")
+        return list(self.iter_groups())
 
     def create_group(self, name, path, visibility="private"):
         data = {"name": name, "path": path, "visibility": visibility}
@@ -131,3 +330,29 @@ class GitLabClient:
         return self._request(
             "POST", f"projects/{project_id}/repository/files/{encoded_path}", data=data
         )
+
+
+def _from_cache(cached, not_modified):
+    """The 200 a 304 confirmed, rebuilt from the cache."""
+    response = requests.Response()
+    response.status_code = 200
+    response._content = cached.content
+    response.headers = requests.structures.CaseInsensitiveDict(cached.headers)
+    response.url = not_modified.url
+    response.request = not_modified.request
+    response.encoding = "utf-8"
+    return response
+
+
+def _prefetched(pages):
+    """
+    Yield from ``pages`` while a worker thread already fetches the next page
+    """
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        upcoming = pool.submit(next, pages, None)
+        while True:
+            page = upcoming.result()
+            if page is None:
+                return
+            upcoming = pool.submit(next, pages, None)
+            yield page